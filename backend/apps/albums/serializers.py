@@ -4,10 +4,10 @@
 
 from rest_framework import serializers
 from .models import AlbumPhoto
-from common.serializers import UserBriefSerializer
+from common.serializers import TimedSerializerMixin, UserBriefSerializer
 
 
-class AlbumPhotoSerializer(serializers.ModelSerializer):
+class AlbumPhotoSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     相册照片序列化器 / Album Photo Serializer
     """
@@ -1,3 +1,23 @@
-from django.test import TestCase
+"""
+相册模块测试 / Album Tests
+"""
 
-# Create your tests here.
+from common.testing import QueryBudgetTestCase, test_image
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    """相册接口的查询预算 / Query budgets of album endpoints"""
+    view_modules = ('apps.albums',)
+    budgets = {
+        ('circle-album', 'GET'): (3, 5_000),
+        ('circle-album', 'POST'): (2, 300),
+        ('album-photo-detail', 'DELETE'): (2, 100),
+    }
+
+    def test_album(self):
+        circle_id = self.data.class_circle.pk
+        self.assertWithinBudget('circle-album', 'GET', kwargs={'circle_id': circle_id})
+        self.assertWithinBudget('circle-album', 'POST', kwargs={'circle_id': circle_id}, data={
+            'image': test_image(), 'description': '毕业照',
+        }, format='multipart')
+        self.assertWithinBudget('album-photo-detail', 'DELETE', kwargs={'pk': self.data.photos[1].pk})
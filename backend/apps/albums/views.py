@@ -6,7 +6,8 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
 
-from apps.circles.models import Circle, CircleMember
+from apps.circles.memberships import is_member
+from apps.circles.models import Circle
 from apps.circles.services import is_circle_admin
 from common.response import success_response, error_response
 from common.pagination import StandardPagination, paginated_response
@@ -36,13 +37,7 @@ class CircleAlbumView(APIView):
             return error_response('仅班级圈支持相册功能', 400)
 
         # 检查是否是圈子成员 / Check membership
-        is_member = CircleMember.objects.filter(
-            circle=circle,
-            user=request.user,
-            status='approved'
-        ).exists()
-
-        if not is_member and circle.owner_id != request.user.id:
+        if not is_member(request.user, circle.id) and circle.owner_id != request.user.id:
             return error_response('您不是该圈子成员', 403)
 
         # 获取照片列表 / Get photos
@@ -70,13 +65,7 @@ class CircleAlbumView(APIView):
             return error_response('仅班级圈支持相册功能', 400)
 
         # 检查是否是圈子成员 / Check membership
-        is_member = CircleMember.objects.filter(
-            circle=circle,
-            user=request.user,
-            status='approved'
-        ).exists()
-
-        if not is_member and circle.owner_id != request.user.id:
+        if not is_member(request.user, circle.id) and circle.owner_id != request.user.id:
             return error_response('您不是该圈子成员', 403)
 
         # 验证数据 / Validate data
@@ -1,18 +1,42 @@
 """
 圈子管理后台 / Circle Admin
+后台修改成员或圈主时同步清除成员身份缓存
+Membership caches are invalidated when members or owners change here.
 """
 
 from django.contrib import admin
+from .memberships import invalidate_memberships
 from .models import Circle, CircleMember
 
 
+def _member_user_ids(circles):
+    return list(CircleMember.objects.filter(circle__in=circles).values_list('user_id', flat=True))
+
+
 @admin.register(Circle)
 class CircleAdmin(admin.ModelAdmin):
     """圈子管理 / Circle Admin"""
-    list_display = ['name', 'circle_type', 'school', 'grade_year', 'created_at']
+    list_display = ['name', 'circle_type', 'school', 'grade_year', 'member_count', 'created_at']
     list_filter = ['circle_type', 'school']
     search_fields = ['name', 'school__name']
     raw_id_fields = ['school', 'created_by', 'owner']
+    # 由成员变更维护，用 reconcile_member_counts 校正 / Maintained by membership changes
+    readonly_fields = ['member_count']
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if 'owner' in form.changed_data:
+            invalidate_memberships(*filter(None, [form.initial.get('owner'), obj.owner_id]))
+
+    def delete_model(self, request, obj):
+        user_ids = _member_user_ids([obj])
+        super().delete_model(request, obj)
+        invalidate_memberships(*user_ids)
+
+    def delete_queryset(self, request, queryset):
+        user_ids = _member_user_ids(queryset)
+        super().delete_queryset(request, queryset)
+        invalidate_memberships(*user_ids)
 
 
 @admin.register(CircleMember)
@@ -22,3 +46,16 @@ class CircleMemberAdmin(admin.ModelAdmin):
     list_filter = ['role', 'status']
     search_fields = ['circle__name', 'user__username']
     raw_id_fields = ['circle', 'user']
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_memberships(*filter(None, {form.initial.get('user'), obj.user_id}))
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_memberships(obj.user_id)
+
+    def delete_queryset(self, request, queryset):
+        user_ids = list(queryset.values_list('user_id', flat=True))
+        super().delete_queryset(request, queryset)
+        invalidate_memberships(*user_ids)
@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# 只在单个进程内可见的缓存后端 / Cache backends visible to one process only
+PROCESS_LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
 
 
 class CirclesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.circles"
+
+    def ready(self):
+        # 成员身份缓存用于权限判断，只在写入的 worker 上失效会让其他 worker 沿用旧权限
+        # Memberships back permission checks; a per-process cache would only be
+        # invalidated in the worker that handled the write
+        backend = settings.CACHES['default']['BACKEND']
+        if backend in PROCESS_LOCAL_CACHES:
+            raise ImproperlyConfigured(
+                f'成员身份缓存需要多进程共享的缓存，当前为 {backend} / '
+                f'the membership cache needs a cache shared by all workers, got {backend}; '
+                'set REDIS_URL or use the database cache'
+            )
@@ -0,0 +1,119 @@
+"""
+成员导出 / Circle Member Export
+
+逐批读取成员或申请并边读边输出 CSV / NDJSON，内存占用与圈子大小无关：
+WSGI 下用服务端游标；ASGI 下 Django 会把同步迭代器整个读入列表再发送，
+因此改用异步迭代器，每批通过 sync_to_async 按主键续读
+Streams members or applications as CSV / NDJSON while reading them in
+batches, so memory does not grow with the circle. Under WSGI rows come from
+a server-side cursor. Under ASGI Django would drain a sync iterator into a
+list before sending, so an async iterator fetches keyset batches through
+sync_to_async instead.
+"""
+
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from .models import CircleMember
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_STATUSES = ('approved', 'pending', 'rejected')
+EXPORT_FIELDS = ('id', 'user_id', 'username', 'role', 'status', 'joined_at')
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """csv.writer 的伪文件，直接返回写入的行 / Pseudo file returning what csv.writer writes"""
+
+    def write(self, value):
+        return value
+
+
+def _member_rows(circle, status):
+    return CircleMember.objects.filter(circle=circle, status=status).order_by('pk').values_list(
+        'pk', 'user_id', 'user__username', 'role', 'status', 'joined_at'
+    )
+
+
+def iter_member_rows(circle, status):
+    """
+    按主键顺序逐批读取成员行（服务端游标）/ Member rows in primary-key order via a server-side cursor
+    Yields:
+        tuple: 与 EXPORT_FIELDS 对应 / Values matching EXPORT_FIELDS
+    """
+    return _member_rows(circle, status).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def _fetch_batch(circle, status, after_pk):
+    return list(_member_rows(circle, status).filter(pk__gt=after_pk)[:EXPORT_CHUNK_SIZE])
+
+
+async def aiter_member_rows(circle, status):
+    """
+    异步逐批读取成员行，按主键续读 / Member rows fetched in keyset batches for ASGI
+    Yields:
+        tuple: 与 EXPORT_FIELDS 对应 / Values matching EXPORT_FIELDS
+    """
+    last_pk = 0
+    while True:
+        rows = await sync_to_async(_fetch_batch)(circle, status, last_pk)
+        for row in rows:
+            yield row
+        if len(rows) < EXPORT_CHUNK_SIZE:
+            return
+        last_pk = rows[-1][0]
+
+
+def _csv_formatter():
+    """(表头, 行格式化函数) / (header, row formatter)"""
+    writer = csv.writer(_Echo())
+    # BOM 让 Excel 按 UTF-8 打开中文用户名 / The BOM makes Excel read Chinese usernames as UTF-8
+    return '\ufeff' + writer.writerow(EXPORT_FIELDS), writer.writerow
+
+
+def _ndjson_formatter():
+    """(表头, 行格式化函数) / (header, row formatter)"""
+    def format_row(row):
+        return json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+    return '', format_row
+
+
+def _lines(rows, header, format_row):
+    if header:
+        yield header
+    for row in rows:
+        yield format_row(row)
+
+
+async def _alines(rows, header, format_row):
+    if header:
+        yield header
+    async for row in rows:
+        yield format_row(row)
+
+
+def member_export_response(request, circle, status, export_format):
+    """
+    流式导出响应 / Streaming export response
+    Args:
+        status: approved / pending / rejected
+        export_format: csv / ndjson
+    """
+    if export_format == 'csv':
+        (header, format_row), content_type = _csv_formatter(), 'text/csv; charset=utf-8'
+    else:
+        (header, format_row), content_type = _ndjson_formatter(), 'application/x-ndjson; charset=utf-8'
+
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        lines = _alines(aiter_member_rows(circle, status), header, format_row)
+    else:
+        lines = _lines(iter_member_rows(circle, status), header, format_row)
+
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="circle-{circle.pk}-{status}.{export_format}"'
+    return response
@@ -0,0 +1,80 @@
+"""
+自动入圈性能对比 / Auto-Join Benchmark
+
+对同一份名册分别执行逐个用户的 auto_join_circles 与 bulk_auto_join_circles，
+报告耗时、吞吐和查询数；每次都在回滚的事务中新建学校，不留下数据
+Runs the per-user auto_join_circles and bulk_auto_join_circles on the same
+roster and reports time, throughput and query counts. Each run creates a
+fresh school inside a rolled-back transaction and leaves nothing behind.
+用法 / Usage:
+    python manage.py benchmark_auto_join --users 2000 --years 3
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.circles.services import auto_join_circles, bulk_auto_join_circles, import_roster
+from apps.schools.models import School
+
+
+def build_roster(count, years):
+    """构造名册行，平均分布在若干届 / Build roster rows spread over a few years"""
+    return [
+        {
+            'username': f'bench_join_{i:06d}', 'real_name': f'同学{i}',
+            'enrollment_year': 2010 + i % years, 'graduation_year': 2013 + i % years,
+            'class_name': f'{i % 12 + 1}班',
+        }
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = '对比逐个与批量自动入圈 / Compare per-user and bulk auto-join'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='名册人数 / Roster size')
+        parser.add_argument('--years', type=int, default=3, help='届数 / Enrollment years')
+
+    def handle(self, *args, **options):
+        rows = build_roster(options['users'], max(options['years'], 1))
+
+        def per_user(profiles):
+            for profile in profiles:
+                auto_join_circles(profile.user)
+
+        results = [
+            ('逐个 / auto_join_circles', *self._measure(rows, per_user)),
+            ('批量 / bulk_auto_join_circles', *self._measure(rows, bulk_auto_join_circles)),
+        ]
+        self.stdout.write(f"{len(rows)} 个用户 / users")
+        self.stdout.write(f"{'':32}{'耗时 / time':>14}{'users/s':>10}{'查询 / queries':>16}")
+        for name, elapsed, queries in results:
+            self.stdout.write(f'{name:32}{elapsed:12.2f} s{len(rows) / elapsed:10.0f}{queries:16}')
+        (_, slow, slow_queries), (_, fast, fast_queries) = results
+        self.stdout.write(self.style.SUCCESS(
+            f'加速比 / speed-up: {slow / fast:.1f}x, 查询 / queries {slow_queries} -> {fast_queries}'
+        ))
+
+    def _measure(self, rows, join):
+        """在回滚的事务中导入并入圈 / Import and join inside a rolled-back transaction"""
+        with transaction.atomic():
+            school = School.objects.create(name='压测中学', province='压测', city='压测')
+            profiles, _ = import_roster(school, rows)
+            for profile in profiles:
+                profile.school = school
+                profile.user.profile = profile
+            queries = []
+
+            def count_query(execute, sql, params, many, context):
+                queries.append(sql)
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count_query):
+                started = time.perf_counter()
+                join(profiles)
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return elapsed, len(queries)
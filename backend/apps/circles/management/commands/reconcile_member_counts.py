@@ -0,0 +1,35 @@
+"""
+校正圈子成员数 / Reconcile Circle Member Counts
+
+后台直接修改成员、批量导入等绕过服务层的写入后执行
+Run after writes that bypass the service layer (admin edits, bulk imports)
+用法 / Usage:
+    python manage.py reconcile_member_counts [--batch-size 1000] [--dry-run]
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.circles.services import reconcile_member_counts
+
+
+class Command(BaseCommand):
+    help = '按已通过的成员校正圈子成员数 / Repair drift in circle member counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='每批处理的行数 / Rows per batch'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='只统计偏差，不写入 / Report drift without writing'
+        )
+
+    def handle(self, *args, **options):
+        checked, repaired = reconcile_member_counts(options['batch_size'], options['dry_run'])
+        self.stdout.write(f'圈子 / circles: checked={checked} repaired={repaired}')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('dry run，未写入 / nothing written'))
+        else:
+            self.stdout.write(self.style.SUCCESS('校正完成 / done'))
@@ -0,0 +1,60 @@
+"""
+成员身份缓存 / Circle Membership Cache
+
+按用户缓存已通过的圈子及角色 {circle_id: role}，供权限检查、动态流和序列化器读取，
+避免每个请求都查询 CircleMember。TTL 有上限，所有修改 CircleMember 或 Circle.owner
+的代码路径都必须调用 invalidate_memberships()
+Caches each user's approved circles and roles as {circle_id: role} for
+permission checks, feeds and serializers, so requests stop querying
+CircleMember. The TTL is bounded, and every code path that changes
+CircleMember or Circle.owner must call invalidate_memberships().
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import CircleMember
+
+
+def _ttl():
+    return getattr(settings, 'CIRCLE_MEMBERSHIP_CACHE_TTL', 300)
+
+
+def _membership_key(user_id):
+    return f'circles:memberships:{user_id}'
+
+
+def get_memberships(user):
+    """
+    用户已通过的圈子及角色 / The user's approved circles and roles
+    Returns:
+        dict: {圈子 id: 角色} / {circle_id: role}
+    """
+    if not user.is_authenticated:
+        return {}
+    key = _membership_key(user.id)
+    roles = cache.get(key)
+    if roles is None:
+        roles = dict(CircleMember.objects.filter(
+            user=user, status='approved'
+        ).values_list('circle_id', 'role'))
+        cache.set(key, roles, _ttl())
+    return roles
+
+
+def is_member(user, circle_id):
+    """是否为已通过的成员 / Whether the user is an approved member"""
+    return circle_id in get_memberships(user)
+
+
+def invalidate_memberships(*user_ids):
+    """
+    清除用户的成员身份缓存 / Drop cached memberships of these users
+    立即删除一次，事务提交后再删除一次，防止提交前的并发读取把旧数据写回缓存
+    Deleted now and again on commit, so a concurrent read before the commit
+    cannot put stale data back.
+    """
+    keys = [_membership_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:14
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_member_count(apps, schema_editor):
+    """按已通过的成员回填 / Backfill from approved members"""
+    Circle = apps.get_model('circles', 'Circle')
+    CircleMember = apps.get_model('circles', 'CircleMember')
+    Circle.objects.update(member_count=Coalesce(Subquery(
+        CircleMember.objects.filter(circle=OuterRef('pk'), status='approved')
+        .order_by().values('circle').annotate(total=Count('pk')).values('total')
+    ), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('circles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='circle',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='成员数'),
+        ),
+        migrations.RunPython(backfill_member_count, migrations.RunPython.noop),
+    ]
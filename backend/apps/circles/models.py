@@ -3,6 +3,7 @@
 """
 
 from django.db import models
+from django.db.models import F
 from django.conf import settings
 
 
@@ -80,6 +81,12 @@ class Circle(models.Model):
         verbose_name='圈主'
     )
 
+    # 成员数（已通过，冗余计数）/ Approved member count (denormalized)
+    member_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='成员数'
+    )
+
     # 创建时间 / Created at
     created_at = models.DateTimeField(
         auto_now_add=True,
@@ -96,6 +103,10 @@ class Circle(models.Model):
     def __str__(self):
         return self.name
 
+    def increment_member_count(self, delta):
+        """原子增量更新成员数 / Atomically apply member count delta"""
+        Circle.objects.filter(pk=self.pk).update(member_count=F('member_count') + delta)
+
 
 class CircleMember(models.Model):
     """
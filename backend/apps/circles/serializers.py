@@ -4,11 +4,12 @@
 
 from rest_framework import serializers
 from .models import Circle, CircleMember
+from .services import get_viewer_roles
 from apps.schools.serializers import SchoolSerializer
-from common.serializers import get_user_avatar
+from common.serializers import TimedSerializerMixin, get_user_avatar
 
 
-class CircleMemberSerializer(serializers.ModelSerializer):
+class CircleMemberSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """圈子成员序列化器 / Circle Member Serializer"""
     username = serializers.CharField(source='user.username', read_only=True)
     avatar = serializers.SerializerMethodField()
@@ -22,10 +23,9 @@ class CircleMemberSerializer(serializers.ModelSerializer):
         return get_user_avatar(obj.user)
 
 
-class CircleSerializer(serializers.ModelSerializer):
+class CircleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """圈子序列化器 / Circle Serializer"""
     school = SchoolSerializer(read_only=True)
-    member_count = serializers.SerializerMethodField()
     is_member = serializers.SerializerMethodField()
     is_owner = serializers.SerializerMethodField()
     my_role = serializers.SerializerMethodField()
@@ -37,18 +37,30 @@ class CircleSerializer(serializers.ModelSerializer):
             'name', 'description', 'created_by', 'owner', 'created_at',
             'member_count', 'is_member', 'is_owner', 'my_role'
         ]
-        read_only_fields = ['id', 'created_at', 'created_by', 'owner']
+        read_only_fields = ['id', 'created_at', 'created_by', 'owner', 'member_count']
 
-    def get_member_count(self, obj):
-        return obj.members.filter(status='approved').count()
+    def _viewer_roles(self, obj):
+        """
+        当前用户的 {圈子 id: 角色} / The requesting user's {circle_id: role}
+        视图可通过 context['viewer_roles'] 传入；否则按本页圈子查询一次并存入 context，
+        is_member 与 my_role 都从内存读取
+        Views may pass context['viewer_roles']; otherwise one query covers the
+        whole page and is stored in the context, so is_member and my_role
+        read from memory.
+        """
+        roles = self.context.get('viewer_roles')
+        if roles is None:
+            request = self.context.get('request')
+            if isinstance(self.parent, serializers.ListSerializer):
+                circle_ids = [circle.id for circle in self.parent.instance]
+            else:
+                circle_ids = [obj.id]
+            roles = get_viewer_roles(request.user, circle_ids) if request else {}
+            self.context['viewer_roles'] = roles
+        return roles
 
     def get_is_member(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.members.filter(
-                user=request.user, status='approved'
-            ).exists()
-        return False
+        return obj.id in self._viewer_roles(obj)
 
     def get_is_owner(self, obj):
         request = self.context.get('request')
@@ -57,13 +69,7 @@ class CircleSerializer(serializers.ModelSerializer):
         return False
 
     def get_my_role(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            member = obj.members.filter(
-                user=request.user, status='approved'
-            ).first()
-            return member.role if member else None
-        return None
+        return self._viewer_roles(obj).get(obj.id)
 
 
 class CircleCreateSerializer(serializers.Serializer):
@@ -76,3 +82,23 @@ class CircleCreateSerializer(serializers.Serializer):
         if not hasattr(user, 'profile') or not user.profile.is_profile_complete:
             raise serializers.ValidationError('请先完善个人资料')
         return attrs
+
+
+class ApplicationBulkReviewSerializer(serializers.Serializer):
+    """
+    批量审核参数 / Bulk Review Params
+    给出 member_ids，或 all=true 配合可选的申请时间范围
+    Either member_ids, or all=true with an optional application time range
+    """
+    action = serializers.ChoiceField(choices=['approve', 'reject'])
+    member_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False, max_length=1000
+    )
+    all = serializers.BooleanField(required=False, default=False)
+    joined_before = serializers.DateTimeField(required=False)
+    joined_after = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if ('member_ids' in attrs) == attrs['all']:
+            raise serializers.ValidationError('请指定 member_ids 或 all，二者选一')
+        return attrs
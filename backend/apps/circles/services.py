@@ -2,8 +2,19 @@
 话题圈服务 / Circle Services
 """
 
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from apps.posts.timeline import backfill_timelines, rebuild_timeline
+from apps.users.models import User, UserProfile
+from .memberships import get_memberships, invalidate_memberships
 from .models import Circle, CircleMember
 
+# 批量写入大小 / Bulk insert batch size
+BULK_BATCH_SIZE = 1000
+
 
 def auto_join_circles(user):
     """
@@ -30,11 +41,7 @@ def auto_join_circles(user):
     )
 
     # 加入校级圈 / Join school circle
-    CircleMember.objects.get_or_create(
-        circle=school_circle,
-        user=user,
-        defaults={'status': 'approved', 'role': 'member'}
-    )
+    join_circle_once(school_circle, user)
 
     # 2. 查找或创建年级圈 / Find or create grade circle
     if profile.enrollment_year:
@@ -51,11 +58,291 @@ def auto_join_circles(user):
         )
 
         # 加入年级圈 / Join grade circle
-        CircleMember.objects.get_or_create(
-            circle=grade_circle,
-            user=user,
-            defaults={'status': 'approved', 'role': 'member'}
+        join_circle_once(grade_circle, user)
+
+    # 补齐首页时间线 / Backfill home timeline
+    rebuild_timeline(user)
+
+
+def bulk_auto_join_circles(profiles):
+    """
+    批量自动入圈（学校入驻、整届导入）/ Bulk auto-join for school onboarding
+    规则与 auto_join_circles 相同，但每个校级圈、年级圈只查找或创建一次，
+    成员批量写入并跳过已存在的行，最后按实际成员重算涉及圈子的成员数；
+    同校同届的用户加入的圈子相同，时间线按组一次补齐
+    Same rules as auto_join_circles, but each school and grade circle is
+    resolved once, memberships are bulk-inserted skipping existing rows and
+    the touched circles are recounted from their members. Users of the same
+    school and year join the same circles, so timelines are backfilled per group.
+    Args:
+        profiles: 预取了 school 的 UserProfile / UserProfiles with school selected
+    Returns:
+        新增的成员数 / Memberships created
+    """
+    groups = {}
+    for profile in profiles:
+        if profile.school_id:
+            groups.setdefault((profile.school_id, profile.enrollment_year), []).append(profile)
+    if not groups:
+        return 0
+
+    circles = {
+        (circle.school_id, circle.circle_type, circle.grade_year): circle
+        for circle in Circle.objects.filter(
+            school_id__in={school_id for school_id, _ in groups},
+            circle_type__in=['school', 'grade'], class_name=''
+        )
+    }
+    # 与单用户路径一致：首个成员创建并拥有新圈子 / Like the per-user path, the first member creates new circles
+    targets = {}
+    for (school_id, year), members in groups.items():
+        targets[school_id, year] = [_resolve_circle(circles, members[0], None)]
+        if year:
+            targets[school_id, year].append(_resolve_circle(circles, members[0], year))
+
+    user_ids = [profile.user_id for members in groups.values() for profile in members]
+    circle_ids = {circle.pk for joined in targets.values() for circle in joined}
+    existing = set(CircleMember.objects.filter(
+        circle_id__in=circle_ids, user_id__in=user_ids
+    ).values_list('circle_id', 'user_id'))
+    rows = [
+        CircleMember(circle=circle, user_id=profile.user_id, status='approved', role='member')
+        for key, members in groups.items()
+        for circle in targets[key]
+        for profile in members
+        if (circle.pk, profile.user_id) not in existing
+    ]
+
+    with transaction.atomic():
+        # 并发加入的行由唯一约束跳过，成员数按实际行重算
+        # Rows joined concurrently are skipped by the unique constraint; counts come from the rows
+        CircleMember.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+        Circle.objects.filter(pk__in=circle_ids).update(member_count=_approved_member_count())
+        invalidate_memberships(*user_ids)
+
+    for key, members in groups.items():
+        backfill_timelines(
+            [profile.user_id for profile in members], [circle.pk for circle in targets[key]]
+        )
+    return len(rows)
+
+
+def _resolve_circle(circles, profile, grade_year):
+    """查找或创建校级圈（grade_year 为空）或年级圈 / Find or create the school or grade circle"""
+    circle_type = 'grade' if grade_year else 'school'
+    key = (profile.school_id, circle_type, grade_year)
+    if key not in circles:
+        school = profile.school
+        circles[key], _ = Circle.objects.get_or_create(
+            school=school,
+            circle_type=circle_type,
+            grade_year=grade_year,
+            class_name='',
+            defaults={
+                'name': f"{school.name} {grade_year}级" if grade_year else f"{school.name}",
+                'created_by_id': profile.user_id,
+                'owner_id': profile.user_id,
+            }
+        )
+    return circles[key]
+
+
+def import_roster(school, rows, password=None):
+    """
+    导入班级名册：批量创建用户和资料 / Import a class roster as users and profiles
+    已存在的用户名跳过；初始密码只哈希一次，未提供时为不可用密码
+    Existing usernames are skipped. The initial password is hashed once;
+    without one the accounts get unusable passwords.
+    Args:
+        rows: dict 列表，含 username、real_name、enrollment_year、graduation_year、class_name
+              / dicts with username, real_name, enrollment_year, graduation_year, class_name
+    Returns:
+        (新建的 UserProfile 列表, 跳过的用户名) / (created profiles, skipped usernames)
+    """
+    rows = list(rows)
+    taken = set(User.objects.filter(
+        username__in=[row['username'] for row in rows]
+    ).values_list('username', flat=True))
+    skipped = [row['username'] for row in rows if row['username'] in taken]
+    rows = [row for row in rows if row['username'] not in taken]
+    hashed = make_password(password)
+
+    with transaction.atomic():
+        users = User.objects.bulk_create(
+            [User(username=row['username'], password=hashed) for row in rows],
+            batch_size=BULK_BATCH_SIZE
+        )
+        profiles = UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user, school=school,
+                real_name=row.get('real_name', ''),
+                enrollment_year=row.get('enrollment_year'),
+                graduation_year=row.get('graduation_year'),
+                class_name=row.get('class_name', ''),
+                is_profile_complete=all([
+                    row.get('real_name'), row.get('enrollment_year'),
+                    row.get('graduation_year'), row.get('class_name'),
+                ]),
+            )
+            for user, row in zip(users, rows)
+        ], batch_size=BULK_BATCH_SIZE)
+    return profiles, skipped
+
+
+def add_member(circle, user, status='approved', role='member'):
+    """
+    添加成员，已通过时同步成员数 / Add a member, counting it when approved
+    Returns:
+        CircleMember
+    """
+    with transaction.atomic():
+        member = CircleMember.objects.create(circle=circle, user=user, status=status, role=role)
+        if status == 'approved':
+            circle.increment_member_count(1)
+            invalidate_memberships(user.id)
+    return member
+
+
+def join_circle_once(circle, user):
+    """
+    幂等加入（自动入圈用），只有新建成员时计数
+    Idempotent join for auto-join; counted only when the row is created
+    """
+    with transaction.atomic():
+        _, created = CircleMember.objects.get_or_create(
+            circle=circle, user=user, defaults={'status': 'approved', 'role': 'member'}
+        )
+        if created:
+            circle.increment_member_count(1)
+            invalidate_memberships(user.id)
+    return created
+
+
+def remove_member(circle, user):
+    """
+    退出圈子或撤回申请 / Leave a circle or withdraw an application
+    按状态分别删除，只有确实删除了已通过的成员才减少成员数，并发重复退出不会重复扣减
+    Deletes by status so the count only drops when an approved row was
+    actually deleted; concurrent double leaves cannot double count.
+    Returns:
+        bool: 是否删除了成员或申请 / Whether a membership or application was deleted
+    """
+    with transaction.atomic():
+        deleted, _ = CircleMember.objects.filter(
+            circle=circle, user=user, status='approved'
+        ).delete()
+        if deleted:
+            circle.increment_member_count(-1)
+            invalidate_memberships(user.id)
+            return True
+    deleted, _ = CircleMember.objects.filter(
+        circle=circle, user=user, status='pending'
+    ).delete()
+    return bool(deleted)
+
+
+def review_application(application, approve):
+    """
+    审核入圈申请 / Review a pending application
+    条件更新 pending -> approved/rejected，只有状态确实变化时才计数
+    Conditional update from pending, counted only when the status changed.
+    Returns:
+        bool: 是否由本次请求处理 / Whether this call processed the application
+    """
+    with transaction.atomic():
+        updated = CircleMember.objects.filter(pk=application.pk, status='pending').update(
+            status='approved' if approve else 'rejected'
+        )
+        if updated and approve:
+            Circle(pk=application.circle_id).increment_member_count(1)
+            invalidate_memberships(application.user_id)
+    return bool(updated)
+
+
+def bulk_review_applications(circle, approve, member_ids=None, joined_before=None, joined_after=None):
+    """
+    批量审核入圈申请 / Review many pending applications at once
+    按 id 列表或申请时间筛选；先锁定匹配的待审核行取得用户，再用一条 UPDATE
+    改状态，成员数按实际更新的行数增加，并发的单条审核不会重复计数
+    Selects by id list or application time. Matching pending rows are locked
+    to collect their users, one UPDATE changes their status and the member
+    count grows by the rows actually updated, so concurrent single reviews
+    cannot double count.
+    Returns:
+        list: 本次处理的申请者用户 id / User ids of the applications processed
+    """
+    pending = CircleMember.objects.filter(circle=circle, status='pending')
+    if member_ids is not None:
+        pending = pending.filter(pk__in=member_ids)
+    if joined_before:
+        pending = pending.filter(joined_at__lt=joined_before)
+    if joined_after:
+        pending = pending.filter(joined_at__gte=joined_after)
+
+    with transaction.atomic():
+        locked = dict(pending.select_for_update().values_list('pk', 'user_id'))
+        if not locked:
+            return []
+        updated = CircleMember.objects.filter(pk__in=locked, status='pending').update(
+            status='approved' if approve else 'rejected'
+        )
+        if updated and approve:
+            circle.increment_member_count(updated)
+            invalidate_memberships(*locked.values())
+
+    if approve:
+        backfill_timelines(list(locked.values()), [circle.pk])
+    return list(locked.values())
+
+
+def reconcile_member_counts(batch_size=1000, dry_run=False):
+    """
+    校正圈子成员数 / Repair drift in circle member counts
+    按主键分批比对已通过成员的真实数量，仅对有偏差的行批量更新
+    Compares member_count with the approved members in primary-key batches
+    and bulk-updates only the rows that drifted.
+    Returns:
+        (检查的圈子数, 修正的圈子数) / (circles checked, circles repaired)
+    """
+    checked = repaired = 0
+    last_pk = 0
+    while True:
+        rows = list(
+            Circle.objects.filter(pk__gt=last_pk).order_by('pk').annotate(
+                real_member_count=_approved_member_count()
+            ).only('pk', 'member_count')[:batch_size]
         )
+        if not rows:
+            break
+        last_pk = rows[-1].pk
+        checked += len(rows)
+
+        drifted = [circle for circle in rows if circle.member_count != circle.real_member_count]
+        for circle in drifted:
+            circle.member_count = circle.real_member_count
+        repaired += len(drifted)
+        if drifted and not dry_run:
+            Circle.objects.bulk_update(drifted, ['member_count'])
+
+    return checked, repaired
+
+
+def _approved_member_count():
+    """圈子已通过成员数的子查询 / Subquery counting a circle's approved members"""
+    return Coalesce(Subquery(
+        CircleMember.objects.filter(circle=OuterRef('pk'), status='approved')
+        .order_by().values('circle').annotate(total=Count('pk')).values('total')
+    ), Value(0))
+
+
+def get_viewer_roles(user, circle_ids):
+    """
+    用户在这些圈子中已通过的角色（读缓存）/ The user's approved roles in these circles (cached)
+    Returns:
+        dict: {圈子 id: 角色}，未加入的圈子不在其中 / {circle_id: role}, circles not joined are absent
+    """
+    memberships = get_memberships(user)
+    return {circle_id: memberships[circle_id] for circle_id in circle_ids if circle_id in memberships}
 
 
 def get_circle_or_none(pk):
@@ -74,9 +361,4 @@ def is_circle_admin(circle, user):
     """
     if circle.owner_id == user.id:
         return True
-    return CircleMember.objects.filter(
-        circle=circle,
-        user=user,
-        role='admin',
-        status='approved'
-    ).exists()
+    return get_memberships(user).get(circle.id) == 'admin'
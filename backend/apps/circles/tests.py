@@ -1,3 +1,351 @@
-from django.test import TestCase
+"""
+圈子模块测试 / Circle Tests
+"""
 
-# Create your tests here.
+import json
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.posts.models import Post, TimelineEntry
+from apps.schools.models import School
+from apps.users.models import User, UserProfile
+from common.testing import LOCAL_CACHES, QueryBudgetTestCase
+from . import exports
+from .memberships import get_memberships, is_member
+from .models import Circle, CircleMember
+from .serializers import CircleSerializer
+from .services import (
+    add_member, auto_join_circles, bulk_auto_join_circles, import_roster,
+    reconcile_member_counts, remove_member, review_application
+)
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    """圈子接口的查询预算 / Query budgets of circle endpoints"""
+    view_modules = ('apps.circles',)
+    budgets = {
+        ('my-circles', 'GET'): (1, 7_000),
+        ('circle-create', 'POST'): (4, 700),
+        ('circle-detail', 'GET'): (1, 700),
+        ('circle-join', 'POST'): (9, 100),
+        ('circle-leave', 'POST'): (4, 100),
+        ('circle-transfer', 'PUT'): (4, 100),
+        ('circle-members', 'GET'): (3, 4_000),
+        ('circle-applications', 'GET'): (3, 4_000),
+        ('circle-application-review', 'PUT'): (10, 100),
+        ('circle-applications-review', 'POST'): (5, 100),
+        ('circle-member-export', 'GET'): (2, 170_000),
+    }
+
+    def test_read(self):
+        self.assertWithinBudget('my-circles', 'GET')
+        self.assertWithinBudget('circle-detail', 'GET', kwargs={'pk': self.data.school_circle.pk})
+        self.assertWithinBudget('circle-members', 'GET', kwargs={'pk': self.data.school_circle.pk})
+        self.assertWithinBudget('circle-applications', 'GET', kwargs={'pk': self.data.class_circle.pk})
+        self.assertWithinBudget('circle-member-export', 'GET', kwargs={'pk': self.data.school_circle.pk})
+        self.assertWithinBudget(
+            'circle-member-export', 'GET', kwargs={'pk': self.data.class_circle.pk},
+            query={'status': 'pending', 'output': 'ndjson'},
+        )
+
+    def test_membership(self):
+        self.assertWithinBudget('circle-create', 'POST', data={'class_name': '9班'})
+        joiner = self.data.users[1500]
+        self.assertWithinBudget(
+            'circle-join', 'POST', kwargs={'pk': self.data.grade_circles[0].pk},
+            client=self.client_for(joiner),
+        )
+        self.assertWithinBudget(
+            'circle-leave', 'POST', kwargs={'pk': self.data.grade_circles[5].pk},
+            client=self.client_for(self.data.users[0]),
+        )
+        self.assertWithinBudget('circle-application-review', 'PUT', kwargs={
+            'pk': self.data.class_circle.pk, 'member_id': self.data.pending_member.pk,
+        }, data={'action': 'approve'})
+        self.assertWithinBudget('circle-applications-review', 'POST', kwargs={
+            'pk': self.data.class_circle.pk,
+        }, data={'action': 'approve', 'all': True})
+        self.assertWithinBudget(
+            'circle-transfer', 'PUT', kwargs={'pk': self.data.class_circle.pk},
+            data={'user_id': self.data.users[0].pk},
+        )
+
+
+class MemberCountTests(TestCase):
+    """成员数维护 / Member count maintenance"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='第一中学', province='北京', city='北京')
+        cls.owner = User.objects.create_user(username='owner', password='password')
+        cls.user = User.objects.create_user(username='member', password='password')
+        cls.circle = Circle.objects.create(
+            circle_type='class', school=school, grade_year=2010, class_name='1班',
+            name='1班', owner=cls.owner, created_by=cls.owner
+        )
+        add_member(cls.circle, cls.owner, role='admin')
+
+    def member_count(self):
+        self.circle.refresh_from_db(fields=['member_count'])
+        return self.circle.member_count
+
+    def test_join_and_leave(self):
+        self.assertEqual(self.member_count(), 1)
+        add_member(self.circle, self.user, status='pending')
+        self.assertEqual(self.member_count(), 1)
+
+        application = CircleMember.objects.get(circle=self.circle, user=self.user)
+        self.assertTrue(review_application(application, approve=True))
+        self.assertFalse(review_application(application, approve=True))
+        self.assertEqual(self.member_count(), 2)
+
+        self.assertTrue(remove_member(self.circle, self.user))
+        self.assertFalse(remove_member(self.circle, self.user))
+        self.assertEqual(self.member_count(), 1)
+
+    def test_reject_and_withdraw(self):
+        add_member(self.circle, self.user, status='pending')
+        application = CircleMember.objects.get(circle=self.circle, user=self.user)
+        self.assertTrue(review_application(application, approve=False))
+        self.assertEqual(self.member_count(), 1)
+
+        CircleMember.objects.filter(pk=application.pk).update(status='pending')
+        self.assertTrue(remove_member(self.circle, self.user))
+        self.assertEqual(self.member_count(), 1)
+
+    def test_serializer_reads_column(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get(f'/api/v1/circles/{self.circle.pk}/')
+        self.assertEqual(response.data['data']['member_count'], 1)
+
+    def test_reconcile(self):
+        Circle.objects.filter(pk=self.circle.pk).update(member_count=7)
+        self.assertEqual(reconcile_member_counts(dry_run=True), (1, 1))
+        self.assertEqual(self.member_count(), 7)
+        self.assertEqual(reconcile_member_counts(), (1, 1))
+        self.assertEqual(self.member_count(), 1)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ViewerRoleTests(TestCase):
+    """本页圈子的成员身份只查询一次 / Viewer memberships resolved once per page"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='第一中学', province='北京', city='北京')
+        cls.user = User.objects.create_user(username='viewer', password='password')
+        cls.circles = [
+            Circle.objects.create(
+                circle_type='grade', school=school, grade_year=2000 + i,
+                name=f'圈子{i}', owner=cls.user, created_by=cls.user
+            )
+            for i in range(5)
+        ]
+        add_member(cls.circles[0], cls.user, role='admin')
+        add_member(cls.circles[1], cls.user)
+        add_member(cls.circles[2], cls.user, status='pending')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_resolves_once(self):
+        request = SimpleNamespace(user=self.user)
+        circles = list(Circle.objects.select_related('school').order_by('pk'))
+        with self.assertNumQueries(1):
+            data = CircleSerializer(circles, many=True, context={'request': request}).data
+        self.assertEqual(
+            [(item['is_member'], item['my_role']) for item in data],
+            [(True, 'admin'), (True, 'member'), (False, None), (False, None), (False, None)]
+        )
+        # 之后的请求命中成员身份缓存 / Later requests hit the membership cache
+        with self.assertNumQueries(0):
+            CircleSerializer(circles, many=True, context={'request': request}).data
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class MembershipCacheTests(TestCase):
+    """成员身份缓存随成员变更失效 / Membership cache invalidated on membership changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='第一中学', province='北京', city='北京')
+        cls.owner = User.objects.create_user(username='owner', password='password')
+        cls.user = User.objects.create_user(username='member', password='password')
+        cls.circle = Circle.objects.create(
+            circle_type='class', school=school, grade_year=2010, class_name='1班',
+            name='1班', owner=cls.owner, created_by=cls.owner
+        )
+        add_member(cls.circle, cls.owner, role='owner')
+
+    def setUp(self):
+        cache.clear()
+
+    def assertMember(self, expected):
+        with self.assertNumQueries(0):
+            self.assertEqual(is_member(self.user, self.circle.id), expected)
+
+    def test_join_review_and_leave(self):
+        self.assertFalse(is_member(self.user, self.circle.id))
+
+        application = add_member(self.circle, self.user, status='pending')
+        self.assertMember(False)
+        self.assertTrue(review_application(application, approve=True))
+        self.assertTrue(is_member(self.user, self.circle.id))
+        self.assertMember(True)
+
+        remove_member(self.circle, self.user)
+        self.assertFalse(is_member(self.user, self.circle.id))
+        self.assertMember(False)
+
+    def test_transfer_updates_roles(self):
+        add_member(self.circle, self.user)
+        self.assertEqual(get_memberships(self.user), {self.circle.id: 'member'})
+
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.put(
+            f'/api/v1/circles/{self.circle.id}/transfer/', {'user_id': self.user.id}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_memberships(self.user), {self.circle.id: 'admin'})
+
+
+class BulkAutoJoinTests(TestCase):
+    """批量入圈与逐个入圈结果一致 / Bulk auto-join matches the per-user path"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = School.objects.create(name='第一中学', province='北京', city='北京')
+        cls.rows = [
+            {
+                'username': f'student{i}', 'real_name': f'同学{i}',
+                'enrollment_year': 2010 + i % 2, 'graduation_year': 2013 + i % 2,
+                'class_name': '1班',
+            }
+            for i in range(6)
+        ]
+        # 已有的校级圈和成员 / An existing school circle with a member
+        cls.early = User.objects.create_user(username='early', password='password')
+        cls.school_circle = Circle.objects.create(
+            circle_type='school', school=cls.school, name=cls.school.name,
+            owner=cls.early, created_by=cls.early
+        )
+        add_member(cls.school_circle, cls.early)
+        cls.post = Post.objects.create(circle=cls.school_circle, author=cls.early, content='欢迎')
+
+    def setUp(self):
+        cache.clear()
+
+    def memberships(self):
+        return sorted(CircleMember.objects.filter(circle__school=self.school).values_list(
+            'circle__circle_type', 'circle__grade_year', 'user__username', 'status'
+        ))
+
+    def test_matches_per_user_path(self):
+        profiles, _ = import_roster(self.school, self.rows)
+        for user in User.objects.filter(profile__in=profiles).select_related('profile__school'):
+            auto_join_circles(user)
+        expected = self.memberships()
+        CircleMember.objects.filter(user__username__startswith='student').delete()
+        Circle.objects.filter(circle_type='grade').delete()
+        reconcile_member_counts()
+
+        profiles = list(UserProfile.objects.filter(pk__in=[p.pk for p in profiles]).select_related('school'))
+        self.assertEqual(bulk_auto_join_circles(profiles), 12)
+        self.assertEqual(self.memberships(), expected)
+        self.assertEqual(reconcile_member_counts(dry_run=True), (3, 0))
+        self.assertEqual(
+            TimelineEntry.objects.filter(post=self.post, user__username__startswith='student').count(), 6
+        )
+        # 重复导入不新增成员 / Re-running adds nothing
+        self.assertEqual(bulk_auto_join_circles(profiles), 0)
+
+    def test_roster_skips_existing_usernames(self):
+        import_roster(self.school, self.rows[:2])
+        profiles, skipped = import_roster(self.school, self.rows)
+        self.assertEqual(skipped, ['student0', 'student1'])
+        self.assertEqual(len(profiles), 4)
+        self.assertTrue(all(profile.is_profile_complete for profile in profiles))
+
+
+class BulkReviewTests(TestCase):
+    """批量审核与导出 / Bulk review and export"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='第一中学', province='北京', city='北京')
+        cls.owner = User.objects.create_user(username='owner', password='password')
+        cls.circle = Circle.objects.create(
+            circle_type='class', school=school, grade_year=2010, class_name='1班',
+            name='1班', owner=cls.owner, created_by=cls.owner
+        )
+        add_member(cls.circle, cls.owner, role='owner')
+        cls.applications = [
+            add_member(cls.circle, User.objects.create_user(username=f'applicant{i}'), status='pending')
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = f'/api/v1/circles/{self.circle.id}/applications/review/'
+
+    def member_count(self):
+        self.circle.refresh_from_db()
+        return self.circle.member_count
+
+    def test_review_by_ids_counts_once(self):
+        ids = [application.pk for application in self.applications[:3]]
+        review_application(self.applications[0], approve=True)
+
+        response = self.client.post(self.url, {'action': 'approve', 'member_ids': ids}, format='json')
+        self.assertEqual(response.data['data'], {'processed': 2})
+        response = self.client.post(self.url, {'action': 'approve', 'member_ids': ids}, format='json')
+        self.assertEqual(response.data['data'], {'processed': 0})
+        self.assertEqual(self.member_count(), 4)
+        self.assertTrue(is_member(self.applications[2].user, self.circle.id))
+
+        response = self.client.post(self.url, {'action': 'reject', 'all': True}, format='json')
+        self.assertEqual(response.data['data'], {'processed': 2})
+        self.assertEqual(self.member_count(), 4)
+        self.assertEqual(reconcile_member_counts(dry_run=True), (1, 0))
+
+    def test_requires_ids_or_all(self):
+        for data in ({'action': 'approve'}, {'action': 'approve', 'all': True, 'member_ids': [1]}):
+            self.assertEqual(self.client.post(self.url, data, format='json').status_code, 400)
+
+    def test_export(self):
+        url = f'/api/v1/circles/{self.circle.id}/members/export/'
+        response = self.client.get(url, {'status': 'pending'})
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0], 'id,user_id,username,role,status,joined_at')
+        self.assertEqual([line.split(',')[2] for line in lines[1:]], [f'applicant{i}' for i in range(5)])
+
+        response = self.client.get(url, {'output': 'ndjson'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([(row['username'], row['role']) for row in rows], [('owner', 'owner')])
+
+        self.client.force_authenticate(self.applications[0].user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    async def test_export_streams_batches_under_asgi(self):
+        token = RefreshToken.for_user(self.owner).access_token
+        with mock.patch('apps.circles.exports.EXPORT_CHUNK_SIZE', 2), \
+                mock.patch('apps.circles.exports._fetch_batch', wraps=exports._fetch_batch) as fetch:
+            response = await self.async_client.get(
+                f'/api/v1/circles/{self.circle.id}/members/export/',
+                {'status': 'pending', 'output': 'ndjson'}, AUTHORIZATION=f'Bearer {token}'
+            )
+            self.assertTrue(response.is_async)
+            lines = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(
+            [json.loads(line)['username'] for line in lines], [f'applicant{i}' for i in range(5)]
+        )
+        self.assertEqual(fetch.call_count, 3)
@@ -5,9 +5,9 @@
 from django.urls import path
 from .views import (
     MyCircleListView, CircleCreateView, CircleDetailView,
-    CircleJoinView, CircleMemberListView,
+    CircleJoinView, CircleLeaveView, CircleMemberListView,
     CircleApplicationListView, CircleApplicationReviewView,
-    CircleTransferView
+    CircleTransferView, CircleApplicationBulkReviewView, CircleMemberExportView
 )
 
 urlpatterns = [
@@ -15,8 +15,11 @@ urlpatterns = [
     path('create/', CircleCreateView.as_view(), name='circle-create'),
     path('<int:pk>/', CircleDetailView.as_view(), name='circle-detail'),
     path('<int:pk>/join/', CircleJoinView.as_view(), name='circle-join'),
+    path('<int:pk>/leave/', CircleLeaveView.as_view(), name='circle-leave'),
     path('<int:pk>/transfer/', CircleTransferView.as_view(), name='circle-transfer'),
     path('<int:pk>/members/', CircleMemberListView.as_view(), name='circle-members'),
+    path('<int:pk>/members/export/', CircleMemberExportView.as_view(), name='circle-member-export'),
     path('<int:pk>/applications/', CircleApplicationListView.as_view(), name='circle-applications'),
+    path('<int:pk>/applications/review/', CircleApplicationBulkReviewView.as_view(), name='circle-applications-review'),
     path('<int:pk>/applications/<int:member_id>/', CircleApplicationReviewView.as_view(), name='circle-application-review'),
 ]
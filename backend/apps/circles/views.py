@@ -2,6 +2,7 @@
 话题圈视图 / Circle Views
 """
 
+from django.db import transaction
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 
@@ -9,9 +10,16 @@ from common.pagination import StandardPagination, paginated_response
 from common.response import success_response, error_response
 from .models import Circle, CircleMember
 from .serializers import (
-    CircleSerializer, CircleMemberSerializer, CircleCreateSerializer
+    CircleSerializer, CircleMemberSerializer, CircleCreateSerializer,
+    ApplicationBulkReviewSerializer
 )
-from .services import get_circle_or_none, is_circle_admin
+from .exports import EXPORT_FORMATS, EXPORT_STATUSES, member_export_response
+from .memberships import invalidate_memberships
+from .services import (
+    get_circle_or_none, is_circle_admin, add_member, remove_member, review_application,
+    bulk_review_applications
+)
+from apps.posts.timeline import rebuild_timeline, remove_circle_from_timeline
 
 
 class MyCircleListView(APIView):
@@ -28,9 +36,10 @@ class MyCircleListView(APIView):
         ).select_related('circle', 'circle__school')
 
         circles = [m.circle for m in memberships]
-        serializer = CircleSerializer(
-            circles, many=True, context={'request': request}
-        )
+        serializer = CircleSerializer(circles, many=True, context={
+            'request': request,
+            'viewer_roles': {m.circle_id: m.role for m in memberships},
+        })
         return success_response(serializer.data, '获取成功')
 
 
@@ -76,12 +85,13 @@ class CircleCreateView(APIView):
         )
 
         # 创建者自动成为管理员 / Creator becomes admin
-        CircleMember.objects.create(
-            circle=circle, user=user, role='admin', status='approved'
-        )
+        add_member(circle, user, status='approved', role='admin')
+        circle.member_count = 1  # 与数据库保持一致 / Keep the instance in sync
 
         return success_response(
-            CircleSerializer(circle, context={'request': request}).data,
+            CircleSerializer(circle, context={
+                'request': request, 'viewer_roles': {circle.id: 'admin'}
+            }).data,
             '创建成功', 201
         )
 
@@ -137,14 +147,40 @@ class CircleJoinView(APIView):
         else:
             status = 'pending'
 
-        CircleMember.objects.create(
-            circle=circle, user=user, status=status
-        )
+        add_member(circle, user, status=status)
+
+        if status == 'approved':
+            rebuild_timeline(user)
 
         msg = '加入成功' if status == 'approved' else '申请已提交，等待审核'
         return success_response(None, msg, 201)
 
 
+class CircleLeaveView(APIView):
+    """
+    退出圈子 / Leave Circle
+    POST /api/v1/circles/{id}/leave/
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        """退出圈子或撤回申请 / Leave circle or withdraw application"""
+        circle = get_circle_or_none(pk)
+        if not circle:
+            return error_response('圈子不存在', 404)
+
+        # 圈主需先移交 / Owner must transfer first
+        if circle.owner_id == request.user.id:
+            return error_response('圈主请先移交圈子', 400)
+
+        if not remove_member(circle, request.user):
+            return error_response('您不是该圈子成员', 400)
+
+        remove_circle_from_timeline(request.user, circle.id)
+
+        return success_response(None, '已退出圈子')
+
+
 class CircleMemberListView(APIView):
     """
     圈子成员列表 / Circle Member List
@@ -160,7 +196,7 @@ class CircleMemberListView(APIView):
 
         members = CircleMember.objects.filter(
             circle=circle, status='approved'
-        ).select_related('user')
+        ).select_related('user__profile').order_by('joined_at', 'pk')
 
         paginator = StandardPagination()
         page = paginator.paginate_queryset(members, request)
@@ -187,10 +223,71 @@ class CircleApplicationListView(APIView):
 
         applications = CircleMember.objects.filter(
             circle=circle, status='pending'
-        ).select_related('user')
+        ).select_related('user__profile').order_by('joined_at', 'pk')
 
-        serializer = CircleMemberSerializer(applications, many=True)
-        return success_response(serializer.data, '获取成功')
+        paginator = StandardPagination()
+        page = paginator.paginate_queryset(applications, request)
+        serializer = CircleMemberSerializer(page, many=True)
+        return paginated_response(paginator, serializer.data)
+
+
+class CircleApplicationBulkReviewView(APIView):
+    """
+    批量审核入圈申请 / Bulk Review Applications
+    POST /api/v1/circles/{id}/applications/review/
+    {"action": "approve", "member_ids": [1, 2]} 或 / or
+    {"action": "reject", "all": true, "joined_before": "2026-01-01T00:00:00Z"}
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        """批量审核 / Review in bulk"""
+        circle = get_circle_or_none(pk)
+        if not circle:
+            return error_response('圈子不存在', 404)
+
+        if not is_circle_admin(circle, request.user):
+            return error_response('无权限', 403)
+
+        serializer = ApplicationBulkReviewSerializer(data=request.data)
+        if not serializer.is_valid():
+            return error_response('参数错误', 400, serializer.errors)
+        data = serializer.validated_data
+
+        # 已被处理或不存在的申请直接跳过 / Applications already reviewed or missing are skipped
+        processed = bulk_review_applications(
+            circle, data['action'] == 'approve',
+            member_ids=data.get('member_ids'),
+            joined_before=data.get('joined_before'),
+            joined_after=data.get('joined_after'),
+        )
+        msg = '已通过' if data['action'] == 'approve' else '已拒绝'
+        return success_response({'processed': len(processed)}, msg)
+
+
+class CircleMemberExportView(APIView):
+    """
+    导出成员或申请（管理员）/ Export Members or Applications
+    GET /api/v1/circles/{id}/members/export/?status=approved&output=csv
+    status: approved（默认）/ pending / rejected；output: csv（默认）/ ndjson
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        """流式导出 / Stream the export"""
+        circle = get_circle_or_none(pk)
+        if not circle:
+            return error_response('圈子不存在', 404)
+
+        if not is_circle_admin(circle, request.user):
+            return error_response('无权限', 403)
+
+        status = request.query_params.get('status', 'approved')
+        export_format = request.query_params.get('output', 'csv')
+        if status not in EXPORT_STATUSES or export_format not in EXPORT_FORMATS:
+            return error_response('参数错误', 400)
+
+        return member_export_response(request, circle, status, export_format)
 
 
 class CircleApplicationReviewView(APIView):
@@ -220,8 +317,12 @@ class CircleApplicationReviewView(APIView):
         if action not in ['approve', 'reject']:
             return error_response('无效操作', 400)
 
-        application.status = 'approved' if action == 'approve' else 'rejected'
-        application.save()
+        # 并发审核时只有一个请求生效 / Only one of concurrent reviews wins
+        if not review_application(application, action == 'approve'):
+            return error_response('申请不存在', 404)
+
+        if action == 'approve':
+            rebuild_timeline(application.user)
 
         msg = '已通过' if action == 'approve' else '已拒绝'
         return success_response(None, msg)
@@ -258,12 +359,14 @@ class CircleTransferView(APIView):
         except CircleMember.DoesNotExist:
             return error_response('该用户不是圈子成员', 400)
 
-        # 移交圈主 / Transfer ownership
-        circle.owner_id = new_owner_id
-        circle.save(update_fields=['owner'])
+        with transaction.atomic():
+            # 移交圈主 / Transfer ownership
+            circle.owner_id = new_owner_id
+            circle.save(update_fields=['owner'])
 
-        # 新圈主设为管理员 / Set new owner as admin
-        new_member.role = 'admin'
-        new_member.save(update_fields=['role'])
+            # 新圈主设为管理员 / Set new owner as admin
+            new_member.role = 'admin'
+            new_member.save(update_fields=['role'])
+            invalidate_memberships(request.user.id, new_member.user_id)
 
         return success_response(None, '移交成功')
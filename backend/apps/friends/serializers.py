@@ -6,7 +6,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
 from .models import FriendRequest, Friendship, Blacklist
-from common.serializers import UserBriefSerializer, validate_user_exists
+from common.serializers import TimedSerializerMixin, UserBriefSerializer, validate_user_exists
 
 User = get_user_model()
 
@@ -22,7 +22,7 @@ class FriendRequestCreateSerializer(serializers.Serializer):
         return validate_user_exists(value)
 
 
-class FriendRequestSerializer(serializers.ModelSerializer):
+class FriendRequestSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     好友请求详情序列化器 / Friend Request Detail Serializer
     """
@@ -34,7 +34,7 @@ class FriendRequestSerializer(serializers.ModelSerializer):
         fields = ['id', 'sender', 'receiver', 'message', 'status', 'created_at']
 
 
-class FriendSerializer(serializers.ModelSerializer):
+class FriendSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     好友列表序列化器 / Friend List Serializer
     """
@@ -45,7 +45,7 @@ class FriendSerializer(serializers.ModelSerializer):
         fields = ['id', 'friend', 'created_at']
 
 
-class BlacklistSerializer(serializers.ModelSerializer):
+class BlacklistSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     黑名单序列化器 / Blacklist Serializer
     """
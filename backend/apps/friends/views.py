@@ -61,7 +61,7 @@ class PendingRequestListView(ListAPIView):
         return FriendRequest.objects.filter(
             receiver=self.request.user,
             status='pending'
-        ).select_related('sender', 'receiver').order_by('-created_at')
+        ).select_related('sender__profile', 'receiver__profile').order_by('-created_at')
 
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -105,7 +105,7 @@ class FriendListView(ListAPIView):
     def get_queryset(self):
         return Friendship.objects.filter(
             user=self.request.user
-        ).select_related('friend').order_by('-created_at')
+        ).select_related('friend__profile').order_by('-created_at')
 
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -136,7 +136,7 @@ class BlacklistListView(ListAPIView):
     def get_queryset(self):
         return Blacklist.objects.filter(
             user=self.request.user
-        ).select_related('blocked_user').order_by('-created_at')
+        ).select_related('blocked_user__profile').order_by('-created_at')
 
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
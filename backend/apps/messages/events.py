@@ -0,0 +1,171 @@
+"""
+私信推送事件 / Message Push Events
+
+按用户的进程内发布/订阅：新私信或未读数变化时唤醒该用户打开的推送连接，
+连接空闲时不查询数据库
+In-process publish/subscribe keyed by user: a new message or unread-count
+change wakes that user's open push streams, and idle streams never touch
+the database.
+
+MESSAGE_EVENTS_BACKEND:
+- local：只唤醒本进程的连接，适合单进程部署和测试
+  local: wakes streams of this process only (single process, tests)
+- postgres：发布时 NOTIFY，每个进程一个线程 LISTEN 后转发给本进程的订阅者，
+  多个 worker 之间也能互相唤醒
+  postgres: publishing issues NOTIFY and one LISTEN thread per process
+  forwards it to local subscribers, so workers wake each other
+"""
+
+import asyncio
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'campus_messages'
+
+
+def _backend():
+    return getattr(settings, 'MESSAGE_EVENTS_BACKEND', 'local')
+
+
+def _use_postgres():
+    return _backend() == 'postgres' and connection.vendor == 'postgresql'
+
+
+class Subscription:
+    """一个推送连接的订阅 / The subscription of one push stream"""
+
+    def __init__(self, hub, user_id):
+        self.hub = hub
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def notify(self):
+        # 可能在其他线程中调用 / May be called from another thread
+        self.loop.call_soon_threadsafe(self.event.set)
+
+    async def wait(self, timeout):
+        """
+        等待唤醒 / Wait to be woken
+        Returns:
+            bool: 是否被唤醒（False 表示超时）/ Whether woken (False on timeout)
+        """
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    """进程内的订阅表 / Subscriptions of this process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = {}  # user_id -> set[Subscription]
+
+    def subscribe(self, user_id):
+        """在事件循环中调用 / Call from the event loop"""
+        subscription = Subscription(self, user_id)
+        with self.lock:
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+        if _use_postgres():
+            _listener.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscriptions.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscriptions[subscription.user_id]
+
+    def publish(self, user_id):
+        """唤醒该用户的所有连接 / Wake every stream of this user"""
+        with self.lock:
+            subscribers = list(self.subscriptions.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.notify()
+
+    def publish_all(self):
+        """唤醒全部连接（监听重连后可能漏掉通知）/ Wake all streams, e.g. after missed notifications"""
+        with self.lock:
+            subscribers = [s for group in self.subscriptions.values() for s in group]
+        for subscription in subscribers:
+            subscription.notify()
+
+
+class PostgresListener:
+    """
+    LISTEN 线程，把通知转发给本进程的订阅者 / LISTEN thread forwarding notifications to the hub
+    使用独立连接，断开后重连并唤醒全部连接补查
+    Uses its own connection; after reconnecting it wakes every stream to re-check.
+    """
+
+    RETRY_SECONDS = 5
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='message-events', daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            wrapper = connections.create_connection('default')
+            try:
+                wrapper.ensure_connection()
+                raw = wrapper.connection
+                with raw.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                self.hub.publish_all()
+                while True:
+                    if select.select([raw], [], [], 60) == ([], [], []):
+                        continue
+                    raw.poll()
+                    while raw.notifies:
+                        payload = raw.notifies.pop(0).payload
+                        self.hub.publish(int(payload))
+            except Exception:
+                logger.exception('私信通知监听断开，稍后重连 / message LISTEN lost, reconnecting')
+            finally:
+                wrapper.close()
+            time.sleep(self.RETRY_SECONDS)
+
+
+hub = Hub()
+_listener = PostgresListener(hub)
+
+
+def publish_message_event(*user_ids):
+    """
+    通知这些用户有新私信或未读数变化 / Tell these users a message or unread count changed
+    在事务内调用时于提交后送达 / Delivered after commit when called inside a transaction
+    """
+    if _use_postgres():
+        # NOTIFY 本身随事务提交送达 / NOTIFY is delivered on commit by itself
+        with connection.cursor() as cursor:
+            for user_id in user_ids:
+                cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, str(user_id)])
+    else:
+        def wake():
+            for user_id in user_ids:
+                hub.publish(user_id)
+        transaction.on_commit(wake)
@@ -4,10 +4,11 @@
 
 from rest_framework import serializers
 from .models import Conversation, PrivateMessage
-from common.serializers import UserBriefSerializer
+from common.serializers import TimedSerializerMixin, UserBriefSerializer
+from common.sensitive import validate_sensitive_fields
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     私信序列化器 / Private Message Serializer
     """
@@ -31,8 +32,12 @@ class SendMessageSerializer(serializers.Serializer):
             raise serializers.ValidationError("消息内容不能为空")
         return value.strip()
 
+    def validate(self, attrs):
+        """检查敏感词 / Check sensitive words"""
+        return validate_sensitive_fields(attrs, {'content': '消息内容'})
 
-class ConversationSerializer(serializers.ModelSerializer):
+
+class ConversationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     会话列表序列化器 / Conversation List Serializer
     """
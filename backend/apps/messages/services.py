@@ -7,9 +7,9 @@ from django.db.models import Q
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
+from .events import publish_message_event
 from .models import Conversation, PrivateMessage
 from apps.friends.services import is_friend, is_blocked_by, has_blocked
-from common.sensitive import validate_sensitive_field
 
 User = get_user_model()
 
@@ -32,6 +32,7 @@ def get_or_create_conversation(user1_id, user2_id):
 def send_message(sender, receiver_id, content):
     """
     发送私信 / Send private message
+    content 需已经过 SendMessageSerializer 校验（含敏感词）
 
     Returns:
         (success, data_or_error, code)
@@ -55,11 +56,6 @@ def send_message(sender, receiver_id, content):
     if has_blocked(sender, receiver_id):
         return False, "你已将对方拉黑，请先解除", 400
 
-    # 敏感词过滤 / Sensitive word filter
-    is_valid, error_msg = validate_sensitive_field(content, "消息内容")
-    if not is_valid:
-        return False, error_msg, 400
-
     with transaction.atomic():
         # 获取或创建会话 / Get or create conversation
         conversation = get_or_create_conversation(sender.id, receiver_id)
@@ -84,6 +80,9 @@ def send_message(sender, receiver_id, content):
 
         conversation.save()
 
+        # 唤醒接收者的推送连接 / Wake the receiver's push streams
+        publish_message_event(receiver_id)
+
     return True, message, 200
 
 
@@ -117,6 +116,9 @@ def mark_conversation_read(user, conversation_id):
             conversation.user2_unread_count = 0
         conversation.save()
 
+        # 同步其他标签页的未读数 / Sync the unread count of other tabs
+        publish_message_event(user.id)
+
     return True, None, 200
 
 
@@ -152,4 +154,4 @@ def get_new_messages(user, since_id=0):
     return PrivateMessage.objects.filter(
         receiver=user,
         id__gt=since_id
-    ).select_related('sender', 'conversation').order_by('id')
+    ).select_related('sender__profile', 'conversation').order_by('id')
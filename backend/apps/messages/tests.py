@@ -1,3 +1,141 @@
-from django.test import TestCase
+"""
+私信模块测试 / Message Tests
+"""
 
-# Create your tests here.
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.friends.models import Friendship
+from apps.users.models import User
+from common.testing import QueryBudgetTestCase
+from . import services
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    """私信接口的查询预算 / Query budgets of message endpoints"""
+    view_modules = ('apps.messages',)
+    budgets = {
+        ('conversation-list', 'GET'): (2, 5_000),
+        ('message-list', 'GET'): (3, 4_000),
+        ('mark-read', 'POST'): (3, 100),
+        ('send-message', 'POST'): (7, 300),
+        ('unread-count', 'GET'): (1, 100),
+        ('message-updates', 'GET'): (2, 500),
+        # 认证 + 首个快照事件 / Authentication plus the first snapshot event
+        ('message-stream', 'GET'): (3, 1_000),
+    }
+
+    def test_read(self):
+        conversation = self.data.conversations[0]
+        self.assertWithinBudget('conversation-list', 'GET')
+        self.assertWithinBudget('message-list', 'GET', kwargs={'conversation_id': conversation.pk})
+        self.assertWithinBudget('unread-count', 'GET')
+        self.assertWithinBudget('message-updates', 'GET', query={'since': self.data.conversations[-1].last_message_id - 5})
+
+    @override_settings(MESSAGE_EVENTS_BACKEND='local')
+    def test_stream(self):
+        """
+        推送接口需要 ASGI，用异步客户端读取首个事件 / The push stream needs ASGI, so read its first event with the async client
+        在同步测试中统计，sync_to_async 的查询会回到本线程的连接上
+        Counted from a sync test so queries made through sync_to_async land on this thread's connection.
+        """
+        max_queries, max_bytes = self.budget_for('message-stream', 'GET')
+        token = RefreshToken.for_user(self.data.viewer).access_token
+        since = self.data.conversations[-1].last_message_id - 5
+
+        async def first_event():
+            response = await self.async_client.get(
+                reverse('message-stream'), {'since': since}, AUTHORIZATION=f'Bearer {token}'
+            )
+            events = response.streaming_content
+            async for chunk in events:
+                if chunk.startswith(b'id:'):
+                    break
+            await events.aclose()
+            return response, chunk
+
+        with CaptureQueriesContext(connection) as ctx:
+            response, chunk = async_to_sync(first_event)()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'event: messages', chunk)
+        self.assertLessEqual(
+            len(ctx.captured_queries), max_queries, '\n'.join(query['sql'] for query in ctx.captured_queries)
+        )
+        self.assertLessEqual(len(chunk), max_bytes)
+
+    def test_write(self):
+        self.assertWithinBudget('send-message', 'POST', data={
+            'receiver_id': self.data.friends[0].pk, 'content': '周末聚会吗',
+        })
+        self.assertWithinBudget('mark-read', 'POST', kwargs={'conversation_id': self.data.conversations[1].pk})
+
+
+@override_settings(MESSAGE_EVENTS_BACKEND='local', MESSAGE_STREAM_HEARTBEAT=0.05, MESSAGE_STREAM_MAX_SECONDS=5)
+class MessageStreamTests(TestCase):
+    """SSE 推送 / Server-sent message push"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sender = User.objects.create_user(username='sender', password='password')
+        cls.receiver = User.objects.create_user(username='receiver', password='password')
+        Friendship.objects.create(user=cls.sender, friend=cls.receiver)
+        Friendship.objects.create(user=cls.receiver, friend=cls.sender)
+
+    def send(self, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return services.send_message(self.sender, self.receiver.id, content)[1]
+
+    async def next_event(self, events):
+        """跳过心跳，返回下一个 messages 事件 / Skip heartbeats and return the next messages event"""
+        async for chunk in events:
+            chunk = chunk.decode()
+            if chunk.startswith('id:'):
+                event_id, _, data = chunk.strip().split('\n')
+                return int(event_id[len('id: '):]), json.loads(data[len('data: '):])
+        self.fail('推送结束 / stream ended')
+
+    async def test_push_on_new_message_only(self):
+        first = await sync_to_async(self.send)('在吗')
+        token = RefreshToken.for_user(self.receiver).access_token
+        response = await self.async_client.get(
+            '/api/v1/messages/stream/', {'since': 0}, AUTHORIZATION=f'Bearer {token}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream; charset=utf-8')
+        events = response.streaming_content
+
+        event_id, data = await self.next_event(events)
+        self.assertEqual(event_id, first.id)
+        self.assertEqual(data['unread_count'], 1)
+        self.assertEqual([message['content'] for message in data['new_messages']], ['在吗'])
+
+        with mock.patch.object(services, 'get_new_messages', wraps=services.get_new_messages) as fetch:
+            # 空闲时只有心跳，不查询 / Idle streams only send heartbeats
+            for _ in range(3):
+                self.assertEqual(await anext(events), b': keepalive\n\n')
+            fetch.assert_not_called()
+
+            second = await sync_to_async(self.send)('周末聚会吗')
+            event_id, data = await self.next_event(events)
+            self.assertEqual(event_id, second.id)
+            self.assertEqual(data['unread_count'], 2)
+            self.assertEqual([message['content'] for message in data['new_messages']], ['周末聚会吗'])
+            fetch.assert_called_once_with(self.receiver, first.id)
+        await events.aclose()
+
+    def test_refuses_wsgi(self):
+        self.client.force_login(self.receiver)
+        response = self.client.get('/api/v1/messages/stream/')
+        self.assertEqual(response.status_code, 501)
+
+    async def test_requires_token(self):
+        response = await self.async_client.get('/api/v1/messages/stream/')
+        self.assertEqual(response.status_code, 401)
@@ -23,4 +23,7 @@ urlpatterns = [
 
     # 轮询更新 / Poll updates
     path('updates/', views.MessageUpdatesView.as_view(), name='message-updates'),
+
+    # 推送（SSE，需 ASGI）/ Push stream (SSE, ASGI only)
+    path('stream/', views.MessageStreamView.as_view(), name='message-stream'),
 ]
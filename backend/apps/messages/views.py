@@ -2,10 +2,24 @@
 消息系统视图 / Message System Views
 """
 
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
 from django.db.models import Q
 
+from .events import hub
 from .models import Conversation, PrivateMessage
 from .serializers import (
     ConversationSerializer,
@@ -29,7 +43,7 @@ class ConversationListView(APIView):
         conversations = Conversation.objects.filter(
             Q(user1=user) | Q(user2=user),
             last_message__isnull=False
-        ).select_related('user1', 'user2', 'last_message')
+        ).select_related('user1__profile', 'user2__profile', 'last_message')
 
         paginator = StandardPagination()
         page = paginator.paginate_queryset(conversations, request)
@@ -60,7 +74,7 @@ class MessageListView(APIView):
 
         messages = PrivateMessage.objects.filter(
             conversation=conversation
-        ).select_related('sender').order_by('-created_at')
+        ).select_related('sender__profile').order_by('-created_at')
 
         paginator = StandardPagination()
         page = paginator.paginate_queryset(messages, request)
@@ -130,6 +144,7 @@ class MessageUpdatesView(APIView):
     """
     轮询获取新消息 / Poll for New Messages
     GET /api/v1/messages/updates/?since=<message_id>
+    ASGI 部署下客户端改用 MessageStreamView 推送 / Under ASGI clients use MessageStreamView instead
     """
     permission_classes = [IsAuthenticated]
 
@@ -143,3 +158,100 @@ class MessageUpdatesView(APIView):
             'unread_count': unread_count,
             'new_messages': MessageSerializer(new_messages, many=True).data
         })
+
+
+def _json_error(message, code):
+    """与 error_response 相同格式的普通 Django 响应 / Plain Django response shaped like error_response"""
+    return JsonResponse(
+        {'code': code, 'message': message}, status=code, json_dumps_params={'ensure_ascii': False}
+    )
+
+
+async def _authenticate(request):
+    """按 Authorization: Bearer 认证，失败返回 None / JWT from the Authorization header, None if invalid"""
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return await sync_to_async(auth.get_user)(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def _fetch_updates(user, since_id):
+    """与轮询接口相同的数据 / The same payload as the polling endpoint"""
+    data = {
+        'unread_count': services.get_total_unread_count(user),
+        'new_messages': MessageSerializer(services.get_new_messages(user, since_id), many=True).data,
+    }
+    if not connection.in_atomic_block:
+        # 推送连接空闲时不占用数据库连接 / Idle streams hold no database connection
+        connection.close()
+    return data
+
+
+async def _message_events(user, since_id):
+    """
+    SSE 事件流 / Server-sent event stream
+    先订阅再查快照，避免两者之间到达的私信被漏掉
+    Subscribes before the snapshot so a message arriving in between is not missed.
+    """
+    subscription = hub.subscribe(user.id)
+    try:
+        deadline = time.monotonic() + getattr(settings, 'MESSAGE_STREAM_MAX_SECONDS', 300)
+        heartbeat = getattr(settings, 'MESSAGE_STREAM_HEARTBEAT', 15)
+        yield 'retry: 3000\n\n'
+        woken = True
+        while True:
+            if woken:
+                data = await sync_to_async(_fetch_updates)(user, since_id)
+                if data['new_messages']:
+                    since_id = data['new_messages'][-1]['id']
+                payload = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+                yield f'id: {since_id}\nevent: messages\ndata: {payload}\n\n'
+            else:
+                yield ': keepalive\n\n'
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            woken = await subscription.wait(min(heartbeat, remaining))
+    finally:
+        subscription.close()
+
+
+class MessageStreamView(View):
+    """
+    私信推送 / Message Push (Server-Sent Events)
+    GET /api/v1/messages/stream/?since=<message_id>
+    取代轮询：连接打开时推送一次快照，之后只在新私信或未读数变化时查询并推送，
+    空闲时只发心跳；MESSAGE_STREAM_MAX_SECONDS 后断开，客户端带 Last-Event-ID 重连。
+    需要 ASGI 部署，WSGI 下返回 501，客户端回退到 /messages/updates/ 轮询
+    Replaces polling: a snapshot is pushed on connect, then the database is
+    queried only when a new message or unread change wakes the stream, and
+    idle streams only send heartbeats. Streams end after
+    MESSAGE_STREAM_MAX_SECONDS and the client reconnects with Last-Event-ID.
+    Requires ASGI; under WSGI it answers 501 and clients fall back to polling.
+    """
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return _json_error('推送需要 ASGI 部署，请使用轮询接口', 501)
+
+        user = await _authenticate(request)
+        if user is None:
+            return _json_error('身份认证信息未提供或无效', 401)
+
+        try:
+            since_id = int(request.headers.get('Last-Event-ID') or request.GET.get('since', 0))
+        except ValueError:
+            return _json_error('参数错误', 400)
+
+        response = StreamingHttpResponse(
+            _message_events(user, since_id), content_type='text/event-stream; charset=utf-8'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # 关闭 nginx 的响应缓冲 / Disable nginx response buffering
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -3,7 +3,8 @@
 """
 
 from django.contrib import admin
-from .models import Post, Comment, Like, Favorite
+from .models import Post, Comment, Like, Favorite, PostHotRank, TimelineEntry, ReactionEvent
+from .timeline import remove_post_from_timelines
 
 
 @admin.register(Post)
@@ -18,6 +19,7 @@ class PostAdmin(admin.ModelAdmin):
     @admin.action(description='标记为违规删除')
     def mark_violation(self, request, queryset):
         queryset.update(status='violation')
+        remove_post_from_timelines(list(queryset.values_list('pk', flat=True)))
 
 
 @admin.register(Comment)
@@ -27,3 +29,25 @@ class CommentAdmin(admin.ModelAdmin):
     list_filter = ['status']
     search_fields = ['content', 'author__username']
     raw_id_fields = ['author', 'post', 'parent']
+
+
+@admin.register(PostHotRank)
+class PostHotRankAdmin(admin.ModelAdmin):
+    """热帖排行 / Hot Rank Admin"""
+    list_display = ['id', 'circle', 'post', 'is_pinned', 'score', 'refreshed_at']
+    raw_id_fields = ['circle', 'post']
+
+
+@admin.register(TimelineEntry)
+class TimelineEntryAdmin(admin.ModelAdmin):
+    """首页时间线 / Timeline Admin"""
+    list_display = ['id', 'user', 'post', 'circle', 'created_at']
+    raw_id_fields = ['user', 'post', 'circle']
+
+
+@admin.register(ReactionEvent)
+class ReactionEventAdmin(admin.ModelAdmin):
+    """点赞/收藏事件队列 / Reaction Event Admin"""
+    list_display = ['id', 'user', 'kind', 'target_id', 'value', 'created_at']
+    list_filter = ['kind']
+    raw_id_fields = ['user']
@@ -0,0 +1,48 @@
+"""
+写入点赞/收藏事件 / Apply Queued Like and Favorite Events
+
+REACTION_WRITE_BEHIND 开启时需常驻运行，或通过 cron 频繁执行
+Keep running (--loop) or schedule frequently while REACTION_WRITE_BEHIND is on
+用法 / Usage:
+    python manage.py apply_reaction_events [--loop --interval 2]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.posts.reactions import apply_reaction_events
+
+
+class Command(BaseCommand):
+    help = '合并并批量写入点赞/收藏事件队列 / Coalesce and apply the like/favorite event queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='持续运行 / Keep running'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=2,
+            help='队列为空时的等待秒数 / Seconds to wait when the queue is empty'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='每批事件数 / Events per batch'
+        )
+
+    def handle(self, *args, **options):
+        total = [0, 0, 0]
+        while True:
+            events, created, deleted = apply_reaction_events(options['batch_size'])
+            for i, value in enumerate((events, created, deleted)):
+                total[i] += value
+            if events:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'写入完成 / done: events={total[0]} created={total[1]} deleted={total[2]}'
+        ))
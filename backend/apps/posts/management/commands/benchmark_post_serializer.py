@@ -0,0 +1,94 @@
+"""
+帖子列表序列化性能对比 / Post List Serialization Benchmark
+
+对比 DRF PostSerializer 与 serialize_posts() 快速路径，并校验 JSON 输出逐字节一致
+数据在内存中构造，不读写数据库 / Posts are built in memory, the database is not touched
+用法 / Usage:
+    python manage.py benchmark_post_serializer --posts 100 --rounds 200
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.circles.models import Circle
+from apps.posts.models import Post
+from apps.posts.serializers import PostSerializer, serialize_posts
+from apps.users.models import User, UserProfile
+
+
+def build_posts(count, seed=0):
+    """构造带作者、头像和圈子的内存帖子 / Build in-memory posts with author, avatar and circle"""
+    rng = random.Random(seed)
+    now = timezone.now()
+    circles = [Circle(id=i, name=f'圈子{i}') for i in range(1, 6)]
+    authors = []
+    for i in range(1, 21):
+        author = User(id=i, username=f'user{i}')
+        author.profile = UserProfile(
+            user=author, avatar=f'avatars/2026/01/{i}.png' if i % 3 else None
+        )
+        authors.append(author)
+
+    posts = []
+    for i in range(1, count + 1):
+        created_at = now - timedelta(minutes=rng.randint(0, 100000), microseconds=rng.randint(0, 999999))
+        posts.append(Post(
+            id=i, circle=rng.choice(circles), author=rng.choice(authors),
+            content='校园生活分享 ' * rng.randint(1, 30),
+            images=[f'https://example.com/{i}/{j}.jpg' for j in range(rng.randint(0, 3))],
+            tags=rng.sample(['学习', '生活', '社团', '考试', '二手'], rng.randint(0, 3)),
+            status='normal', is_pinned=i % 17 == 0, is_featured=i % 11 == 0,
+            view_count=rng.randint(0, 5000), like_count=rng.randint(0, 500),
+            comment_count=rng.randint(0, 200), hot_score=rng.randint(0, 3000),
+            last_reply_at=created_at + timedelta(minutes=5) if i % 2 else None,
+            created_at=created_at, updated_at=created_at,
+        ))
+    return posts
+
+
+def _time_per_call(func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds
+
+
+class Command(BaseCommand):
+    help = '对比帖子列表的 DRF 序列化与快速路径 / Compare DRF and fast-path post list serialization'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100, help='每页帖子数 / Posts per page')
+        parser.add_argument('--rounds', type=int, default=200, help='重复轮数 / Rounds')
+
+    def handle(self, *args, **options):
+        posts = build_posts(options['posts'])
+        renderer = JSONRenderer()
+
+        drf = lambda: renderer.render(PostSerializer(posts, many=True).data)
+        fast = lambda: renderer.render(serialize_posts(posts))
+        if drf() != fast():
+            raise CommandError('快速路径输出与 PostSerializer 不一致 / Fast path output differs')
+
+        rounds = options['rounds']
+        results = [
+            ('DRF 序列化 / PostSerializer',
+             _time_per_call(lambda: PostSerializer(posts, many=True).data, rounds),
+             _time_per_call(drf, rounds)),
+            ('快速路径 / serialize_posts',
+             _time_per_call(lambda: serialize_posts(posts), rounds),
+             _time_per_call(fast, rounds)),
+        ]
+        self.stdout.write(f"{options['posts']} 条帖子/页，输出一致 / posts per page, output identical")
+        self.stdout.write(f"{'':30}{'序列化 / build':>16}{'含 JSON / +render':>20}")
+        for name, build, render in results:
+            self.stdout.write(f'{name:30}{build * 1000:13.3f} ms{render * 1000:17.3f} ms')
+        (_, drf_build, drf_render), (_, fast_build, fast_render) = results
+        self.stdout.write(self.style.SUCCESS(
+            f'加速比 / speed-up: {drf_build / fast_build:.1f}x (build), '
+            f'{drf_render / fast_render:.1f}x (with render)'
+        ))
@@ -0,0 +1,427 @@
+"""
+生成压测数据集 / Generate a Synthetic Load-Test Dataset
+
+按可配置规模生成学校、用户、校级/年级圈、帖子、点赞、评论、好友关系和私信：
+- 学校规模服从幂律分布，用户按学校连续编号，入圈方式与 auto_join_circles 一致
+- 好友数、点赞数、评论数、会话消息数为重尾分布，约 80% 的好友是同校校友
+- 主键由本命令分配，关联行无需回读；写完后重置序列，可在已有数据上追加
+- PostgreSQL 上用 COPY 写入，其他数据库回退到 bulk_create（时间戳变为写入时间）
+Generates schools, users, school/grade circles, posts, likes, comments,
+friendships and private messages at a configurable scale. School sizes
+follow a power law and users join circles like auto_join_circles does;
+friend degree, likes, comments and messages per conversation are
+heavy-tailed, with about 80% of friends from the same school. Primary keys
+are assigned here so related rows never read ids back, and sequences are
+reset afterwards. Tables are written with COPY on PostgreSQL and with
+bulk_create elsewhere (timestamps then become the insert time).
+
+所有用户的密码相同（--password），用户名为 <prefix><id>，供 load_test 使用
+Every user shares --password and is named <prefix><id>, for load_test.
+
+用法 / Usage:
+    python manage.py generate_dataset --users 1000000 --schools 50000 --posts 5000000
+    python manage.py generate_dataset --users 10000 --schools 100 --posts 50000 --seed 1
+"""
+
+import io
+import json
+import random
+import time
+from array import array
+from datetime import datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.circles.models import Circle, CircleMember
+from apps.friends.models import Friendship
+from apps.messages.models import Conversation, PrivateMessage
+from apps.posts.models import Comment, Like, Post
+from apps.posts.services import refresh_hot_ranks
+from apps.schools.models import School
+from apps.schools.regions import REGION_DATA
+from apps.users.models import User, UserProfile
+
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗'
+GIVEN_NAMES = '伟芳娜敏静丽强磊军洋勇艳杰涛明超秀霞平刚'
+SENTENCES = [
+    '今天食堂的红烧肉太好吃了', '有人一起去图书馆自习吗', '毕业十年聚会定在下个月',
+    '怀念当年的班主任', '操场的夕阳还是那么美', '运动会接力赛我们班拿了第一',
+    '谁还记得那次春游', '期末考试加油', '社团招新啦欢迎来玩', '宿舍楼下的猫又胖了',
+]
+TAGS = ['回忆', '学习', '生活', '社团', '聚会', '毕业']
+FIRST_YEAR, LAST_YEAR = 2000, 2023
+
+
+def _heavy_tail(rng, mean, cap):
+    """
+    均值约为 mean 的重尾整数（Pareto α=2）/ Heavy-tailed integer with mean ≈ mean (Pareto α=2)
+    """
+    if mean <= 0:
+        return 0
+    return min(cap, int(mean * rng.paretovariate(2) / 2 + 0.5))
+
+
+def _copy_text(value):
+    """COPY 文本格式的字段值 / Field value in COPY text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value, ensure_ascii=False)
+    elif not isinstance(value, str):
+        return str(value)
+    return (
+        value.replace('\\', '\\\\').replace('\t', '\\t')
+        .replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+class TableWriter:
+    """
+    按批写入一张表 / Batched writer for one table
+    PostgreSQL 使用 COPY，其他数据库使用 bulk_create；未给出的字段取模型默认值
+    COPY on PostgreSQL, bulk_create elsewhere. Fields that are not given
+    take the model default.
+    Args:
+        fields: 每行值对应的字段 attname / Field attnames of each row
+    """
+
+    def __init__(self, model, fields, batch_size):
+        self.model = model
+        self.fields = list(fields)
+        self.batch_size = batch_size
+        self.rows = []
+        self.count = 0
+        self.use_copy = connection.vendor == 'postgresql'
+        if self.use_copy:
+            self._prepare_copy()
+
+    def _prepare_copy(self):
+        quote = connection.ops.quote_name
+        now = timezone.now()
+        columns = [self.model._meta.get_field(name).column for name in self.fields]
+        defaults = []
+        for field in self.model._meta.concrete_fields:
+            if field.attname in self.fields:
+                continue
+            columns.append(field.column)
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                defaults.append(now)
+            else:
+                defaults.append(field.get_default())
+        self.copy_sql = 'COPY {} ({}) FROM STDIN'.format(
+            quote(self.model._meta.db_table), ', '.join(quote(column) for column in columns)
+        )
+        self.suffix = ''.join('\t' + _copy_text(value) for value in defaults) + '\n'
+
+    def add(self, *values):
+        self.rows.append(values)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.use_copy:
+            buffer = io.StringIO()
+            for row in self.rows:
+                buffer.write('\t'.join(map(_copy_text, row)) + self.suffix)
+            buffer.seek(0)
+            with connection.cursor() as cursor:
+                cursor.copy_expert(self.copy_sql, buffer)
+        else:
+            self.model.objects.bulk_create(
+                [self.model(**dict(zip(self.fields, row))) for row in self.rows]
+            )
+        self.count += len(self.rows)
+        self.rows = []
+
+
+class Command(BaseCommand):
+    help = '生成压测用的合成数据集 / Generate a synthetic dataset for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='用户数 / Users')
+        parser.add_argument('--schools', type=int, default=100, help='学校数 / Schools')
+        parser.add_argument('--posts', type=int, default=50000, help='帖子数 / Posts')
+        parser.add_argument('--friends', type=float, default=30, help='平均好友数 / Mean friend count')
+        parser.add_argument('--likes', type=float, default=8, help='平均每帖点赞数 / Mean likes per post')
+        parser.add_argument('--comments', type=float, default=3, help='平均每帖评论数 / Mean comments per post')
+        parser.add_argument(
+            '--conversations', type=float, default=5,
+            help='平均每人会话数（在好友间）/ Mean conversations per user (between friends)'
+        )
+        parser.add_argument(
+            '--messages', type=float, default=20, help='平均每个会话消息数 / Mean messages per conversation'
+        )
+        parser.add_argument('--days', type=int, default=365, help='数据时间跨度（天）/ Time span in days')
+        parser.add_argument('--batch-size', type=int, default=10000, help='每批写入行数 / Rows per batch')
+        parser.add_argument('--seed', type=int, default=0, help='随机种子 / Random seed')
+        parser.add_argument('--prefix', default='load', help='用户名前缀 / Username prefix')
+        parser.add_argument('--password', default='password', help='所有用户的密码 / Password of every user')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['schools'] < 1:
+            raise CommandError('--users 和 --schools 至少为 1 / --users and --schools must be at least 1')
+
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.start = self.now - timedelta(days=options['days'])
+        self.next_ids = {}
+        started = time.perf_counter()
+
+        self._phase('学校 / schools', self._generate_schools)
+        self._phase('用户与圈子 / users and circles', self._generate_users)
+        self._phase('帖子 / posts', self._generate_posts)
+        self._phase('好友与私信 / friends and messages', self._generate_friends)
+
+        models = [School, User, UserProfile, Circle, CircleMember, Post, Like, Comment,
+                  Friendship, Conversation, PrivateMessage]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+        refresh_hot_ranks()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'完成 / done in {time.perf_counter() - started:.1f}s. '
+            f'首页时间线请运行 / for home timelines run: python manage.py rebuild_timelines'
+        ))
+
+    def _phase(self, name, generate):
+        """在一个事务中执行一个阶段并报告吞吐 / Run one phase in a transaction and report throughput"""
+        started = time.perf_counter()
+        with transaction.atomic():
+            writers = generate()
+            for writer in writers:
+                writer.flush()
+        elapsed = time.perf_counter() - started
+        rows = sum(writer.count for writer in writers)
+        detail = ', '.join(f'{writer.model._meta.db_table}={writer.count}' for writer in writers)
+        self.stdout.write(
+            f'{name}: {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s) [{detail}]'
+        )
+
+    def _writer(self, model, *fields):
+        return TableWriter(model, ('id',) + fields, self.options['batch_size'])
+
+    def _next_id(self, model):
+        """本次从现有最大主键之后分配 / Allocate after the current max primary key"""
+        if model not in self.next_ids:
+            self.next_ids[model] = (model.objects.aggregate(max_id=Max('pk'))['max_id'] or 0) + 1
+        next_id = self.next_ids[model]
+        self.next_ids[model] = next_id + 1
+        return next_id
+
+    def _random_time(self, start=None):
+        start = start or self.start
+        return start + (self.now - start) * self.rng.random()
+
+    def _generate_schools(self):
+        rng = self.rng
+        provinces = list(REGION_DATA)
+        schools = self._writer(School, 'name', 'province', 'city')
+        self.school_ids = []
+        for _ in range(self.options['schools']):
+            school_id = self._next_id(School)
+            province = rng.choice(provinces)
+            schools.add(school_id, f'{self.options["prefix"]}第{school_id}中学',
+                        province, rng.choice(REGION_DATA[province]))
+            self.school_ids.append(school_id)
+        return [schools]
+
+    def _school_sizes(self):
+        """按幂律把用户分到各校 / Split users across schools by a power law"""
+        users, schools = self.options['users'], len(self.school_ids)
+        weights = [1 / (rank + 1) ** 0.8 for rank in range(schools)]
+        total = sum(weights)
+        sizes = [int(users * weight / total) for weight in weights]
+        remainder = users - sum(sizes)
+        # 余数优先分给没有用户的学校 / Leftover users go to empty schools first
+        order = sorted(range(schools), key=lambda index: (sizes[index] > 0, index))
+        for index in order[:remainder]:
+            sizes[index] += 1
+        for index in range(remainder - len(order)):
+            sizes[index % schools] += 1
+        return sizes
+
+    def _generate_users(self):
+        rng, prefix = self.rng, self.options['prefix']
+        password = make_password(self.options['password'])
+        users = self._writer(User, 'username', 'password', 'date_joined')
+        profiles = self._writer(
+            UserProfile, 'user_id', 'real_name', 'school_id', 'enrollment_year',
+            'graduation_year', 'class_name', 'is_profile_complete'
+        )
+        circles = self._writer(
+            Circle, 'circle_type', 'school_id', 'grade_year', 'name', 'created_by_id', 'owner_id',
+            'member_count'
+        )
+        members = self._writer(CircleMember, 'circle_id', 'user_id', 'role', 'status')
+
+        # 按用户下标保存后续阶段需要的信息 / Per-user data needed by later phases
+        self.user_ids = array('q')
+        self.school_circle_of = array('q')
+        self.grade_circle_of = array('q')
+        self.school_end_of = array('q')
+
+        for school_id, size in zip(self.school_ids, self._school_sizes()):
+            if not size:
+                continue
+            school_name = f'{prefix}第{school_id}中学'
+            school_end = len(self.user_ids) + size
+            # 年份 -> [圈子 id, 圈主, 成员数]，本校用户写完后再写圈子
+            # year -> [circle id, owner, members]; circles are written after the school's users
+            school_circle_id = school_owner_id = None
+            grade_circles = {}
+            for _ in range(size):
+                user_id = self._next_id(User)
+                users.add(user_id, f'{prefix}{user_id}', password, self._random_time())
+                year = rng.randint(FIRST_YEAR, LAST_YEAR)
+                real_name = rng.choice(SURNAMES) + ''.join(
+                    rng.choice(GIVEN_NAMES) for _ in range(rng.randint(1, 2))
+                )
+                profiles.add(self._next_id(UserProfile), user_id, real_name, school_id,
+                             year, year + 3, f'{rng.randint(1, 12)}班', True)
+
+                # 与 auto_join_circles 一致：首个成员创建并拥有圈子
+                # Like auto_join_circles: the first member creates and owns the circle
+                if school_circle_id is None:
+                    school_circle_id, school_owner_id = self._next_id(Circle), user_id
+                grade = grade_circles.get(year)
+                if grade is None:
+                    grade = grade_circles[year] = [self._next_id(Circle), user_id, 0]
+                grade[2] += 1
+                grade_circle_id = grade[0]
+                members.add(self._next_id(CircleMember), school_circle_id, user_id, 'member', 'approved')
+                members.add(self._next_id(CircleMember), grade_circle_id, user_id, 'member', 'approved')
+
+                self.user_ids.append(user_id)
+                self.school_circle_of.append(school_circle_id)
+                self.grade_circle_of.append(grade_circle_id)
+                self.school_end_of.append(school_end)
+
+            circles.add(school_circle_id, 'school', school_id, None, school_name,
+                        school_owner_id, school_owner_id, size)
+            for year, (grade_circle_id, owner_id, member_count) in grade_circles.items():
+                circles.add(grade_circle_id, 'grade', school_id, year, f'{school_name} {year}级',
+                            owner_id, owner_id, member_count)
+        return [users, profiles, circles, members]
+
+    def _generate_posts(self):
+        rng, user_ids = self.rng, self.user_ids
+        user_count, post_count = len(user_ids), self.options['posts']
+        posts = self._writer(
+            Post, 'circle_id', 'author_id', 'content', 'images', 'tags', 'view_count',
+            'like_count', 'comment_count', 'hot_score', 'last_reply_at', 'created_at', 'updated_at'
+        )
+        likes = self._writer(Like, 'user_id', 'post_id', 'created_at')
+        comments = self._writer(
+            Comment, 'post_id', 'author_id', 'content', 'parent_id', 'reply_to_id', 'created_at'
+        )
+        span = self.now - self.start
+
+        for index in range(post_count):
+            post_id = self._next_id(Post)
+            # 帖子按时间递增编号 / Post ids increase with time
+            created_at = self.start + span * ((index + rng.random()) / post_count)
+            author = rng.randrange(user_count)
+            circle_id = self.school_circle_of[author] if rng.random() < 0.5 else self.grade_circle_of[author]
+
+            like_count = _heavy_tail(rng, self.options['likes'], user_count)
+            for liker in rng.sample(range(user_count), like_count):
+                likes.add(self._next_id(Like), user_ids[liker], post_id, self._random_time(created_at))
+
+            comment_count = _heavy_tail(rng, self.options['comments'], 500)
+            last_reply_at = None
+            top_level = []
+            replied_at = created_at
+            for _ in range(comment_count):
+                comment_id = self._next_id(Comment)
+                commenter = user_ids[rng.randrange(user_count)]
+                replied_at = min(self.now, replied_at + timedelta(seconds=rng.expovariate(1 / 1800)))
+                parent_id = reply_to_id = None
+                if top_level and rng.random() < 0.3:
+                    parent_id, reply_to_id = rng.choice(top_level)
+                else:
+                    top_level.append((comment_id, commenter))
+                comments.add(comment_id, post_id, commenter, rng.choice(SENTENCES),
+                             parent_id, reply_to_id, replied_at)
+                last_reply_at = replied_at
+
+            view_count = like_count * rng.randint(5, 20) + rng.randint(0, 50)
+            posts.add(
+                post_id, circle_id, user_ids[author],
+                '，'.join(rng.sample(SENTENCES, rng.randint(1, 4))),
+                [f'https://picsum.photos/seed/{post_id}-{i}/800/600' for i in range(rng.choice((0, 0, 1, 3)))],
+                rng.sample(TAGS, rng.randint(0, 2)),
+                view_count, like_count, comment_count,
+                Post.compute_hot_score(view_count, like_count, comment_count),
+                last_reply_at, created_at, created_at,
+            )
+        return [posts, likes, comments]
+
+    def _generate_friends(self):
+        rng, user_ids = self.rng, self.user_ids
+        user_count = len(user_ids)
+        friends_mean = self.options['friends']
+        conversation_ratio = min(1.0, self.options['conversations'] / friends_mean) if friends_mean else 0
+        friendships = self._writer(Friendship, 'user_id', 'friend_id', 'created_at')
+        conversations = self._writer(
+            Conversation, 'user1_id', 'user2_id', 'last_message_id', 'last_message_time',
+            'user1_unread_count', 'user2_unread_count', 'created_at'
+        )
+        messages = self._writer(
+            PrivateMessage, 'conversation_id', 'sender_id', 'receiver_id', 'content',
+            'is_read', 'created_at'
+        )
+
+        for index in range(user_count):
+            # 只向后选择，每对好友只生成一次；每对计入两人，故取一半
+            # Partners are drawn from later users only, so each pair is generated
+            # once; a pair counts for both users, hence half the mean.
+            school_end = self.school_end_of[index]
+            partners = set()
+            for _ in range(_heavy_tail(rng, friends_mean / 2, user_count)):
+                if rng.random() < 0.8 and school_end - index > 1:
+                    partners.add(rng.randrange(index + 1, school_end))
+                elif user_count - index > 1:
+                    partners.add(rng.randrange(index + 1, user_count))
+
+            user_id = user_ids[index]
+            for partner in partners:
+                friend_id = user_ids[partner]
+                befriended_at = self._random_time()
+                friendships.add(self._next_id(Friendship), user_id, friend_id, befriended_at)
+                friendships.add(self._next_id(Friendship), friend_id, user_id, befriended_at)
+                if rng.random() < conversation_ratio:
+                    self._add_conversation(conversations, messages, user_id, friend_id, befriended_at)
+        return [friendships, conversations, messages]
+
+    def _add_conversation(self, conversations, messages, user1_id, user2_id, started_at):
+        """user1_id < user2_id，与 get_or_create_conversation 一致 / Same ordering as get_or_create_conversation"""
+        rng = self.rng
+        conversation_id = self._next_id(Conversation)
+        count = max(1, _heavy_tail(rng, self.options['messages'], 1000))
+        unread_from = count - rng.randint(0, min(3, count))
+        unread = {user1_id: 0, user2_id: 0}
+        sent_at = started_at
+        for position in range(count):
+            sender_id, receiver_id = (user1_id, user2_id) if rng.random() < 0.5 else (user2_id, user1_id)
+            sent_at = min(self.now, sent_at + timedelta(seconds=rng.expovariate(1 / 600)))
+            is_read = position < unread_from
+            if not is_read:
+                unread[receiver_id] += 1
+            message_id = self._next_id(PrivateMessage)
+            messages.add(message_id, conversation_id, sender_id, receiver_id,
+                         rng.choice(SENTENCES), is_read, sent_at)
+        conversations.add(conversation_id, user1_id, user2_id, message_id, sent_at,
+                          unread[user1_id], unread[user2_id], started_at)
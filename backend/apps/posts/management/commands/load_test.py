@@ -0,0 +1,271 @@
+"""
+接口压测 / API Load Test
+
+对已启动的服务执行脚本化场景，按接口报告吞吐和 p50/p95/p99 延迟：
+- feed：首页动态流，沿 next_cursor 向下滑动若干页
+- detail：打开帖子详情并加载评论
+- like：点赞风暴，所有虚拟用户对同一批热门帖子反复点赞、取消
+- poll：私信轮询 /messages/updates/?since=
+Runs scripted scenarios against a running server and reports throughput and
+p50/p95/p99 latency per endpoint:
+- feed: home feed, scrolling a few pages along next_cursor
+- detail: post detail plus its comments
+- like: like storm, every virtual user liking and unliking the same hot posts
+- poll: private message polling via /messages/updates/?since=
+
+虚拟用户按 --seed 从 generate_dataset 生成的用户中抽取，直接签发 JWT，
+开始前为其重建首页时间线；服务需连接同一个数据库
+Virtual users are sampled by --seed from the users made by generate_dataset.
+Their JWTs are minted directly and their timelines rebuilt before the run, so
+the server must use the same database.
+
+用法 / Usage:
+    python manage.py generate_dataset --users 100000 --schools 2000 --posts 500000
+    uvicorn config.asgi:application --workers 4 &
+    python manage.py load_test --base-url http://127.0.0.1:8000 --vusers 50 --duration 60
+    python manage.py load_test --mix feed=5,detail=3,like=1,poll=1 --json result.json
+"""
+
+import http.client
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.posts.models import Post
+from apps.posts.timeline import rebuild_timeline
+from apps.users.models import User
+from common.metrics import percentile
+
+SCENARIOS = ('feed', 'detail', 'like', 'poll')
+
+
+def parse_mix(value):
+    """'feed=4,detail=3' -> {'feed': 4.0, 'detail': 3.0}"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise CommandError(f'未知场景 / unknown scenario: {name}')
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise CommandError(f'无效权重 / invalid weight: {part}')
+    if not any(weight > 0 for weight in mix.values()):
+        raise CommandError('至少需要一个正权重 / at least one positive weight is required')
+    return mix
+
+
+class VirtualUser(threading.Thread):
+    """
+    一个虚拟用户：独占一个 keep-alive 连接，按权重循环执行场景
+    One virtual user: owns a keep-alive connection and runs weighted scenarios in a loop
+    """
+
+    def __init__(self, run, token, seed):
+        super().__init__(daemon=True)
+        self.run_options = run
+        self.token = token
+        self.rng = random.Random(seed)
+        self.samples = defaultdict(list)  # 接口 -> [(毫秒, 状态码)] / endpoint -> [(ms, status)]
+        self.seen_posts = []
+        self.since = 0
+        self.connection = self._connect()
+
+    def _connect(self):
+        url = self.run_options['url']
+        connection_class = (
+            http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        )
+        return connection_class(url.hostname, url.port, timeout=self.run_options['timeout'])
+
+    def request(self, method, path, endpoint, query=None):
+        """
+        发送请求并记录延迟 / Send a request and record its latency
+        Returns:
+            成功时返回响应中的 data，否则 None / Response `data` on success, else None
+        """
+        if query:
+            path = f'{path}?{urlencode(query)}'
+        headers = {'Authorization': f'Bearer {self.token}', 'Accept': 'application/json'}
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, self.run_options['url'].path.rstrip('/') + path, headers=headers)
+            response = self.connection.getresponse()
+            body = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            # 连接断开或超时，记为状态 0 并重连 / Dropped or timed out: status 0, reconnect
+            self.connection.close()
+            self.connection = self._connect()
+            body, status = b'', 0
+        self.samples[endpoint].append(((time.perf_counter() - started) * 1000, status))
+
+        if not 200 <= status < 300:
+            return None
+        try:
+            return json.loads(body).get('data')
+        except ValueError:
+            return None
+
+    def run(self):
+        mix = self.run_options['mix']
+        names, weights = list(mix), list(mix.values())
+        deadline = self.run_options['deadline']
+        while time.monotonic() < deadline:
+            getattr(self, f'scenario_{self.rng.choices(names, weights)[0]}')()
+        self.connection.close()
+
+    def scenario_feed(self):
+        cursor = None
+        for _ in range(self.run_options['scroll_pages']):
+            data = self.request('GET', '/api/v1/feed/', 'GET /api/v1/feed/', {'cursor': cursor} if cursor else None)
+            if not data:
+                return
+            self.seen_posts = [post['id'] for post in data['results']] or self.seen_posts
+            cursor = data.get('next_cursor')
+            if not data.get('has_more') or not cursor:
+                return
+
+    def scenario_detail(self):
+        post_id = self.rng.choice(self.seen_posts or self.run_options['sample_posts'])
+        self.request('GET', f'/api/v1/posts/{post_id}/', 'GET /api/v1/posts/{id}/')
+        self.request('GET', f'/api/v1/posts/{post_id}/comments/', 'GET /api/v1/posts/{id}/comments/')
+
+    def scenario_like(self):
+        post_id = self.rng.choice(self.run_options['hot_posts'])
+        self.request('PUT', f'/api/v1/posts/{post_id}/like/', 'PUT /api/v1/posts/{id}/like/')
+        self.request('DELETE', f'/api/v1/posts/{post_id}/like/', 'DELETE /api/v1/posts/{id}/like/')
+
+    def scenario_poll(self):
+        data = self.request(
+            'GET', '/api/v1/messages/updates/', 'GET /api/v1/messages/updates/', {'since': self.since}
+        )
+        if data and data['new_messages']:
+            self.since = max(message['id'] for message in data['new_messages'])
+
+
+class Command(BaseCommand):
+    help = '对运行中的服务执行压测场景 / Run load-test scenarios against a running server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='服务地址 / Server URL')
+        parser.add_argument('--vusers', type=int, default=20, help='并发虚拟用户数 / Concurrent virtual users')
+        parser.add_argument('--duration', type=float, default=60, help='持续秒数 / Duration in seconds')
+        parser.add_argument(
+            '--mix', default='feed=4,detail=3,like=1,poll=2',
+            help='场景权重 / Scenario weights, e.g. feed=4,detail=3,like=1,poll=2'
+        )
+        parser.add_argument('--scroll-pages', type=int, default=3, help='每次 feed 滑动页数 / Feed pages per scroll')
+        parser.add_argument('--hot-posts', type=int, default=5, help='点赞风暴的帖子数 / Posts hit by the like storm')
+        parser.add_argument('--prefix', default='load', help='虚拟用户的用户名前缀 / Username prefix of virtual users')
+        parser.add_argument('--timeout', type=float, default=30, help='单请求超时秒数 / Request timeout')
+        parser.add_argument('--seed', type=int, default=0, help='随机种子 / Random seed')
+        parser.add_argument('--json', dest='json_path', help='结果另存为 JSON / Also write results as JSON')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['base_url'])
+        if url.scheme not in ('http', 'https') or not url.hostname:
+            raise CommandError(f'无效地址 / invalid --base-url: {options["base_url"]}')
+        mix = parse_mix(options['mix'])
+        rng = random.Random(options['seed'])
+
+        users = self._sample_users(rng, options['prefix'], options['vusers'])
+        recent_posts = list(Post.objects.filter(status='normal').order_by('-id').values_list('id', flat=True)[:1000])
+        if not recent_posts:
+            raise CommandError('没有帖子，请先运行 generate_dataset / no posts, run generate_dataset first')
+        for user in users:
+            rebuild_timeline(user)
+
+        run = {
+            'url': url,
+            'mix': mix,
+            'timeout': options['timeout'],
+            'scroll_pages': options['scroll_pages'],
+            'hot_posts': recent_posts[:options['hot_posts']],
+            'sample_posts': recent_posts,
+        }
+        vusers = [
+            VirtualUser(run, str(RefreshToken.for_user(user).access_token), rng.random())
+            for user in users
+        ]
+        self.stdout.write(
+            f'{len(vusers)} 个虚拟用户，持续 {options["duration"]:g}s / virtual users for '
+            f'{options["duration"]:g}s against {options["base_url"]} ({options["mix"]})'
+        )
+
+        started = time.monotonic()
+        run['deadline'] = started + options['duration']
+        for vuser in vusers:
+            vuser.start()
+        for vuser in vusers:
+            vuser.join()
+        elapsed = time.monotonic() - started
+
+        report = self._report(vusers, elapsed)
+        self._print(report, elapsed)
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump({'options': {key: options[key] for key in (
+                    'base_url', 'vusers', 'duration', 'mix', 'seed'
+                )}, 'elapsed': elapsed, 'endpoints': report}, f, ensure_ascii=False, indent=2)
+
+    def _sample_users(self, rng, prefix, count):
+        """按种子抽取生成的用户 / Sample generated users by seed"""
+        generated = User.objects.filter(username__startswith=prefix, is_active=True)
+        bounds = generated.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            raise CommandError(f'没有 {prefix}* 用户，请先运行 generate_dataset / no {prefix}* users')
+        population = range(bounds['low'], bounds['high'] + 1)
+        candidates = rng.sample(population, min(len(population), count * 3))
+        users = list(generated.filter(pk__in=candidates).order_by('pk')[:count])
+        if len(users) < count:
+            raise CommandError(f'只找到 {len(users)} 个用户 / only {len(users)} users found')
+        rng.shuffle(users)
+        return users
+
+    def _report(self, vusers, elapsed):
+        merged = defaultdict(list)
+        for vuser in vusers:
+            for endpoint, samples in vuser.samples.items():
+                merged[endpoint].extend(samples)
+
+        report = []
+        for endpoint, samples in sorted(merged.items()):
+            latencies = sorted(latency for latency, _ in samples)
+            report.append({
+                'endpoint': endpoint,
+                'requests': len(samples),
+                'errors': sum(1 for _, status in samples if not 200 <= status < 300),
+                'rps': round(len(samples) / elapsed, 1),
+                'p50_ms': round(percentile(latencies, 50), 1),
+                'p95_ms': round(percentile(latencies, 95), 1),
+                'p99_ms': round(percentile(latencies, 99), 1),
+                'max_ms': round(latencies[-1], 1),
+            })
+        return report
+
+    def _print(self, report, elapsed):
+        self.stdout.write(
+            f'{"endpoint":40}{"requests":>10}{"errors":>8}{"req/s":>9}'
+            f'{"p50":>9}{"p95":>9}{"p99":>9}{"max":>9}'
+        )
+        for row in report:
+            self.stdout.write(
+                f'{row["endpoint"]:40}{row["requests"]:>10}{row["errors"]:>8}{row["rps"]:>9}'
+                f'{row["p50_ms"]:>9}{row["p95_ms"]:>9}{row["p99_ms"]:>9}{row["max_ms"]:>9}'
+            )
+        total = sum(row['requests'] for row in report)
+        errors = sum(row['errors'] for row in report)
+        style = self.style.SUCCESS if not errors else self.style.WARNING
+        self.stdout.write(style(
+            f'共 {total} 个请求，{errors} 个失败，{total / elapsed:.1f} req/s（延迟单位 ms）/ '
+            f'{total} requests, {errors} errors, {total / elapsed:.1f} req/s (latency in ms)'
+        ))
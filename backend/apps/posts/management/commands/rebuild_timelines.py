@@ -0,0 +1,36 @@
+"""
+重建首页时间线 / Rebuild Home Timelines
+
+上线时间线功能或数据修复后执行 / Run once after rollout or to repair data
+用法 / Usage:
+    python manage.py rebuild_timelines [--user 1 --user 2]
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.posts.timeline import rebuild_timeline
+
+
+class Command(BaseCommand):
+    help = '根据已加入的圈子重建用户时间线 / Rebuild user timelines from joined circles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='只重建指定用户，可重复 / Only rebuild this user (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.filter(is_active=True)
+        if options['user_ids']:
+            users = users.filter(pk__in=options['user_ids'])
+
+        total_users = total_entries = 0
+        for user in users.iterator():
+            total_entries += rebuild_timeline(user)
+            total_users += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'重建完成 / done: users={total_users} entries={total_entries}'
+        ))
@@ -0,0 +1,39 @@
+"""
+校正帖子计数 / Reconcile Post Counters
+
+用法 / Usage:
+    python manage.py reconcile_post_counts [--batch-size 1000] [--dry-run]
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.posts.services import reconcile_post_counts, reconcile_comment_like_counts
+
+
+class Command(BaseCommand):
+    help = '校正帖子点赞数、评论数、热度分数及评论点赞数 / Repair drift in post and comment counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='每批处理的行数 / Rows per batch'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='只统计偏差，不写入 / Report drift without writing'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        checked, repaired = reconcile_post_counts(batch_size, dry_run)
+        self.stdout.write(f'帖子 / posts: checked={checked} repaired={repaired}')
+
+        checked, repaired = reconcile_comment_like_counts(batch_size, dry_run)
+        self.stdout.write(f'评论 / comments: checked={checked} repaired={repaired}')
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('dry run，未写入 / nothing written'))
+        else:
+            self.stdout.write(self.style.SUCCESS('校正完成 / done'))
@@ -0,0 +1,27 @@
+"""
+刷新热帖排行 / Refresh Hot Post Rankings
+
+建议通过 cron 定期执行（如每 5 分钟）/ Run periodically, e.g. every 5 minutes via cron
+用法 / Usage:
+    python manage.py refresh_hot_ranks [--circle 1 --circle 2]
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.posts.services import refresh_hot_ranks
+
+
+class Command(BaseCommand):
+    help = '重新计算各圈子的时间衰减热帖排行 / Recompute time-decayed hot rankings per circle'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--circle', type=int, action='append', dest='circle_ids',
+            help='只刷新指定圈子，可重复 / Only refresh this circle (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        circles, rows = refresh_hot_ranks(options['circle_ids'])
+        self.stdout.write(self.style.SUCCESS(
+            f'刷新完成 / done: circles={circles} rows={rows}'
+        ))
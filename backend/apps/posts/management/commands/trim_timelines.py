@@ -0,0 +1,19 @@
+"""
+裁剪首页时间线 / Trim Home Timelines
+
+建议通过 cron 定期执行（如每小时）/ Run periodically, e.g. hourly via cron
+用法 / Usage:
+    python manage.py trim_timelines
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.posts.timeline import trim_timelines
+
+
+class Command(BaseCommand):
+    help = '将每个用户的时间线裁剪到 TIMELINE_MAX_ENTRIES 条 / Trim timelines to TIMELINE_MAX_ENTRIES'
+
+    def handle(self, *args, **options):
+        deleted = trim_timelines()
+        self.stdout.write(self.style.SUCCESS(f'裁剪完成 / done: deleted={deleted}'))
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('circles', '0001_initial'),
+        ('posts', '0002_comment_like_favorite_like_unique_user_post_like_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostHotRank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_pinned', models.BooleanField(default=False, verbose_name='置顶')),
+                ('score', models.FloatField(default=0, verbose_name='衰减热度')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='计算时间')),
+                ('circle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hot_ranks', to='circles.circle', verbose_name='所属圈子')),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='hot_rank', to='posts.post', verbose_name='帖子')),
+            ],
+            options={
+                'verbose_name': '热帖排行',
+                'verbose_name_plural': '热帖排行',
+                'db_table': 'post_hot_ranks',
+                'indexes': [models.Index(fields=['circle', '-is_pinned', '-score', '-post'], name='hot_rank_circle_order_idx')],
+            },
+        ),
+    ]
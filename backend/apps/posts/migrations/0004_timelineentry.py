@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('circles', '0001_initial'),
+        ('posts', '0003_posthotrank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(verbose_name='发布时间')),
+                ('circle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='circles.circle', verbose_name='所属圈子')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.post', verbose_name='帖子')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '时间线',
+                'verbose_name_plural': '时间线',
+                'db_table': 'timeline_entries',
+                'indexes': [models.Index(fields=['user', '-created_at', '-post'], name='timeline_user_order_idx'), models.Index(fields=['user', 'circle'], name='timeline_user_circle_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_timeline_user_post'),
+        ),
+    ]
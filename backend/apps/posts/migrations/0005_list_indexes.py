@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('parent__isnull', True), ('status', 'normal')), fields=['post', 'created_at'], name='comment_post_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['user', '-created_at'], name='favorite_user_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 'normal')), fields=['circle', '-is_pinned', '-created_at', '-id'], name='post_circle_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 'normal')), fields=['circle', '-is_pinned', '-hot_score', '-id'], name='post_circle_hot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 'normal')), fields=['circle', '-is_pinned', '-last_reply_at', '-created_at'], name='post_circle_reply_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 'normal')), fields=['circle', '-created_at', '-id'], name='post_circle_created_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['parent', 'status', 'created_at', 'id'], name='comment_parent_replies_idx'),
+        ),
+    ]
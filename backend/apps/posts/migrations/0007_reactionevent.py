@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0006_comment_parent_replies_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReactionEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post_like', '帖子点赞'), ('comment_like', '评论点赞'), ('post_favorite', '帖子收藏')], max_length=20, verbose_name='类型')),
+                ('target_id', models.PositiveBigIntegerField(verbose_name='目标ID')),
+                ('value', models.BooleanField(verbose_name='设置')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reaction_events', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '互动事件',
+                'verbose_name_plural': '互动事件',
+                'db_table': 'reaction_events',
+                'indexes': [models.Index(fields=['user', 'kind', 'target_id'], name='reaction_event_user_idx')],
+            },
+        ),
+    ]
@@ -3,6 +3,7 @@
 """
 
 from django.db import models
+from django.db.models import F
 from django.conf import settings
 
 
@@ -121,21 +122,69 @@ class Post(models.Model):
         verbose_name = '帖子'
         verbose_name_plural = '帖子'
         ordering = ['-is_pinned', '-created_at']
+        # 列表查询只读正常帖子，使用部分索引并与各排序方式一一对应
+        # Partial indexes on normal posts, one per list ordering
+        indexes = [
+            models.Index(
+                fields=['circle', '-is_pinned', '-created_at', '-id'],
+                condition=models.Q(status='normal'),
+                name='post_circle_latest_idx'
+            ),
+            models.Index(
+                fields=['circle', '-is_pinned', '-hot_score', '-id'],
+                condition=models.Q(status='normal'),
+                name='post_circle_hot_idx'
+            ),
+            models.Index(
+                fields=['circle', '-is_pinned', '-last_reply_at', '-created_at'],
+                condition=models.Q(status='normal'),
+                name='post_circle_reply_idx'
+            ),
+            models.Index(
+                fields=['circle', '-created_at', '-id'],
+                condition=models.Q(status='normal'),
+                name='post_circle_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.author.username}: {self.content[:30]}"
 
-    def update_hot_score(self):
-        """更新热度分数 / Update hot score"""
-        self.hot_score = self.view_count + self.like_count * 2 + self.comment_count * 3
-        self.save(update_fields=['hot_score'])
-
-    def update_counts(self):
-        """更新计数字段 / Update count fields"""
-        self.like_count = self.likes.count()
-        self.comment_count = self.comments.filter(status='normal').count()
-        self.save(update_fields=['like_count', 'comment_count'])
-        self.update_hot_score()
+    @staticmethod
+    def compute_hot_score(view_count, like_count, comment_count):
+        """计算热度分数 / Compute hot score"""
+        return view_count + like_count * 2 + comment_count * 3
+
+    @staticmethod
+    def hot_score_expression(view_delta=0, like_delta=0, comment_delta=0):
+        """
+        热度分数的 SQL 表达式，可与计数增量在同一条 UPDATE 中使用
+        Hot score as an SQL expression, usable in the same UPDATE as count deltas
+        （UPDATE 中 F() 读取的是旧值，因此需要加上本次增量）
+        """
+        return Post.compute_hot_score(
+            F('view_count') + view_delta,
+            F('like_count') + like_delta,
+            F('comment_count') + comment_delta,
+        )
+
+    def increment_counts(self, like_delta=0, comment_delta=0, **fields):
+        """
+        原子增量更新计数，热度分数在同一条语句中更新
+        Atomically apply count deltas; hot score is updated in the same statement
+        Args:
+            like_delta: 点赞数增量 / Like count delta
+            comment_delta: 评论数增量 / Comment count delta
+            fields: 需要一并更新的其他字段 / Extra fields to set in the same UPDATE
+        """
+        Post.objects.filter(pk=self.pk).update(
+            like_count=F('like_count') + like_delta,
+            comment_count=F('comment_count') + comment_delta,
+            hot_score=Post.hot_score_expression(
+                like_delta=like_delta, comment_delta=comment_delta
+            ),
+            **fields
+        )
 
 
 class Comment(models.Model):
@@ -217,14 +266,26 @@ class Comment(models.Model):
         verbose_name = '评论'
         verbose_name_plural = '评论'
         ordering = ['created_at']
+        indexes = [
+            # 一级评论列表 / Top-level comment list
+            models.Index(
+                fields=['post', 'created_at'],
+                condition=models.Q(parent__isnull=True, status='normal'),
+                name='comment_post_top_idx'
+            ),
+            # 楼中楼回复列表 / Replies under a comment
+            models.Index(
+                fields=['parent', 'status', 'created_at', 'id'],
+                name='comment_parent_replies_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.author.username}: {self.content[:30]}..."
 
-    def update_like_count(self):
-        """更新点赞数 / Update like count"""
-        self.like_count = self.likes.count()
-        self.save(update_fields=['like_count'])
+    def increment_like_count(self, delta):
+        """原子增量更新点赞数 / Atomically apply like count delta"""
+        Comment.objects.filter(pk=self.pk).update(like_count=F('like_count') + delta)
 
 
 class Like(models.Model):
@@ -318,3 +379,178 @@ class Favorite(models.Model):
         verbose_name_plural = '收藏'
         unique_together = ['user', 'post']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='favorite_user_latest_idx'),
+        ]
+
+
+class PostHotRank(models.Model):
+    """
+    圈子热帖排行 / Circle Hot Post Ranking
+    定期物化的时间衰减热度，按圈子存储前若干条，热门列表直接按索引区间读取
+    Periodically materialized time-decayed ranking per circle
+    """
+
+    # 所属圈子 / Related circle
+    circle = models.ForeignKey(
+        'circles.Circle',
+        on_delete=models.CASCADE,
+        related_name='hot_ranks',
+        verbose_name='所属圈子'
+    )
+
+    # 帖子 / Post
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='hot_rank',
+        verbose_name='帖子'
+    )
+
+    # 是否置顶（冗余，便于排序）/ Is pinned (denormalized for ordering)
+    is_pinned = models.BooleanField(
+        default=False,
+        verbose_name='置顶'
+    )
+
+    # 衰减后的热度 / Decayed score
+    score = models.FloatField(
+        default=0,
+        verbose_name='衰减热度'
+    )
+
+    # 计算时间 / Refreshed at
+    refreshed_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='计算时间'
+    )
+
+    class Meta:
+        db_table = 'post_hot_ranks'
+        verbose_name = '热帖排行'
+        verbose_name_plural = '热帖排行'
+        indexes = [
+            models.Index(
+                fields=['circle', '-is_pinned', '-score', '-post'],
+                name='hot_rank_circle_order_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.circle_id}: {self.post_id} ({self.score:.4f})"
+
+
+class TimelineEntry(models.Model):
+    """
+    首页时间线 / Home Timeline Entry
+    发帖时写扩散到圈子成员的时间线，首页读取变为按用户的有界索引查询
+    Fan-out-on-write store: a post is pushed to every member's timeline
+    """
+
+    # 时间线所属用户 / Timeline owner
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='用户'
+    )
+
+    # 帖子 / Post
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='帖子'
+    )
+
+    # 帖子所属圈子（冗余，退圈时按圈子删除）/ Post circle (denormalized for leave)
+    circle = models.ForeignKey(
+        'circles.Circle',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='所属圈子'
+    )
+
+    # 帖子发布时间（冗余，用于排序）/ Post created at (denormalized for ordering)
+    created_at = models.DateTimeField(
+        verbose_name='发布时间'
+    )
+
+    class Meta:
+        db_table = 'timeline_entries'
+        verbose_name = '时间线'
+        verbose_name_plural = '时间线'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_user_post'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-created_at', '-post'],
+                name='timeline_user_order_idx'
+            ),
+            models.Index(fields=['user', 'circle'], name='timeline_user_circle_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.post_id}"
+
+
+class ReactionEvent(models.Model):
+    """
+    点赞/收藏事件队列 / Like and Favorite Event Queue
+    写后合并模式下的只追加日志，由 apply_reaction_events 按 (用户, 目标) 合并后批量写入
+    Append-only log for write-behind mode; apply_reaction_events coalesces it
+    per (user, target) and applies it in bulk.
+    """
+
+    KIND_CHOICES = [
+        ('post_like', '帖子点赞'),
+        ('comment_like', '评论点赞'),
+        ('post_favorite', '帖子收藏'),
+    ]
+
+    # 用户 / User
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='reaction_events',
+        verbose_name='用户'
+    )
+
+    # 类型 / Kind
+    kind = models.CharField(
+        max_length=20,
+        choices=KIND_CHOICES,
+        verbose_name='类型'
+    )
+
+    # 目标ID（帖子或评论）/ Target post or comment ID
+    target_id = models.PositiveBigIntegerField(
+        verbose_name='目标ID'
+    )
+
+    # 设置或取消 / Set (True) or unset (False)
+    value = models.BooleanField(
+        verbose_name='设置'
+    )
+
+    # 创建时间 / Created at
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='创建时间'
+    )
+
+    class Meta:
+        db_table = 'reaction_events'
+        verbose_name = '互动事件'
+        verbose_name_plural = '互动事件'
+        indexes = [
+            # 查询用户未处理的最新状态 / Latest pending state for a user
+            models.Index(fields=['user', 'kind', 'target_id'], name='reaction_event_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.kind} {self.target_id}={self.value}"
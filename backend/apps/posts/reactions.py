@@ -0,0 +1,322 @@
+"""
+点赞与收藏 / Likes and Favorites
+
+设置、取消、切换均为原子且幂等的操作：
+- 设置：INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING，目标不存在或已设置时不插入
+- 取消：DELETE ... RETURNING
+只有确实插入或删除了一行时才更新计数，并发双击不会触发唯一约束异常，也不会重复计数
+Set, unset and toggle are atomic and idempotent. A counter delta is applied
+only when a row was actually inserted or deleted, so concurrent double taps
+neither raise IntegrityError on the unique constraints nor double count.
+
+写后合并模式（REACTION_WRITE_BEHIND）下只追加事件到 reaction_events，
+apply_reaction_events() 按 (用户, 目标) 合并后批量写入并聚合更新计数
+In write-behind mode (REACTION_WRITE_BEHIND) toggles only append to
+reaction_events; apply_reaction_events() coalesces them per (user, target),
+applies them in bulk and updates each counter once with the summed delta.
+"""
+
+import logging
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Post, Comment, Like, Favorite, ReactionEvent
+
+logger = logging.getLogger(__name__)
+
+# 批量插入时每条语句的行数 / Rows per statement when inserting in bulk
+APPLY_CHUNK_SIZE = 500
+
+
+def write_behind_enabled():
+    """是否启用写后合并模式 / Whether write-behind mode is on"""
+    return getattr(settings, 'REACTION_WRITE_BEHIND', False)
+
+
+class Reaction:
+    """
+    一种用户对目标的关系 / A user-to-target relation (like or favorite)
+    Args:
+        kind: 事件类型 / Event kind in ReactionEvent
+        model: 关系表模型 / Relation model
+        target_field: 指向目标的外键字段名 / Foreign key to the target
+        apply_delta: 计数更新函数 (target_id, delta)，None 表示无计数
+                     Counter update callable, None when uncounted
+    """
+
+    def __init__(self, kind, model, target_field, apply_delta=None):
+        self.kind = kind
+        self.model = model
+        self.target_field = model._meta.get_field(target_field)
+        self.target_model = self.target_field.related_model
+        self.apply_delta = apply_delta
+
+    def _sql_names(self):
+        quote = connection.ops.quote_name
+        opts = self.model._meta
+        return {
+            'table': quote(opts.db_table),
+            'pk': quote(opts.pk.column),
+            'user': quote(opts.get_field('user').column),
+            'target': quote(self.target_field.column),
+            'created_at': quote(opts.get_field('created_at').column),
+            'target_table': quote(self.target_model._meta.db_table),
+            'target_pk': quote(self.target_model._meta.pk.column),
+            'status': quote(self.target_model._meta.get_field('status').column),
+        }
+
+    def _ensure_target(self, target_id):
+        """目标不存在或已删除时抛出 DoesNotExist / Raise DoesNotExist for missing targets"""
+        if not self.target_model.objects.filter(pk=target_id, status='normal').exists():
+            raise self.target_model.DoesNotExist
+
+    def _insert(self, user_id, target_id):
+        sql = (
+            'INSERT INTO {table} ({user}, {target}, {created_at}) '
+            'SELECT %s, {target_pk}, %s FROM {target_table} '
+            'WHERE {target_pk} = %s AND {status} = %s '
+            'ON CONFLICT DO NOTHING RETURNING {pk}'
+        ).format(**self._sql_names())
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id, timezone.now(), target_id, 'normal'])
+            return cursor.fetchone() is not None
+
+    def _delete(self, user_id, target_id):
+        sql = (
+            'DELETE FROM {table} WHERE {user} = %s AND {target} IN ('
+            'SELECT {target_pk} FROM {target_table} WHERE {target_pk} = %s AND {status} = %s'
+            ') RETURNING {pk}'
+        ).format(**self._sql_names())
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id, target_id, 'normal'])
+            return cursor.fetchone() is not None
+
+    def _changed(self, target_id, delta):
+        if self.apply_delta is not None:
+            self.apply_delta(target_id, delta)
+
+    def is_set(self, user_id, target_id):
+        """
+        用户当前状态，未处理的事件优先 / Current state, pending events first
+        """
+        value = ReactionEvent.objects.filter(
+            user_id=user_id, kind=self.kind, target_id=target_id
+        ).order_by('-id').values_list('value', flat=True).first()
+        if value is not None:
+            return value
+        return self.model.objects.filter(
+            user_id=user_id, **{self.target_field.attname: target_id}
+        ).exists()
+
+    def _enqueue(self, user, target_id, value):
+        """
+        写后合并：只追加事件 / Write-behind: append an event only
+        Returns:
+            bool: 相对当前状态是否发生变化 / Whether the state changed
+        """
+        self._ensure_target(target_id)
+        if self.is_set(user.id, target_id) == value:
+            return False
+        ReactionEvent.objects.create(
+            user=user, kind=self.kind, target_id=target_id, value=value
+        )
+        return True
+
+    def set(self, user, target_id):
+        """
+        设置（幂等）/ Set idempotently
+        Returns:
+            bool: 是否新插入了一行 / Whether a row was inserted
+        Raises:
+            DoesNotExist: 目标不存在 / Target missing
+        """
+        if write_behind_enabled():
+            return self._enqueue(user, target_id, True)
+        with transaction.atomic():
+            if self._insert(user.id, target_id):
+                self._changed(target_id, 1)
+                return True
+        self._ensure_target(target_id)
+        return False
+
+    def unset(self, user, target_id):
+        """
+        取消（幂等）/ Unset idempotently
+        Returns:
+            bool: 是否删除了一行 / Whether a row was deleted
+        Raises:
+            DoesNotExist: 目标不存在 / Target missing
+        """
+        if write_behind_enabled():
+            return self._enqueue(user, target_id, False)
+        with transaction.atomic():
+            if self._delete(user.id, target_id):
+                self._changed(target_id, -1)
+                return True
+        self._ensure_target(target_id)
+        return False
+
+    def toggle(self, user, target_id):
+        """
+        切换：先尝试取消，未取消则设置 / Toggle: try unset, otherwise set
+        写后合并模式下切换总是翻转读到的当前状态（含未处理事件），所以 changed 恒为 True；
+        并发的重复切换各自追加事件，写入时按最后一次合并
+        In write-behind mode a toggle always flips the state it read, pending
+        events included, so changed is always True. Concurrent toggles each
+        append an event and are coalesced to the last one when applied.
+        Returns:
+            tuple: (当前是否已设置, 是否发生变化) / (is_set, changed)
+        """
+        if write_behind_enabled():
+            self._ensure_target(target_id)
+            value = not self.is_set(user.id, target_id)
+            ReactionEvent.objects.create(
+                user=user, kind=self.kind, target_id=target_id, value=value
+            )
+            return value, True
+        with transaction.atomic():
+            if self._delete(user.id, target_id):
+                self._changed(target_id, -1)
+                return False, True
+        return True, self.set(user, target_id)
+
+    def apply_events(self, events):
+        """
+        批量写入已合并的事件 / Apply coalesced events in bulk
+        Args:
+            events: {(user_id, target_id): value}，每个键只保留最后一次操作
+                    Last value per (user, target)
+        Returns:
+            tuple: (插入行数, 删除行数) / (created, deleted)
+        """
+        target = self.target_field.attname
+        user_ids = {user_id for user_id, _ in events}
+        target_ids = {target_id for _, target_id in events}
+        existing = set(self.model.objects.filter(
+            user_id__in=user_ids, **{f'{target}__in': target_ids}
+        ).values_list('user_id', target))
+        live = set(self.target_model.objects.filter(
+            pk__in=target_ids, status='normal'
+        ).values_list('pk', flat=True))
+
+        to_create = [
+            key for key, value in events.items()
+            if value and key not in existing and key[1] in live
+        ]
+        to_delete = [key for key, value in events.items() if not value and key in existing]
+
+        # 按 RETURNING 返回的行计数：并发的直接点赞可能已插入或删除了同一行
+        # Count the rows RETURNING reports: a concurrent direct like may
+        # already have inserted or deleted the same row
+        created = self._insert_many(to_create)
+        deleted = []
+        if to_delete:
+            by_user = defaultdict(list)
+            for user_id, target_id in to_delete:
+                by_user[user_id].append(target_id)
+            condition = Q()
+            for user_id, ids in by_user.items():
+                condition |= Q(user_id=user_id, **{f'{target}__in': ids})
+            deleted = self._delete_matching(condition)
+
+        # 每个目标只更新一次计数 / One counter update per target
+        if self.apply_delta is not None:
+            deltas = Counter(created)
+            deltas.subtract(deleted)
+            for target_id, delta in deltas.items():
+                if delta:
+                    self.apply_delta(target_id, delta)
+        return len(created), len(deleted)
+
+    def _insert_many(self, keys):
+        """
+        批量插入，跳过已存在的行 / Bulk insert, skipping existing rows
+        Returns:
+            list: 实际插入的各行的目标 ID / Target IDs of the rows actually inserted
+        """
+        names = self._sql_names()
+        now = timezone.now()
+        inserted = []
+        with connection.cursor() as cursor:
+            for start in range(0, len(keys), APPLY_CHUNK_SIZE):
+                chunk = keys[start:start + APPLY_CHUNK_SIZE]
+                sql = (
+                    'INSERT INTO {table} ({user}, {target}, {created_at}) VALUES '
+                    + ', '.join(['(%s, %s, %s)'] * len(chunk))
+                    + ' ON CONFLICT DO NOTHING RETURNING {target}'
+                ).format(**names)
+                cursor.execute(sql, [value for key in chunk for value in (*key, now)])
+                inserted += [row[0] for row in cursor.fetchall()]
+        return inserted
+
+    def _delete_matching(self, condition):
+        """
+        删除满足条件的行 / Delete the rows matching condition
+        Returns:
+            list: 实际删除的各行的目标 ID / Target IDs of the rows actually deleted
+        """
+        names = self._sql_names()
+        subquery, params = self.model.objects.filter(condition).values('pk').query.sql_with_params()
+        sql = 'DELETE FROM {table} WHERE {pk} IN ({subquery}) RETURNING {target}'.format(
+            subquery=subquery, **names
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+post_like = Reaction(
+    'post_like', Like, 'post',
+    lambda post_id, delta: Post(pk=post_id).increment_counts(like_delta=delta)
+)
+comment_like = Reaction(
+    'comment_like', Like, 'comment',
+    lambda comment_id, delta: Comment(pk=comment_id).increment_like_count(delta)
+)
+post_favorite = Reaction('post_favorite', Favorite, 'post')
+
+REACTIONS = {reaction.kind: reaction for reaction in (post_like, comment_like, post_favorite)}
+
+
+def apply_reaction_events(batch_size=None):
+    """
+    合并并写入一批事件 / Coalesce and apply one batch of queued events
+    同一 (类型, 用户, 目标) 只保留最后一次操作，与当前数据对比后批量插入/删除，
+    处理完的事件在同一事务中删除
+    Keeps the last event per (kind, user, target), diffs against the stored
+    rows, bulk inserts/deletes, and removes the processed events in the same
+    transaction.
+    Returns:
+        tuple: (处理事件数, 插入行数, 删除行数) / (events, created, deleted)
+    """
+    batch_size = batch_size or getattr(settings, 'REACTION_EVENT_BATCH_SIZE', 5000)
+    with transaction.atomic():
+        events = list(ReactionEvent.objects.order_by('id').values_list(
+            'id', 'kind', 'user_id', 'target_id', 'value'
+        )[:batch_size])
+        if not events:
+            return 0, 0, 0
+
+        latest = defaultdict(dict)
+        for _, kind, user_id, target_id, value in events:
+            latest[kind][(user_id, target_id)] = value
+
+        created = deleted = 0
+        for kind, kind_events in latest.items():
+            kind_created, kind_deleted = REACTIONS[kind].apply_events(kind_events)
+            created += kind_created
+            deleted += kind_deleted
+
+        # 只删除本批读到的事件：id 较小但在读取之后才提交的事件留到下一批
+        # Delete only the events read: one with a lower id that committed after
+        # the SELECT stays for the next batch
+        ReactionEvent.objects.filter(id__in=[event[0] for event in events]).delete()
+
+    logger.info(
+        'Applied %d reaction events: %d created, %d deleted', len(events), created, deleted
+    )
+    return len(events), created, deleted
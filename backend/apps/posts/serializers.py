@@ -2,23 +2,32 @@
 帖子序列化器 / Post Serializers
 """
 
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Post, Comment
-from common.sensitive import validate_sensitive_field
-from common.serializers import UserBriefSerializer
+from common.metrics import section
+from common.sensitive import validate_sensitive_fields
+from common.serializers import TimedSerializerMixin, UserBriefSerializer, format_datetime, user_brief
+from .services import REPLY_PREVIEW_SIZE, ViewerPostState
 
 
-class PostSerializer(serializers.ModelSerializer):
-    """帖子序列化器 / Post Serializer"""
+class PostSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    帖子序列化器 / Post Serializer
+    字段变更时需同步修改 serialize_posts() / Keep serialize_posts() in sync
+    """
     author = UserBriefSerializer(read_only=True)
     circle_name = serializers.CharField(source='circle.name', read_only=True)
+    is_liked = serializers.SerializerMethodField()
+    is_favorited = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
         fields = [
             'id', 'circle', 'circle_name', 'author', 'content', 'images', 'tags',
             'status', 'is_pinned', 'is_featured', 'view_count', 'like_count',
-            'comment_count', 'hot_score', 'last_reply_at', 'created_at', 'updated_at'
+            'comment_count', 'hot_score', 'last_reply_at', 'created_at', 'updated_at',
+            'is_liked', 'is_favorited'
         ]
         read_only_fields = [
             'id', 'author', 'status', 'is_pinned', 'is_featured',
@@ -26,6 +35,76 @@ class PostSerializer(serializers.ModelSerializer):
             'last_reply_at', 'created_at', 'updated_at'
         ]
 
+    def _viewer_state(self, obj):
+        """当前用户状态，many=True 时整批解析 / Viewer state, resolved for the whole batch"""
+        state = ViewerPostState.for_request(self.context.get('request'))
+        if state is not None and obj.id not in state.resolved:
+            if isinstance(self.parent, serializers.ListSerializer):
+                state.resolve(post.id for post in self.parent.instance)
+            else:
+                state.resolve([obj.id])
+        return state
+
+    def get_is_liked(self, obj):
+        state = self._viewer_state(obj)
+        return state is not None and state.is_liked(obj.id)
+
+    def get_is_favorited(self, obj):
+        state = self._viewer_state(obj)
+        return state is not None and state.is_favorited(obj.id)
+
+
+@section('serializer')
+def serialize_posts(posts, request=None):
+    """
+    帖子列表快速序列化 / Fast list serialization for posts
+    输出与 PostSerializer(many=True).data 逐字节一致，但直接由模型属性构建字典，
+    跳过 DRF 每行每字段的 Field 调度；时区只解析一次，同一作者只构建一次
+    Produces byte-identical output to PostSerializer(many=True).data by building
+    dicts straight from model attributes, skipping DRF's per-field dispatch.
+    The timezone is resolved once and each author is built once per page.
+
+    Args:
+        posts: 已 select_related('author__profile', 'circle') 的帖子
+               Posts with author__profile and circle selected
+        request: 用于解析当前用户的点赞/收藏状态 / Resolves the viewer's like/favorite state
+    Returns:
+        list[dict]
+    """
+    posts = list(posts)
+    state = ViewerPostState.for_request(request)
+    if state is not None:
+        state.resolve(post.id for post in posts)
+    current = timezone.get_current_timezone()
+    authors = {}
+    data = []
+    for post in posts:
+        author = authors.get(post.author_id)
+        if author is None:
+            author = authors[post.author_id] = user_brief(post.author)
+        data.append({
+            'id': post.id,
+            'circle': post.circle_id,
+            'circle_name': str(post.circle.name),
+            'author': dict(author),
+            'content': str(post.content),
+            'images': post.images,
+            'tags': post.tags,
+            'status': str(post.status),
+            'is_pinned': bool(post.is_pinned),
+            'is_featured': bool(post.is_featured),
+            'view_count': int(post.view_count),
+            'like_count': int(post.like_count),
+            'comment_count': int(post.comment_count),
+            'hot_score': int(post.hot_score),
+            'last_reply_at': format_datetime(post.last_reply_at, current),
+            'created_at': format_datetime(post.created_at, current),
+            'updated_at': format_datetime(post.updated_at, current),
+            'is_liked': state is not None and state.is_liked(post.id),
+            'is_favorited': state is not None and state.is_favorited(post.id),
+        })
+    return data
+
 
 class PostCreateSerializer(serializers.Serializer):
     """创建帖子序列化器 / Create Post Serializer"""
@@ -43,15 +122,9 @@ class PostCreateSerializer(serializers.Serializer):
         default=list
     )
 
-    def validate_content(self, value):
-        """检查敏感词 / Check sensitive words"""
-        return validate_sensitive_field(value, '内容')
-
-    def validate_tags(self, value):
-        """检查标签敏感词 / Check tags for sensitive words"""
-        for tag in value:
-            validate_sensitive_field(tag, '标签')
-        return value
+    def validate(self, attrs):
+        """内容和标签一次性检查敏感词 / Check content and tags in one scan"""
+        return validate_sensitive_fields(attrs, {'content': '内容', 'tags': '标签'})
 
 
 class PostUpdateSerializer(serializers.Serializer):
@@ -68,18 +141,12 @@ class PostUpdateSerializer(serializers.Serializer):
         required=False
     )
 
-    def validate_content(self, value):
-        """检查敏感词 / Check sensitive words"""
-        return validate_sensitive_field(value, '内容')
-
-    def validate_tags(self, value):
-        """检查标签敏感词 / Check tags for sensitive words"""
-        for tag in value:
-            validate_sensitive_field(tag, '标签')
-        return value
+    def validate(self, attrs):
+        """内容和标签一次性检查敏感词 / Check content and tags in one scan"""
+        return validate_sensitive_fields(attrs, {'content': '内容', 'tags': '标签'})
 
 
-class ReplySerializer(serializers.ModelSerializer):
+class ReplySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """楼中楼回复序列化器 / Reply Serializer"""
     author = UserBriefSerializer(read_only=True)
     reply_to_username = serializers.CharField(
@@ -94,10 +161,13 @@ class ReplySerializer(serializers.ModelSerializer):
         ]
 
 
-class CommentSerializer(serializers.ModelSerializer):
-    """评论序列化器 / Comment Serializer"""
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    评论序列化器 / Comment Serializer
+    列表中的评论应经过 with_reply_preview() 预取，replies 只包含前几条回复
+    """
     author = UserBriefSerializer(read_only=True)
-    replies = ReplySerializer(many=True, read_only=True)
+    replies = serializers.SerializerMethodField()
     reply_count = serializers.SerializerMethodField()
 
     class Meta:
@@ -107,8 +177,19 @@ class CommentSerializer(serializers.ModelSerializer):
             'like_count', 'status', 'created_at', 'replies', 'reply_count'
         ]
 
+    def get_replies(self, obj):
+        replies = getattr(obj, 'preview_replies', None)
+        if replies is None:
+            replies = obj.replies.filter(status='normal').select_related(
+                'author', 'author__profile', 'reply_to'
+            )[:REPLY_PREVIEW_SIZE]
+        return ReplySerializer(replies, many=True).data
+
     def get_reply_count(self, obj):
-        return obj.replies.filter(status='normal').count()
+        reply_count = getattr(obj, 'reply_count', None)
+        if reply_count is None:
+            reply_count = obj.replies.filter(status='normal').count()
+        return reply_count
 
 
 class CommentCreateSerializer(serializers.Serializer):
@@ -117,9 +198,9 @@ class CommentCreateSerializer(serializers.Serializer):
     parent_id = serializers.IntegerField(required=False, allow_null=True)
     reply_to_id = serializers.IntegerField(required=False, allow_null=True)
 
-    def validate_content(self, value):
+    def validate(self, attrs):
         """检查敏感词 / Check sensitive words"""
-        return validate_sensitive_field(value, '评论内容')
+        return validate_sensitive_fields(attrs, {'content': '评论内容'})
 
 
 class PostPinSerializer(serializers.Serializer):
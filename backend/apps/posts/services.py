@@ -0,0 +1,430 @@
+"""
+帖子服务 / Post Services
+"""
+
+import atexit
+import heapq
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Prefetch, Subquery, Value, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
+
+from .models import Post, Comment, Like, Favorite, PostHotRank, ReactionEvent
+
+logger = logging.getLogger(__name__)
+
+# 评论列表中每条评论预览的回复数 / Replies previewed under each comment
+REPLY_PREVIEW_SIZE = 3
+
+
+class ViewCountBuffer:
+    """
+    浏览量缓冲器 / View Count Buffer
+    在进程内累积浏览量增量，每隔 interval 秒或累计 threshold 次后批量写回，
+    写回时同时重算热度分数；展示的浏览量最终一致
+    Accumulates view increments in process and flushes them in bulk every
+    `interval` seconds or `threshold` hits, recomputing hot_score on flush.
+
+    background 为 True 时首次 add() 启动后台线程，没有新浏览的 worker 也按间隔写回
+    With background=True the first add() starts a thread, so an idle worker
+    still flushes within the interval instead of waiting for the next view.
+    """
+
+    def __init__(self, interval=10, threshold=100, background=False):
+        self.interval = interval
+        self.threshold = threshold
+        self.background = background
+        self._pending = Counter()
+        self._hits = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def add(self, post_id):
+        """
+        记录一次浏览 / Record one view
+        Returns:
+            尚未反映在此前读取的帖子数据中的浏览量（含本次）
+            Views of this post not yet reflected in a row read before the call
+        """
+        if self.background and self._thread is None:
+            self.start()
+        with self._lock:
+            self._pending[post_id] += 1
+            self._hits += 1
+            unflushed = self._pending[post_id]
+            due = (
+                self._hits >= self.threshold
+                or time.monotonic() - self._last_flush >= self.interval
+            )
+
+        if due:
+            self.flush()
+        return unflushed
+
+    def pending(self, post_id):
+        """尚未写回的浏览量 / Views not yet flushed"""
+        return self._pending.get(post_id, 0)
+
+    def start(self):
+        """启动后台写回线程 / Start the background flush thread"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name='view-count-flush', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """停止后台线程，缓冲区保留 / Stop the background thread, keeping the buffer"""
+        self._stopped.set()
+
+    def flush_if_due(self):
+        """
+        距上次写回已满 interval 秒时写回 / Flush when `interval` seconds have passed
+        Returns:
+            写回的帖子数 / Number of posts flushed
+        """
+        with self._lock:
+            due = self._pending and time.monotonic() - self._last_flush >= self.interval
+        return self.flush() if due else 0
+
+    def _next_wait(self):
+        """到下次应写回的秒数，已过期则等一个完整间隔 / Seconds until the next flush is due"""
+        remaining = self._last_flush + self.interval - time.monotonic()
+        return remaining if remaining > 0 else self.interval
+
+    def _run(self):
+        while not self._stopped.wait(self._next_wait()):
+            self.flush_if_due()
+            # 线程自己的连接不会随请求结束关闭，写回失败后也不复用 / No request closes this thread's connection
+            connection.close()
+
+    def flush(self):
+        """
+        批量写回浏览量并重算热度 / Flush buffered views and recompute hot score
+        增量相同的帖子合并为一条 UPDATE / Posts with equal deltas share one UPDATE
+        Returns:
+            写回的帖子数 / Number of posts flushed
+        """
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._hits = 0
+            self._last_flush = time.monotonic()
+
+        if not pending:
+            return 0
+
+        by_delta = defaultdict(list)
+        for post_id, delta in pending.items():
+            by_delta[delta].append(post_id)
+
+        try:
+            # 全部写入或全部回滚，放回缓冲区时不会重复计数
+            # All groups commit or none do, so putting them back never double counts
+            with transaction.atomic():
+                for delta, post_ids in by_delta.items():
+                    Post.objects.filter(pk__in=post_ids).update(
+                        view_count=F('view_count') + delta,
+                        hot_score=Post.hot_score_expression(view_delta=delta)
+                    )
+        except Exception:
+            # 写回失败时放回缓冲区，下次再试 / Put back and retry on next flush
+            with self._lock:
+                self._pending.update(pending)
+            logger.exception('view count flush failed: %d posts', len(pending))
+            return 0
+
+        return len(pending)
+
+
+# 全局缓冲器 / Global buffer
+view_count_buffer = ViewCountBuffer(
+    interval=getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 10),
+    threshold=getattr(settings, 'VIEW_COUNT_FLUSH_THRESHOLD', 100),
+    background=getattr(settings, 'VIEW_COUNT_FLUSH_BACKGROUND', True),
+)
+
+# 进程退出时写回剩余浏览量 / Flush remaining views on worker exit
+atexit.register(view_count_buffer.flush)
+
+
+def _count_subquery(queryset, field):
+    """按外层主键分组计数的子查询 / Correlated COUNT subquery"""
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), Value(0))
+
+
+def reconcile_post_counts(batch_size=1000, dry_run=False):
+    """
+    校正帖子点赞数、评论数与热度分数 / Repair drift in post counters
+    按主键分批比对真实计数，仅对有偏差的行批量更新
+    Compares stored counters with real counts in primary-key batches and
+    bulk-updates only the rows that drifted.
+    Returns:
+        (检查的帖子数, 修正的帖子数) / (posts checked, posts repaired)
+    """
+    checked = repaired = 0
+    last_pk = 0
+    while True:
+        rows = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk').annotate(
+                real_like_count=_count_subquery(
+                    Like.objects.filter(post__isnull=False), 'post'
+                ),
+                real_comment_count=_count_subquery(
+                    Comment.objects.filter(status='normal'), 'post'
+                ),
+            ).only('pk', 'view_count', 'like_count', 'comment_count', 'hot_score')[:batch_size]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1].pk
+        checked += len(rows)
+
+        drifted = []
+        for post in rows:
+            hot_score = Post.compute_hot_score(
+                post.view_count, post.real_like_count, post.real_comment_count
+            )
+            if (post.like_count, post.comment_count, post.hot_score) != \
+                    (post.real_like_count, post.real_comment_count, hot_score):
+                post.like_count = post.real_like_count
+                post.comment_count = post.real_comment_count
+                post.hot_score = hot_score
+                drifted.append(post)
+
+        repaired += len(drifted)
+        if drifted and not dry_run:
+            Post.objects.bulk_update(
+                drifted, ['like_count', 'comment_count', 'hot_score']
+            )
+
+    return checked, repaired
+
+
+def reconcile_comment_like_counts(batch_size=1000, dry_run=False):
+    """
+    校正评论点赞数 / Repair drift in comment like counts
+    Returns:
+        (检查的评论数, 修正的评论数) / (comments checked, comments repaired)
+    """
+    checked = repaired = 0
+    last_pk = 0
+    while True:
+        rows = list(
+            Comment.objects.filter(pk__gt=last_pk).order_by('pk').annotate(
+                real_like_count=_count_subquery(
+                    Like.objects.filter(comment__isnull=False), 'comment'
+                ),
+            ).only('pk', 'like_count')[:batch_size]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1].pk
+        checked += len(rows)
+
+        drifted = [c for c in rows if c.like_count != c.real_like_count]
+        for comment in drifted:
+            comment.like_count = comment.real_like_count
+
+        repaired += len(drifted)
+        if drifted and not dry_run:
+            Comment.objects.bulk_update(drifted, ['like_count'])
+
+    return checked, repaired
+
+
+def compute_hot_rank(hot_score, created_at, now, gravity=None):
+    """
+    时间衰减热度（Hacker News 公式）/ Time-decayed hot rank (Hacker News style)
+    rank = (hot_score + 1) / (小时数 + 2) ^ gravity
+    """
+    if gravity is None:
+        gravity = getattr(settings, 'HOT_RANK_GRAVITY', 1.8)
+    age_hours = max((now - created_at).total_seconds(), 0) / 3600
+    return (hot_score + 1) / (age_hours + 2) ** gravity
+
+
+def add_to_hot_rank(post):
+    """新帖直接进入排行，无需等待下次刷新 / Rank a new post right away"""
+    PostHotRank.objects.update_or_create(
+        post=post,
+        defaults={
+            'circle_id': post.circle_id,
+            'is_pinned': post.is_pinned,
+            'score': compute_hot_rank(post.hot_score, post.created_at, post.created_at),
+        }
+    )
+
+
+def refresh_hot_ranks(circle_ids=None, now=None):
+    """
+    重新计算并物化各圈子的热帖排行 / Recompute and materialize per-circle hot ranks
+    只考虑 HOT_RANK_WINDOW_DAYS 天内的帖子，每个圈子保留前 HOT_RANK_SIZE 条；
+    每个圈子在一个事务内整体替换，读请求只会看到完整的旧排行或新排行
+    Args:
+        circle_ids: 只刷新这些圈子，None 表示全部 / Circles to refresh, None for all
+        now: 计算时间 / Reference time
+    Returns:
+        (刷新的圈子数, 写入的排行条数) / (circles refreshed, rows written)
+    """
+    now = now or timezone.now()
+    window = timedelta(days=getattr(settings, 'HOT_RANK_WINDOW_DAYS', 30))
+    size = getattr(settings, 'HOT_RANK_SIZE', 1000)
+    gravity = getattr(settings, 'HOT_RANK_GRAVITY', 1.8)
+
+    candidates = Post.objects.filter(status='normal', created_at__gte=now - window)
+    stale = PostHotRank.objects.all()
+    if circle_ids is not None:
+        candidates = candidates.filter(circle_id__in=circle_ids)
+        stale = stale.filter(circle_id__in=circle_ids)
+
+    # 每个圈子维护一个大小为 size 的小顶堆 / Bounded min-heap per circle
+    heaps = defaultdict(list)
+    rows = candidates.values_list(
+        'id', 'circle_id', 'hot_score', 'is_pinned', 'created_at'
+    ).iterator(chunk_size=2000)
+    for post_id, circle_id, hot_score, is_pinned, created_at in rows:
+        score = compute_hot_rank(hot_score, created_at, now, gravity)
+        item = (is_pinned, score, post_id)
+        heap = heaps[circle_id]
+        if len(heap) < size:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    written = 0
+    for circle_id, heap in heaps.items():
+        ranks = [
+            PostHotRank(circle_id=circle_id, post_id=post_id, is_pinned=is_pinned, score=score)
+            for is_pinned, score, post_id in heap
+        ]
+        with transaction.atomic():
+            PostHotRank.objects.filter(circle_id=circle_id).delete()
+            PostHotRank.objects.bulk_create(ranks, batch_size=1000)
+        written += len(ranks)
+
+    # 窗口内已无帖子的圈子，清空旧排行 / Drop rankings of circles with no candidates left
+    stale.exclude(circle_id__in=list(heaps)).delete()
+
+    return len(heaps), written
+
+
+def with_reply_preview(comments, size=REPLY_PREVIEW_SIZE):
+    """
+    为一级评论附加回复数和前 size 条回复 / Attach reply count and first replies
+    回复数用子查询注解；回复用窗口函数在每个父评论内编号后只取前 size 条，
+    整页评论固定两条查询，与回复数量无关
+    Reply counts come from a correlated subquery and the preview from a
+    ROW_NUMBER() window per parent, so a page costs a constant number of queries.
+    结果: comment.reply_count, comment.preview_replies
+    """
+    preview = Comment.objects.filter(status='normal').annotate(
+        reply_rank=Window(
+            expression=RowNumber(),
+            partition_by=[F('parent_id')],
+            order_by=[F('created_at').asc(), F('id').asc()],
+        )
+    ).filter(reply_rank__lte=size).select_related(
+        'author', 'author__profile', 'reply_to'
+    ).order_by('created_at', 'id')
+
+    return comments.annotate(
+        reply_count=_count_subquery(Comment.objects.filter(status='normal'), 'parent')
+    ).prefetch_related(
+        Prefetch('replies', queryset=preview, to_attr='preview_replies')
+    )
+
+
+class ViewerPostState:
+    """
+    当前用户对帖子的点赞/收藏状态，按请求缓存 / Viewer's like/favorite state, memoized per request
+    每批帖子各用一次 IN 查询解析，已解析过的帖子不再查询；同一请求内的所有序列化共用
+    Each batch is resolved with one IN query per table and already-resolved
+    posts are skipped, so every serializer within a request shares the lookups.
+    """
+    request_attr = '_viewer_post_state'
+
+    def __init__(self, user):
+        self.user = user
+        self.liked = set()
+        self.favorited = set()
+        self.resolved = set()
+
+    @classmethod
+    def for_request(cls, request):
+        """获取请求上的状态缓存，没有请求时返回 None / Per-request state or None"""
+        if request is None:
+            return None
+        state = getattr(request, cls.request_attr, None)
+        if state is None:
+            state = cls(request.user)
+            setattr(request, cls.request_attr, state)
+        return state
+
+    def resolve(self, post_ids):
+        """批量解析尚未解析的帖子 / Resolve posts not seen yet in one query per table"""
+        missing = set(post_ids) - self.resolved
+        if not missing:
+            return
+        self.resolved |= missing
+        if not self.user.is_authenticated:
+            return
+        self.liked.update(Like.objects.filter(
+            user=self.user, post_id__in=missing
+        ).values_list('post_id', flat=True))
+        self.favorited.update(Favorite.objects.filter(
+            user=self.user, post_id__in=missing
+        ).values_list('post_id', flat=True))
+        if getattr(settings, 'REACTION_WRITE_BEHIND', False):
+            self._apply_pending(missing)
+
+    def _apply_pending(self, post_ids):
+        """
+        叠加尚未写入的点赞/收藏事件 / Overlay queued write-behind events
+        按事件顺序应用，最后一次操作生效 / Applied in order, the last one wins
+        """
+        states = {'post_like': self.liked, 'post_favorite': self.favorited}
+        events = ReactionEvent.objects.filter(
+            user=self.user, kind__in=states, target_id__in=post_ids
+        ).order_by('id').values_list('kind', 'target_id', 'value')
+        for kind, post_id, value in events:
+            if value:
+                states[kind].add(post_id)
+            else:
+                states[kind].discard(post_id)
+
+    def mark_favorited(self, post_ids):
+        """已知为收藏的帖子（如收藏列表）免查收藏表 / Prime posts known to be favorited"""
+        if not self.user.is_authenticated:
+            return
+        if getattr(settings, 'REACTION_WRITE_BEHIND', False):
+            # 可能有尚未写入的取消收藏 / Queued unfavorites may be pending
+            return self.resolve(post_ids)
+        post_ids = set(post_ids)
+        self.favorited |= post_ids
+        missing = post_ids - self.resolved
+        if missing:
+            self.resolved |= missing
+            self.liked.update(Like.objects.filter(
+                user=self.user, post_id__in=missing
+            ).values_list('post_id', flat=True))
+
+    def is_liked(self, post_id):
+        return post_id in self.liked
+
+    def is_favorited(self, post_id):
+        return post_id in self.favorited
@@ -1,3 +1,1080 @@
-from django.test import TestCase
+"""
+帖子模块测试 / Post Tests
+"""
 
-# Create your tests here.
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.circles.models import Circle, CircleMember
+from apps.schools.models import School
+from apps.users.models import User, UserProfile
+from common.testing import LOCAL_CACHES, QueryBudgetTestCase, test_image
+from .models import Post, Comment, Like, Favorite, PostHotRank, ReactionEvent, TimelineEntry
+from .reactions import Reaction, apply_reaction_events, post_favorite, post_like
+from .serializers import CommentSerializer, PostSerializer, serialize_posts
+from .services import (
+    REPLY_PREVIEW_SIZE, ViewCountBuffer, add_to_hot_rank, compute_hot_rank, reconcile_post_counts,
+    refresh_hot_ranks, view_count_buffer, with_reply_preview,
+)
+from .timeline import rebuild_timeline, trim_timelines
+
+
+class ListQueryPlanTests(TestCase):
+    """
+    列表查询执行计划测试 / List query plan tests
+    在预置数据上对各接口的列表查询执行 EXPLAIN，确认走索引且没有额外排序
+    Runs EXPLAIN on each endpoint's list query over a seeded dataset and
+    asserts that it is served by an index scan without a sort step.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='第一中学', province='北京', city='北京')
+        cls.user = User.objects.create_user(username='planner', password='password')
+        cls.circles = [
+            Circle.objects.create(
+                circle_type='grade', school=school, grade_year=2000 + i,
+                name=f'圈子{i}', owner=cls.user, created_by=cls.user
+            )
+            for i in range(4)
+        ]
+        members = [cls.user] + [
+            User.objects.create_user(username=f'member{i}', password='password')
+            for i in range(5)
+        ]
+        CircleMember.objects.bulk_create([
+            CircleMember(circle=circle, user=member, status='approved')
+            for circle in cls.circles for member in members
+        ])
+
+        posts = Post.objects.bulk_create([
+            Post(
+                circle=cls.circles[i % 4], author=cls.user, content=f'帖子{i}',
+                status='deleted' if i % 10 == 0 else 'normal',
+                is_pinned=i % 50 == 1, hot_score=i % 37,
+            )
+            for i in range(400)
+        ])
+        cls.post = posts[1]
+        Comment.objects.bulk_create([
+            Comment(post=cls.post, author=cls.user, content=f'评论{i}')
+            for i in range(100)
+        ])
+        cls.comment = Comment.objects.filter(post=cls.post).first()
+        Comment.objects.bulk_create([
+            Comment(
+                post=cls.post, author=cls.user, parent=cls.comment, content=f'回复{i}',
+                status='deleted' if i % 10 == 0 else 'normal',
+            )
+            for i in range(100)
+        ])
+        Favorite.objects.bulk_create([
+            Favorite(user=cls.user, post=post) for post in posts[1:100]
+        ])
+
+        refresh_hot_ranks()
+        for member in members:
+            rebuild_timeline(member)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        if connection.vendor == 'postgresql':
+            # 数据量小时规划器会倾向顺序扫描，这里只验证索引能否支撑排序
+            # Small tables favour seq scans; we only check the index can serve the order
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def _list_query_plan(self, url, table, position=0):
+        """
+        请求接口并返回目标表列表查询的执行计划 / EXPLAIN the endpoint's list query
+        Args:
+            position: 有多条列表查询时取第几条 / Which list query when there are several
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        sql = [
+            q['sql'] for q in ctx.captured_queries
+            if 'ORDER BY' in q['sql'] and f'FROM "{table}"' in q['sql']
+        ]
+        self.assertTrue(sql, f'{url} 没有查询 {table}')
+
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql[position])
+            return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+    def assertIndexOrdered(self, plan, index_name):
+        """断言使用了指定索引且没有排序 / Assert index usage and no sort"""
+        self.assertIn(index_name, plan)
+        if connection.vendor == 'sqlite':
+            self.assertNotIn('TEMP B-TREE', plan)
+        else:
+            self.assertNotIn('Sort', plan)
+
+    def test_circle_posts_latest(self):
+        circle = self.circles[1]
+        plan = self._list_query_plan(f'/api/v1/circles/{circle.id}/posts/', 'posts')
+        self.assertIndexOrdered(plan, 'post_circle_latest_idx')
+
+    def test_circle_posts_hot(self):
+        circle = self.circles[1]
+        plan = self._list_query_plan(
+            f'/api/v1/circles/{circle.id}/posts/?ordering=hot', 'post_hot_ranks'
+        )
+        self.assertIndexOrdered(plan, 'hot_rank_circle_order_idx')
+
+    def test_circle_posts_hot_fallback(self):
+        circle = self.circles[2]
+        PostHotRank.objects.filter(circle=circle).delete()
+        # 置顶段与其余帖子段 / The pinned segment and the remaining posts
+        for position in (0, 1):
+            plan = self._list_query_plan(
+                f'/api/v1/circles/{circle.id}/posts/?ordering=hot', 'posts', position
+            )
+            self.assertIndexOrdered(plan, 'post_circle_hot_idx')
+
+    def test_circle_posts_reply_at(self):
+        circle = self.circles[1]
+        plan = self._list_query_plan(
+            f'/api/v1/circles/{circle.id}/posts/?ordering=reply_at', 'posts'
+        )
+        self.assertIndexOrdered(plan, 'post_circle_reply_idx')
+
+    def test_feed(self):
+        plan = self._list_query_plan('/api/v1/feed/', 'timeline_entries')
+        self.assertIndexOrdered(plan, 'timeline_user_order_idx')
+
+    def test_favorites(self):
+        plan = self._list_query_plan('/api/v1/users/me/favorites/', 'favorites')
+        self.assertIndexOrdered(plan, 'favorite_user_latest_idx')
+
+    def test_comments(self):
+        plan = self._list_query_plan(f'/api/v1/posts/{self.post.id}/comments/', 'comments')
+        self.assertIndexOrdered(plan, 'comment_post_top_idx')
+
+    def test_comment_replies(self):
+        plan = self._list_query_plan(f'/api/v1/comments/{self.comment.id}/replies/', 'comments')
+        self.assertIndexOrdered(plan, 'comment_parent_replies_idx')
+
+
+class PostListSerializationTests(TestCase):
+    """列表快速序列化与 PostSerializer 输出一致 / Fast path matches PostSerializer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='第一中学', province='北京', city='北京')
+        owner = User.objects.create_user(username='owner', password='password')
+        with_avatar = User.objects.create_user(username='avatar', password='password')
+        UserProfile.objects.create(user=with_avatar, avatar='avatars/2026/01/a.png')
+        circle = Circle.objects.create(
+            circle_type='grade', school=school, grade_year=2000,
+            name='圈子', owner=owner, created_by=owner
+        )
+        cls.viewer = with_avatar
+        posts = Post.objects.bulk_create([
+            Post(
+                circle=circle, author=with_avatar if i % 2 else owner,
+                content=f'帖子 "{i}" \n<b>', images=[f'https://example.com/{i}.jpg'] if i % 3 else [],
+                tags=['学习'] if i % 2 else [], is_pinned=i == 1, like_count=i,
+                last_reply_at=timezone.now() if i % 2 else None,
+            )
+            for i in range(10)
+        ])
+        Like.objects.bulk_create([Like(user=cls.viewer, post=post) for post in posts[::3]])
+        Favorite.objects.bulk_create([Favorite(user=cls.viewer, post=post) for post in posts[::4]])
+
+    def _posts(self):
+        return list(Post.objects.select_related('author', 'author__profile', 'circle'))
+
+    def assertSameOutput(self):
+        posts = self._posts()
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(serialize_posts(posts)),
+            renderer.render(PostSerializer(posts, many=True).data)
+        )
+        self.assertEqual(
+            renderer.render(serialize_posts(posts, SimpleNamespace(user=self.viewer))),
+            renderer.render(PostSerializer(
+                posts, many=True, context={'request': SimpleNamespace(user=self.viewer)}
+            ).data)
+        )
+
+    def test_viewer_state_batched(self):
+        posts = self._posts()
+        request = SimpleNamespace(user=self.viewer)
+        # 点赞、收藏各一次 IN 查询 / One IN query each for likes and favorites
+        with self.assertNumQueries(2):
+            data = serialize_posts(posts, request)
+        # 同一请求内再次序列化不再查询 / Memoized for the rest of the request
+        with self.assertNumQueries(0):
+            PostSerializer(posts, many=True, context={'request': request}).data
+        liked = set(Like.objects.filter(user=self.viewer).values_list('post_id', flat=True))
+        favorited = set(Favorite.objects.filter(user=self.viewer).values_list('post_id', flat=True))
+        self.assertEqual({row['id'] for row in data if row['is_liked']}, liked)
+        self.assertEqual({row['id'] for row in data if row['is_favorited']}, favorited)
+
+    def test_same_output(self):
+        self.assertSameOutput()
+
+    @override_settings(TIME_ZONE='UTC')
+    def test_same_output_utc(self):
+        self.assertSameOutput()
+
+
+class ReactionTests(TestCase):
+    """点赞/收藏的幂等性与计数 / Idempotent likes and favorites keep counts exact"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='第一中学', province='北京', city='北京')
+        cls.user = User.objects.create_user(username='liker', password='password')
+        circle = Circle.objects.create(
+            circle_type='grade', school=school, grade_year=2000,
+            name='圈子', owner=cls.user, created_by=cls.user
+        )
+        cls.post = Post.objects.create(circle=circle, author=cls.user, content='帖子')
+        cls.comment = Comment.objects.create(post=cls.post, author=cls.user, content='评论')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _like_count(self):
+        self.post.refresh_from_db()
+        return self.post.like_count
+
+    def test_set_and_unset_are_idempotent(self):
+        url = f'/api/v1/posts/{self.post.id}/like/'
+        changes = [self.client.put(url).data['data']['changed'] for _ in range(2)]
+        self.assertEqual(changes, [True, False])
+        self.assertEqual(self._like_count(), 1)
+        self.assertEqual(Like.objects.filter(user=self.user, post=self.post).count(), 1)
+
+        changes = [self.client.delete(url).data['data']['changed'] for _ in range(2)]
+        self.assertEqual(changes, [True, False])
+        self.assertEqual(self._like_count(), 0)
+        self.assertFalse(Like.objects.filter(user=self.user, post=self.post).exists())
+
+    def test_toggle(self):
+        url = f'/api/v1/comments/{self.comment.id}/like/'
+        states = [self.client.post(url).data['data']['liked'] for _ in range(3)]
+        self.assertEqual(states, [True, False, True])
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.like_count, 1)
+
+    def test_deleted_target(self):
+        url = f'/api/v1/posts/{self.post.id}/favorite/'
+        self.client.put(url)
+        Post.objects.filter(pk=self.post.pk).update(status='deleted')
+        self.assertEqual(self.client.put(url).status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.assertEqual(Favorite.objects.filter(user=self.user).count(), 1)
+
+
+@override_settings(HOT_RANK_SIZE=2, HOT_RANK_WINDOW_DAYS=7, HOT_RANK_GRAVITY=1.8)
+class HotRankTests(TestCase):
+    """时间衰减排行与热门列表 / Time-decayed ranking and the hot list"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='第一中学', province='北京', city='北京')
+        cls.user = User.objects.create_user(username='reader', password='password')
+        cls.circle, cls.quiet = [
+            Circle.objects.create(
+                circle_type='grade', school=school, grade_year=2000 + i,
+                name=f'圈子{i}', owner=cls.user, created_by=cls.user
+            )
+            for i in range(2)
+        ]
+        cls.now = timezone.now()
+        # (名称, 热度, 几小时前, 置顶) / (name, hot_score, hours ago, pinned)
+        specs = [
+            ('pinned', 0, 24 * 30, True),
+            ('old_hot', 500, 24 * 20, False),
+            ('new_hot', 30, 1, False),
+            ('new_warm', 10, 2, False),
+            ('new_cold', 1, 3, False),
+        ]
+        cls.posts = {}
+        for name, hot_score, hours, pinned in specs:
+            post = Post.objects.create(
+                circle=cls.circle, author=cls.user, content=name, hot_score=hot_score, is_pinned=pinned
+            )
+            Post.objects.filter(pk=post.pk).update(created_at=cls.now - timedelta(hours=hours))
+            cls.posts[name] = post.pk
+        cls.deleted = Post.objects.create(
+            circle=cls.circle, author=cls.user, content='deleted', hot_score=999, status='deleted'
+        ).pk
+        cls.quiet_post = Post.objects.create(circle=cls.quiet, author=cls.user, content='quiet')
+        Post.objects.filter(pk=cls.quiet_post.pk).update(created_at=cls.now - timedelta(days=30))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def ids(self, *names):
+        return [self.posts[name] for name in names]
+
+    def test_decay_order(self):
+        now = self.now
+        # 同样热度越新越靠前，同样时间热度越高越靠前 / Newer first at equal score, hotter first at equal age
+        self.assertGreater(
+            compute_hot_rank(10, now - timedelta(hours=1), now),
+            compute_hot_rank(10, now - timedelta(hours=10), now),
+        )
+        self.assertGreater(
+            compute_hot_rank(20, now - timedelta(hours=5), now),
+            compute_hot_rank(10, now - timedelta(hours=5), now),
+        )
+        # 热度高的旧帖最终排在新帖之后 / An old hot post eventually falls behind a fresh one
+        self.assertLess(
+            compute_hot_rank(500, now - timedelta(days=20), now),
+            compute_hot_rank(1, now - timedelta(hours=3), now),
+        )
+        # 时间在未来按零计算 / Future timestamps count as age zero
+        self.assertEqual(
+            compute_hot_rank(10, now + timedelta(hours=1), now), compute_hot_rank(10, now, now)
+        )
+        # 重力越大衰减越快 / Higher gravity decays faster
+        self.assertLess(
+            compute_hot_rank(10, now - timedelta(hours=5), now, gravity=2.5),
+            compute_hot_rank(10, now - timedelta(hours=5), now, gravity=1.2),
+        )
+
+    def test_refresh_caps_size_and_drops_stale_rows(self):
+        add_to_hot_rank(Post.objects.get(pk=self.quiet_post.pk))
+        add_to_hot_rank(Post.objects.get(pk=self.deleted))
+        self.assertEqual(refresh_hot_ranks(now=self.now), (1, 2))
+
+        # 窗口内按衰减热度取前 HOT_RANK_SIZE 条，已删除和窗口外的帖子不入榜
+        # Top HOT_RANK_SIZE by decayed score within the window; deleted and old posts stay out
+        ranks = PostHotRank.objects.filter(circle=self.circle).order_by('-score')
+        self.assertEqual([rank.post_id for rank in ranks], self.ids('new_hot', 'new_warm'))
+        # 窗口内已无帖子的圈子清空旧排行 / A circle with no recent posts loses its old rows
+        self.assertFalse(PostHotRank.objects.filter(circle=self.quiet).exists())
+
+        with override_settings(HOT_RANK_SIZE=1):
+            refresh_hot_ranks(circle_ids=[self.circle.id], now=self.now)
+        self.assertEqual(
+            list(PostHotRank.objects.values_list('post_id', flat=True)), self.ids('new_hot')
+        )
+
+    def hot_pages(self, circle, page_size):
+        """按游标读完热门列表 / Read the whole hot list by cursor"""
+        pages, query = [], {'ordering': 'hot', 'page_size': page_size}
+        while True:
+            data = self.client.get(f'/api/v1/circles/{circle.id}/posts/', query).data['data']
+            pages.append([post['id'] for post in data['results']])
+            if not data['has_more']:
+                return pages
+            query['cursor'] = data['next_cursor']
+
+    def test_hot_list_keeps_every_post(self):
+        refresh_hot_ranks(now=self.now)
+        # 置顶、排行（衰减热度）、其余（热度分数）/ Pinned, ranked by decay, then the rest by hot_score
+        expected = self.ids('pinned', 'new_hot', 'new_warm', 'old_hot', 'new_cold')
+        self.assertEqual(self.hot_pages(self.circle, 20), [expected])
+        self.assertEqual(self.hot_pages(self.circle, 2), [expected[:2], expected[2:4], expected[4:]])
+
+        response = self.client.get(f'/api/v1/circles/{self.circle.id}/posts/', {'ordering': 'hot', 'page': 1})
+        self.assertEqual(response.data['data']['total'], 5)
+        self.assertEqual([post['id'] for post in response.data['data']['results']], expected)
+
+        latest = self.client.get(f'/api/v1/circles/{self.circle.id}/posts/').data['data']['results']
+        self.assertEqual(sorted(post['id'] for post in latest), sorted(expected))
+
+    def test_hot_list_without_ranks(self):
+        # 没有排行的圈子同样置顶在前，其余按热度分数 / Without rank rows: pinned first, then hot_score
+        self.assertFalse(PostHotRank.objects.filter(circle=self.circle).exists())
+        self.assertEqual(
+            self.hot_pages(self.circle, 3),
+            [self.ids('pinned', 'old_hot', 'new_hot'), self.ids('new_warm', 'new_cold')],
+        )
+
+    def test_invalid_cursor(self):
+        url = f'/api/v1/circles/{self.circle.id}/posts/'
+        for cursor in ('not-a-cursor', 'WzUsMSwxXQ', 'Wy0xLDEsMSwxXQ'):
+            response = self.client.get(url, {'ordering': 'hot', 'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+
+@override_settings(HOT_RANK_SIZE=4, HOT_RANK_WINDOW_DAYS=7)
+class CirclePostPaginationTests(TestCase):
+    """圈子帖子列表的游标分页 / Cursor pagination of the circle post list"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='第一中学', province='北京', city='北京')
+        cls.user = User.objects.create_user(username='reader', password='password')
+        cls.circle = Circle.objects.create(
+            circle_type='grade', school=school, grade_year=2000,
+            name='圈子', owner=cls.user, created_by=cls.user
+        )
+        now = timezone.now()
+        cls.posts = []
+        for i in range(13):
+            post = Post.objects.create(
+                circle=cls.circle, author=cls.user, content=f'帖子{i}',
+                hot_score=i % 3, is_pinned=i in (4, 9)
+            )
+            # 每三条同一时间，排序键大量相同以覆盖 id 兜底 / Shared timestamps exercise the id tie-break
+            created_at = now - timedelta(hours=i // 3)
+            Post.objects.filter(pk=post.pk).update(created_at=created_at)
+            post.created_at = created_at
+            cls.posts.append(post)
+        Post.objects.filter(pk=cls.posts[7].pk).update(status='deleted')
+        cls.visible = [post for post in cls.posts if post.pk != cls.posts[7].pk]
+        refresh_hot_ranks(now=now)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/v1/circles/{self.circle.id}/posts/'
+
+    def cursor_pages(self, page_size, **params):
+        """按游标读到最后一页 / Follow the cursor to the last page"""
+        pages, query = [], {'page_size': page_size, **params}
+        while True:
+            response = self.client.get(self.url, query)
+            self.assertEqual(response.status_code, 200)
+            data = response.data['data']
+            self.assertEqual(set(data), {'next_cursor', 'has_more', 'page_size', 'results'})
+            pages.append([post['id'] for post in data['results']])
+            if not data['has_more']:
+                self.assertIsNone(data['next_cursor'])
+                return pages
+            query['cursor'] = data['next_cursor']
+
+    def page_number_ids(self, **params):
+        data = self.client.get(self.url, {'page': 1, 'page_size': 100, **params}).data['data']
+        self.assertEqual(data['total'], len(self.visible))
+        return [post['id'] for post in data['results']]
+
+    def assertPagesCover(self, pages, expected, page_size):
+        ids = [post_id for page in pages for post_id in page]
+        # 不重复、不遗漏，且与整表排序一致 / No duplicates, no gaps, same order as the full list
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertTrue(all(len(page) == page_size for page in pages[:-1]))
+
+    def test_latest(self):
+        expected = [
+            post.pk for post in sorted(
+                self.visible, key=lambda post: (post.is_pinned, post.created_at, post.pk), reverse=True
+            )
+        ]
+        self.assertEqual(self.page_number_ids(), expected)
+        for page_size in (1, 3, 5, len(expected)):
+            self.assertPagesCover(self.cursor_pages(page_size), expected, page_size)
+
+    def test_hot(self):
+        expected = self.page_number_ids(ordering='hot')
+        pinned = {self.posts[4].pk, self.posts[9].pk}
+        self.assertEqual(set(expected[:2]), pinned)
+        self.assertEqual(set(expected), {post.pk for post in self.visible})
+        # 分页跨越置顶、排行和其余三段 / Pages cross the pinned, ranked and remaining segments
+        ranked = PostHotRank.objects.filter(circle=self.circle, is_pinned=False).count()
+        self.assertTrue(0 < ranked < len(self.visible) - len(pinned))
+        for page_size in (1, 3, 5, len(expected)):
+            self.assertPagesCover(self.cursor_pages(page_size, ordering='hot'), expected, page_size)
+
+    def test_invalid_cursor(self):
+        for params in ({}, {'ordering': 'hot'}):
+            for cursor in ('not-a-cursor', 'e30', 'WzFd'):
+                response = self.client.get(self.url, {'cursor': cursor, **params})
+                self.assertEqual(response.status_code, 404, (params, cursor))
+                self.assertEqual(response.data['message'], '无效的游标')
+
+    def test_page_number(self):
+        response = self.client.get(self.url, {'page': 2, 'page_size': 5})
+        data = response.data['data']
+        self.assertEqual(set(data), {'total', 'page', 'page_size', 'results'})
+        self.assertEqual((data['total'], data['page']), (len(self.visible), 2))
+        self.assertEqual(len(data['results']), 5)
+        self.assertEqual(
+            [post['id'] for post in data['results']], self.page_number_ids()[5:10]
+        )
+
+
+# 详情接口计浏览量时不启动后台写回线程 / No background flush thread from the detail view in tests
+@mock.patch.object(view_count_buffer, 'background', False)
+@override_settings(REACTION_WRITE_BEHIND=True)
+class WriteBehindReactionTests(TestCase):
+    """写后合并模式 / Write-behind likes and favorites"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='第一中学', province='北京', city='北京')
+        cls.user = User.objects.create_user(username='liker', password='password')
+        cls.other = User.objects.create_user(username='other', password='password')
+        circle = Circle.objects.create(
+            circle_type='grade', school=school, grade_year=2000,
+            name='圈子', owner=cls.user, created_by=cls.user
+        )
+        CircleMember.objects.create(circle=circle, user=cls.user, role='admin', status='approved')
+        cls.post = Post.objects.create(circle=circle, author=cls.user, content='帖子')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.like_url = f'/api/v1/posts/{self.post.id}/like/'
+
+    def _like_count(self):
+        self.post.refresh_from_db()
+        return self.post.like_count
+
+    def _detail(self):
+        data = self.client.get(f'/api/v1/posts/{self.post.id}/').data['data']
+        return data['is_liked'], data['is_favorited']
+
+    def test_events_coalesced(self):
+        states = [self.client.post(self.like_url).data['data']['liked'] for _ in range(3)]
+        self.assertEqual(states, [True, False, True])
+        # 已是点赞状态，不再追加事件 / Already liked, so no event is queued
+        self.assertFalse(self.client.put(self.like_url).data['data']['changed'])
+        post_like.set(self.other, self.post.id)
+        post_like.unset(self.other, self.post.id)
+        self.assertEqual(ReactionEvent.objects.count(), 5)
+        self.assertEqual(self._like_count(), 0)
+
+        # 每个 (用户, 目标) 只写入最后一次操作 / Only the last event per (user, target) is applied
+        self.assertEqual(apply_reaction_events(), (5, 1, 0))
+        self.assertFalse(ReactionEvent.objects.exists())
+        self.assertEqual(list(Like.objects.values_list('user_id', 'post_id')), [(self.user.id, self.post.id)])
+        self.assertEqual(self._like_count(), 1)
+
+        self.client.delete(self.like_url)
+        self.assertEqual(apply_reaction_events(), (1, 0, 1))
+        self.assertEqual(self._like_count(), 0)
+
+    def test_keeps_events_committed_after_the_read(self):
+        post_like.set(self.user, self.post.id)
+        late = ReactionEvent.objects.create(user=self.other, kind='post_like', target_id=self.post.id, value=True)
+        post_favorite.set(self.user, self.post.id)
+        late_pk = late.pk
+        late_fields = {'user_id': late.user_id, 'kind': late.kind, 'target_id': late.target_id, 'value': True}
+        late.delete()
+        apply_events = Reaction.apply_events
+
+        def commit_late_event(reaction, events):
+            # id 较小的事件在读取之后才提交 / An event with a lower id commits after the read
+            if not ReactionEvent.objects.filter(pk=late_pk).exists():
+                ReactionEvent.objects.create(pk=late_pk, **late_fields)
+            return apply_events(reaction, events)
+
+        with mock.patch.object(Reaction, 'apply_events', commit_late_event):
+            self.assertEqual(apply_reaction_events(), (2, 2, 0))
+        self.assertEqual(list(ReactionEvent.objects.values_list('pk', flat=True)), [late_pk])
+        self.assertEqual(apply_reaction_events(), (1, 1, 0))
+        self.assertEqual(self._like_count(), 2)
+
+    def test_own_state_right_after_request(self):
+        self.client.post(self.like_url)
+        self.client.put(f'/api/v1/posts/{self.post.id}/favorite/')
+        # 事件尚未写入，本人立即看到自己的操作 / Not applied yet, but the user sees their own change
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(self._detail(), (True, True))
+
+        apply_reaction_events()
+        self.client.delete(self.like_url)
+        self.assertTrue(Like.objects.exists())
+        self.assertEqual(self._detail(), (False, True))
+
+    def test_counts_only_rows_actually_changed(self):
+        post_like.set(self.user, self.post.id)
+        insert_many = Reaction._insert_many
+
+        def insert_after_direct_like(reaction, keys):
+            # 对比现有行之后，直接点赞先插入了同一行 / A direct like lands after the diff
+            Like.objects.create(user=self.user, post=self.post)
+            return insert_many(reaction, keys)
+
+        with mock.patch.object(Reaction, '_insert_many', insert_after_direct_like):
+            self.assertEqual(apply_reaction_events(), (1, 0, 0))
+        self.assertEqual(self._like_count(), 0)
+
+        post_like.unset(self.user, self.post.id)
+        delete_matching = Reaction._delete_matching
+
+        def delete_after_direct_unlike(reaction, condition):
+            Like.objects.filter(user=self.user, post=self.post).delete()
+            return delete_matching(reaction, condition)
+
+        with mock.patch.object(Reaction, '_delete_matching', delete_after_direct_unlike):
+            self.assertEqual(apply_reaction_events(), (1, 0, 0))
+        self.assertEqual(self._like_count(), 0)
+
+
+@override_settings(CACHES=LOCAL_CACHES, TIMELINE_FANOUT_LIMIT=3, TIMELINE_MAX_ENTRIES=5)
+class TimelineTests(TestCase):
+    """首页时间线的写扩散与读扩散 / Fan-out on write and pull on read"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='第一中学', province='北京', city='北京')
+        cls.reader = User.objects.create_user(username='reader', password='password')
+        cls.author = User.objects.create_user(username='author', password='password')
+        cls.other = User.objects.create_user(username='other', password='password')
+        cls.small = Circle.objects.create(
+            circle_type='grade', school=school, grade_year=2000,
+            name='小圈子', owner=cls.author, created_by=cls.author, member_count=3,
+        )
+        # 成员数超过 TIMELINE_FANOUT_LIMIT，读取时拉取 / Over the fan-out limit, pulled on read
+        cls.large = Circle.objects.create(
+            circle_type='grade', school=school, grade_year=2001,
+            name='大圈子', owner=cls.author, created_by=cls.author, member_count=10,
+        )
+        CircleMember.objects.bulk_create([
+            CircleMember(circle=circle, user=user, status='approved')
+            for circle in (cls.small, cls.large) for user in (cls.reader, cls.author, cls.other)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def publish(self, circle, count):
+        """依次发帖，返回帖子 ID / Publish posts one by one and return their IDs"""
+        self.client.force_authenticate(self.author)
+        return [
+            self.client.post(
+                f'/api/v1/circles/{circle.id}/posts/', {'content': f'{circle.name} {i}'}, format='json'
+            ).data['data']['id']
+            for i in range(count)
+        ]
+
+    def feed(self, user, page_size=20):
+        """按游标读完首页，返回每页的帖子 ID / Read the whole feed by cursor, post IDs per page"""
+        self.client.force_authenticate(user)
+        pages, cursor = [], None
+        while True:
+            query = {'page_size': page_size, **({'cursor': cursor} if cursor else {})}
+            data = self.client.get('/api/v1/feed/', query).data['data']
+            pages.append([post['id'] for post in data['results']])
+            if not data['has_more']:
+                return pages
+            cursor = data['next_cursor']
+
+    def entries(self, user):
+        return list(TimelineEntry.objects.filter(user=user).order_by('post_id').values_list('post_id', flat=True))
+
+    def test_fan_out_on_write(self):
+        small_posts = self.publish(self.small, 2)
+        large_posts = self.publish(self.large, 2)
+        for user in (self.reader, self.author, self.other):
+            self.assertEqual(self.entries(user), small_posts)
+        self.assertFalse(TimelineEntry.objects.filter(post_id__in=large_posts).exists())
+
+    def test_read_merges_pulled_posts(self):
+        posts = []
+        for circle in (self.small, self.large, self.small, self.large):
+            posts += self.publish(circle, 2)
+        newest_first = sorted(posts, reverse=True)
+        self.assertEqual(self.feed(self.reader), [newest_first])
+        # 跨页时两路来源都从游标处续读，不重复不遗漏 / Both sources resume from the cursor across pages
+        pages = self.feed(self.reader, page_size=3)
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        self.assertEqual(sum(pages, []), newest_first)
+
+    def test_trim_timelines(self):
+        posts = self.publish(self.small, 7)
+        TimelineEntry.objects.filter(user=self.other).exclude(post_id__in=posts[:2]).delete()
+        self.assertEqual(trim_timelines(), 4)
+        self.assertEqual(self.entries(self.reader), posts[2:])
+        self.assertEqual(self.entries(self.author), posts[2:])
+        # 未超上限的时间线不动 / Timelines under the limit are untouched
+        self.assertEqual(self.entries(self.other), posts[:2])
+        self.assertEqual(trim_timelines(), 0)
+
+    def test_leave_removes_entries(self):
+        small_posts = self.publish(self.small, 2)
+        large_posts = self.publish(self.large, 1)
+        self.client.force_authenticate(self.reader)
+        self.assertEqual(self.client.post(f'/api/v1/circles/{self.small.id}/leave/').status_code, 200)
+
+        self.assertEqual(self.entries(self.reader), [])
+        self.assertEqual(self.entries(self.other), small_posts)
+        self.assertEqual(self.feed(self.reader), [large_posts])
+
+
+class ViewCountBufferTests(TestCase):
+    """浏览量缓冲写回 / Buffered view count flushes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='第一中学', province='北京', city='北京')
+        user = User.objects.create_user(username='author', password='password')
+        circle = Circle.objects.create(
+            circle_type='grade', school=school, grade_year=2000,
+            name='圈子', owner=user, created_by=user
+        )
+        cls.posts = Post.objects.bulk_create([
+            Post(circle=circle, author=user, content=f'帖子 {i}', like_count=i, comment_count=1)
+            for i in range(3)
+        ])
+
+    def _views(self):
+        return {
+            post.pk: post.view_count
+            for post in Post.objects.filter(pk__in=[post.pk for post in self.posts])
+        }
+
+    def test_flush_on_threshold(self):
+        buffer = ViewCountBuffer(interval=3600, threshold=3)
+        first, second = self.posts[:2]
+        self.assertEqual([buffer.add(first.pk), buffer.add(first.pk)], [1, 2])
+        self.assertEqual(self._views()[first.pk], 0)
+
+        # 第三次达到阈值，连同此前的增量一起写回 / The third hit reaches the threshold
+        buffer.add(second.pk)
+        self.assertEqual(self._views(), {first.pk: 2, second.pk: 1, self.posts[2].pk: 0})
+        self.assertEqual(buffer.pending(first.pk), 0)
+
+    def test_flush_on_interval(self):
+        buffer = ViewCountBuffer(interval=10, threshold=1000)
+        post = self.posts[0]
+        with mock.patch('apps.posts.services.time.monotonic', return_value=buffer._last_flush + 5):
+            buffer.add(post.pk)
+        self.assertEqual(self._views()[post.pk], 0)
+
+        with mock.patch('apps.posts.services.time.monotonic', return_value=buffer._last_flush + 10):
+            buffer.add(post.pk)
+        self.assertEqual(self._views()[post.pk], 2)
+        self.assertEqual(buffer.pending(post.pk), 0)
+
+    def test_flush_if_due(self):
+        buffer = ViewCountBuffer(interval=10, threshold=1000)
+        post = self.posts[0]
+        buffer.add(post.pk)
+        with mock.patch('apps.posts.services.time.monotonic', return_value=buffer._last_flush + 5):
+            self.assertEqual(buffer.flush_if_due(), 0)
+        with mock.patch('apps.posts.services.time.monotonic', return_value=buffer._last_flush + 10):
+            self.assertEqual(buffer.flush_if_due(), 1)
+            # 没有待写回的浏览量时什么都不做 / Nothing to do without pending views
+            self.assertEqual(buffer.flush_if_due(), 0)
+        self.assertEqual(self._views()[post.pk], 1)
+
+    def test_background_thread_flushes_idle_buffer(self):
+        buffer = ViewCountBuffer(interval=10, threshold=1000, background=True)
+        post = self.posts[0]
+        with mock.patch('apps.posts.services.threading.Thread') as thread:
+            buffer.add(post.pk)
+            buffer.add(post.pk)
+        # 首次 add() 启动一次 / Started once, by the first add()
+        thread.assert_called_once()
+        self.assertEqual(self._views()[post.pk], 0)
+
+        # 之后没有新浏览，线程在间隔到期后写回 / No further views; the thread flushes once the interval is up
+        start = buffer._last_flush
+        clock = mock.patch('apps.posts.services.time.monotonic', return_value=start + 10)
+        wait = mock.patch.object(buffer._stopped, 'wait', side_effect=[False, True])
+        with clock, wait as waited, mock.patch('apps.posts.services.connection') as connection:
+            thread.call_args.kwargs['target']()
+        self.assertEqual(self._views()[post.pk], 2)
+        self.assertEqual(waited.call_args_list, [mock.call(10), mock.call(10)])
+        connection.close.assert_called_once()
+
+    def test_background_wait_until_due(self):
+        buffer = ViewCountBuffer(interval=10, threshold=1000)
+        with mock.patch('apps.posts.services.time.monotonic', return_value=buffer._last_flush + 4):
+            self.assertEqual(buffer._next_wait(), 6)
+        with mock.patch('apps.posts.services.time.monotonic', return_value=buffer._last_flush + 25):
+            self.assertEqual(buffer._next_wait(), 10)
+
+    def test_flush_recomputes_hot_score(self):
+        buffer = ViewCountBuffer(interval=3600, threshold=1000)
+        for post, views in zip(self.posts, (1, 2, 2)):
+            for _ in range(views):
+                buffer.add(post.pk)
+        self.assertEqual(buffer.flush(), 3)
+        for post in Post.objects.filter(pk__in=[post.pk for post in self.posts]):
+            self.assertEqual(
+                post.hot_score, Post.compute_hot_score(post.view_count, post.like_count, post.comment_count)
+            )
+
+    def test_failed_flush_is_not_counted_twice(self):
+        buffer = ViewCountBuffer(interval=3600, threshold=1000)
+        buffer.add(self.posts[0].pk)
+        for _ in range(2):
+            buffer.add(self.posts[1].pk)
+
+        # 第二组写入失败时第一组也回滚 / The first group rolls back when the second fails
+        update = QuerySet.update
+        calls = []
+
+        def failing_update(queryset, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 2:
+                raise DatabaseError('连接断开')
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', failing_update), \
+                self.assertLogs('apps.posts.services', 'ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(self._views(), {post.pk: 0 for post in self.posts})
+        self.assertEqual((buffer.pending(self.posts[0].pk), buffer.pending(self.posts[1].pk)), (1, 2))
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(self._views(), {self.posts[0].pk: 1, self.posts[1].pk: 2, self.posts[2].pk: 0})
+
+
+class CommentReplyTests(TestCase):
+    """楼中楼回复预览 / Reply previews under top-level comments"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='第一中学', province='北京', city='北京')
+        cls.user = User.objects.create_user(username='replier', password='password')
+        circle = Circle.objects.create(
+            circle_type='grade', school=school, grade_year=2000,
+            name='圈子', owner=cls.user, created_by=cls.user
+        )
+        cls.post = Post.objects.create(circle=circle, author=cls.user, content='帖子')
+        cls.busy = Comment.objects.create(post=cls.post, author=cls.user, content='热闹的评论')
+        cls.quiet = Comment.objects.create(post=cls.post, author=cls.user, content='冷清的评论')
+        start = timezone.now()
+        cls.replies = []
+        for i in range(7):
+            reply = Comment.objects.create(
+                post=cls.post, author=cls.user, content=f'回复{i}', parent=cls.busy,
+                status='deleted' if i in (4, 6) else 'normal'
+            )
+            # 后建的回复时间更早，顺序只能来自 created_at / Later rows are older, so order must come from created_at
+            Comment.objects.filter(pk=reply.pk).update(created_at=start - timedelta(minutes=i))
+            cls.replies.append(reply)
+        cls.replies.reverse()
+        cls.visible = [reply.pk for reply in cls.replies if reply.status == 'normal']
+        Comment.objects.create(
+            post=cls.post, author=cls.user, content='已删除', parent=cls.quiet, status='deleted'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def previews(self, **kwargs):
+        comments = with_reply_preview(
+            Comment.objects.filter(post=self.post, parent__isnull=True).order_by('id'), **kwargs
+        )
+        with self.assertNumQueries(2):
+            return {
+                comment.pk: (comment.reply_count, [reply.pk for reply in comment.preview_replies])
+                for comment in comments
+            }
+
+    def test_preview_capped_and_skips_deleted(self):
+        self.assertEqual(len(self.visible), 5)
+        self.assertEqual(self.previews(), {
+            self.busy.pk: (5, self.visible[:REPLY_PREVIEW_SIZE]),
+            self.quiet.pk: (0, []),
+        })
+        self.assertEqual(self.previews(size=1)[self.busy.pk], (5, self.visible[:1]))
+        self.assertEqual(self.previews(size=10)[self.busy.pk], (5, self.visible))
+
+    def test_comment_list(self):
+        response = self.client.get(f'/api/v1/posts/{self.post.id}/comments/')
+        results = {comment['id']: comment for comment in response.data['data']['results']}
+        self.assertEqual(results[self.busy.pk]['reply_count'], 5)
+        self.assertEqual(
+            [reply['id'] for reply in results[self.busy.pk]['replies']], self.visible[:REPLY_PREVIEW_SIZE]
+        )
+        self.assertEqual((results[self.quiet.pk]['reply_count'], results[self.quiet.pk]['replies']), (0, []))
+        # 未预取时序列化器逐条查询，结果相同 / Without the prefetch the serializer queries per row, same output
+        self.assertEqual(CommentSerializer(Comment.objects.get(pk=self.busy.pk)).data, results[self.busy.pk])
+
+    def test_replies_by_cursor(self):
+        url = f'/api/v1/comments/{self.busy.id}/replies/'
+        pages, query = [], {'page_size': 2}
+        while True:
+            response = self.client.get(url, query)
+            self.assertEqual(response.status_code, 200)
+            data = response.data['data']
+            pages.append([reply['id'] for reply in data['results']])
+            if not data['has_more']:
+                break
+            query['cursor'] = data['next_cursor']
+        # 按时间正序、跳过已删除，末页没有下一页游标 / Oldest first without deleted rows; no cursor after the last page
+        self.assertEqual(pages, [self.visible[:2], self.visible[2:4], self.visible[4:]])
+        self.assertIsNone(data['next_cursor'])
+
+        # 恰好读完时下一页为空 / An exact fit still ends with has_more false
+        data = self.client.get(url, {'page_size': 5}).data['data']
+        self.assertEqual(([reply['id'] for reply in data['results']], data['has_more']), (self.visible, False))
+        data = self.client.get(f'/api/v1/comments/{self.quiet.id}/replies/').data['data']
+        self.assertEqual((data['results'], data['has_more'], data['next_cursor']), ([], False, None))
+
+        self.assertEqual(self.client.get(url, {'cursor': 'not-a-cursor'}).status_code, 404)
+        # 只有一级评论有回复列表 / Only top-level comments list replies
+        self.assertEqual(self.client.get(f'/api/v1/comments/{self.visible[0]}/replies/').status_code, 404)
+
+
+class CounterWriteTests(TestCase):
+    """编辑与删除不破坏增量维护的计数 / Edits and deletes keep delta-maintained counters"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='第一中学', province='北京', city='北京')
+        cls.user = User.objects.create_user(username='author', password='password')
+        circle = Circle.objects.create(
+            circle_type='grade', school=school, grade_year=2000,
+            name='圈子', owner=cls.user, created_by=cls.user
+        )
+        cls.post = Post.objects.create(circle=circle, author=cls.user, content='帖子', comment_count=1)
+        cls.comment = Comment.objects.create(post=cls.post, author=cls.user, content='评论')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _counts(self):
+        self.post.refresh_from_db()
+        return self.post.like_count, self.post.comment_count
+
+    def test_concurrent_comment_deletes_count_once(self):
+        url = f'/api/v1/comments/{self.comment.id}/'
+        # 第二个请求在第一个删除前已读到评论 / The second request read the comment before the first deleted it
+        stale = Comment.objects.select_related('post', 'post__circle').get(pk=self.comment.pk)
+        self.assertEqual(self.client.delete(url).status_code, 200)
+        with mock.patch.object(Comment.objects, 'select_related') as select_related:
+            select_related.return_value.get.return_value = stale
+            self.assertEqual(self.client.delete(url).status_code, 404)
+        self.assertEqual(self._counts(), (0, 0))
+
+    def test_edit_keeps_counters(self):
+        # 读取帖子之后有人点赞、评论 / Likes and comments land after the edit read the post
+        stale = Post.objects.get(pk=self.post.pk)
+        Post(pk=self.post.pk).increment_counts(like_delta=2, comment_delta=1)
+        with mock.patch.object(Post.objects, 'get', return_value=stale):
+            response = self.client.put(f'/api/v1/posts/{self.post.id}/', {'content': '改过的帖子'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._counts(), (2, 2))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.content, '改过的帖子')
+        self.assertEqual(self.post.hot_score, Post.compute_hot_score(0, 2, 2))
+
+
+class ReconcilePostCountsTests(TestCase):
+    """计数校正 / Counter reconciliation"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='第一中学', province='北京', city='北京')
+        cls.users = User.objects.bulk_create([User(username=f'user{i}', password='!') for i in range(3)])
+        circle = Circle.objects.create(
+            circle_type='grade', school=school, grade_year=2000,
+            name='圈子', owner=cls.users[0], created_by=cls.users[0]
+        )
+        cls.posts = Post.objects.bulk_create([
+            Post(circle=circle, author=cls.users[0], content=f'帖子 {i}', view_count=10)
+            for i in range(3)
+        ])
+        Like.objects.bulk_create([Like(user=user, post=cls.posts[0]) for user in cls.users])
+        Comment.objects.bulk_create([
+            Comment(post=cls.posts[0], author=cls.users[0], content='评论'),
+            Comment(post=cls.posts[0], author=cls.users[1], content='评论'),
+            Comment(post=cls.posts[0], author=cls.users[2], content='已删除', status='deleted'),
+        ])
+        # 第一篇计数偏差，第二篇热度偏差，第三篇正确
+        # The first post has drifted counters, the second a stale hot score, the third is correct
+        Post.objects.filter(pk=cls.posts[0].pk).update(like_count=5, comment_count=0, hot_score=0)
+        Post.objects.filter(pk=cls.posts[1].pk).update(hot_score=99)
+        Post.objects.filter(pk=cls.posts[2].pk).update(hot_score=10)
+
+    def _counters(self):
+        return list(Post.objects.order_by('pk').values_list('like_count', 'comment_count', 'hot_score'))
+
+    def test_repairs_drift(self):
+        before = self._counters()
+        self.assertEqual(reconcile_post_counts(batch_size=2, dry_run=True), (3, 2))
+        self.assertEqual(self._counters(), before)
+
+        self.assertEqual(reconcile_post_counts(batch_size=2), (3, 2))
+        self.assertEqual(self._counters(), [
+            (3, 2, Post.compute_hot_score(10, 3, 2)), (0, 0, 10), (0, 0, 10),
+        ])
+        self.assertEqual(reconcile_post_counts(), (3, 0))
+
+
+@mock.patch.object(view_count_buffer, 'background', False)
+class QueryBudgetTests(QueryBudgetTestCase):
+    """帖子、评论、点赞、收藏与动态流接口的查询预算 / Query budgets of post endpoints"""
+    view_modules = ('apps.posts',)
+    budgets = {
+        ('image-upload', 'POST'): (0, 200),
+        ('circle-posts', 'GET'): (5, 13_000),
+        ('circle-posts', 'POST'): (19, 600),
+        ('post-detail', 'GET'): (4, 700),
+        ('post-detail', 'PUT'): (7, 700),
+        ('post-detail', 'DELETE'): (3, 100),
+        ('post-pin', 'PUT'): (7, 700),
+        ('post-comments', 'GET'): (4, 14_000),
+        ('post-comments', 'POST'): (6, 400),
+        ('comment-detail', 'DELETE'): (3, 100),
+        ('comment-replies', 'GET'): (2, 6_000),
+        ('post-like', 'POST'): (3, 100),
+        ('post-like', 'PUT'): (2, 100),
+        ('post-like', 'DELETE'): (2, 100),
+        ('comment-like', 'POST'): (3, 100),
+        ('comment-like', 'PUT'): (2, 100),
+        ('comment-like', 'DELETE'): (2, 100),
+        ('post-favorite', 'POST'): (1, 100),
+        ('post-favorite', 'PUT'): (1, 100),
+        ('post-favorite', 'DELETE'): (2, 100),
+        ('my-favorites', 'GET'): (3, 13_000),
+        ('feed', 'GET'): (4, 13_000),
+    }
+
+    def test_lists(self):
+        circle_id = self.data.school_circle.pk
+        for ordering in ('created_at', 'hot', 'reply_at'):
+            self.assertWithinBudget(
+                'circle-posts', 'GET', kwargs={'circle_id': circle_id}, query={'ordering': ordering}
+            )
+        self.assertWithinBudget('feed', 'GET')
+        self.assertWithinBudget('my-favorites', 'GET')
+        self.assertWithinBudget('post-comments', 'GET', kwargs={'post_id': self.data.post.pk})
+        self.assertWithinBudget('comment-replies', 'GET', kwargs={'pk': self.data.comment.pk})
+
+    def test_post(self):
+        self.assertWithinBudget('image-upload', 'POST', data={'file': test_image()}, format='multipart')
+        self.assertWithinBudget('circle-posts', 'POST', kwargs={'circle_id': self.data.school_circle.pk}, data={
+            'content': '今天的晚霞', 'tags': ['生活'],
+        })
+        post = self.data.posts[0]
+        self.assertWithinBudget('post-detail', 'GET', kwargs={'pk': post.pk})
+        self.assertWithinBudget('post-detail', 'PUT', kwargs={'pk': post.pk}, data={'content': '修改后的内容'})
+        self.assertWithinBudget('post-pin', 'PUT', kwargs={'pk': self.data.posts[1].pk}, data={'is_pinned': True})
+        self.assertWithinBudget('post-detail', 'DELETE', kwargs={'pk': self.data.posts[10].pk})
+
+    def test_comments(self):
+        self.assertWithinBudget('post-comments', 'POST', kwargs={'post_id': self.data.post.pk}, data={
+            'content': '好久不见', 'parent_id': self.data.comment.pk,
+        })
+        self.assertWithinBudget(
+            'comment-detail', 'DELETE', kwargs={'pk': self.data.comment.pk},
+            client=self.client_for(self.data.users[0]),
+        )
+
+    def test_reactions(self):
+        post_id = self.data.posts[2].pk
+        comment_id = self.data.comment.pk
+        for name, pk in (('post-like', post_id), ('comment-like', comment_id), ('post-favorite', post_id)):
+            self.assertWithinBudget(name, 'POST', kwargs={'pk': pk})
+            self.assertWithinBudget(name, 'DELETE', kwargs={'pk': pk})
+            self.assertWithinBudget(name, 'PUT', kwargs={'pk': pk})
@@ -0,0 +1,220 @@
+"""
+首页时间线 / Home Timeline
+
+写扩散 + 读扩散混合模型 / Hybrid fan-out model:
+- 普通圈子：发帖时写入每个成员的时间线（写扩散）
+- 大圈子（成员数超过 TIMELINE_FANOUT_LIMIT）：不写扩散，读取时直接拉取
+- 每个用户的时间线只保留最近 TIMELINE_MAX_ENTRIES 条
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from apps.circles.memberships import get_memberships
+from apps.circles.models import Circle, CircleMember
+from .models import Post, TimelineEntry
+
+# 大圈子判定缓存时间（秒）/ Cache TTL of the large-circle flag (seconds)
+LARGE_CIRCLE_CACHE_TTL = 600
+# 批量写入大小 / Bulk insert batch size
+FANOUT_BATCH_SIZE = 1000
+
+
+def _max_entries():
+    return getattr(settings, 'TIMELINE_MAX_ENTRIES', 800)
+
+
+def _fanout_limit():
+    return getattr(settings, 'TIMELINE_FANOUT_LIMIT', 5000)
+
+
+def _large_circle_key(circle_id):
+    return f'timeline:large_circle:{circle_id}'
+
+
+def large_circle_ids(circle_ids):
+    """
+    筛选出大圈子 / Pick the circles that are pulled instead of fanned out
+    读取冗余的成员数，结果缓存 / Reads the denormalized member count, result cached
+    """
+    circle_ids = list(circle_ids)
+    keys = {_large_circle_key(circle_id): circle_id for circle_id in circle_ids}
+    cached = cache.get_many(keys.keys())
+
+    large = {keys[key] for key, is_large in cached.items() if is_large}
+    missing = [circle_id for key, circle_id in keys.items() if key not in cached]
+    if missing:
+        missing_large = set(Circle.objects.filter(
+            pk__in=missing, member_count__gt=_fanout_limit()
+        ).values_list('pk', flat=True))
+        cache.set_many({
+            _large_circle_key(circle_id): circle_id in missing_large for circle_id in missing
+        }, LARGE_CIRCLE_CACHE_TTL)
+        large |= missing_large
+    return large
+
+
+def fan_out_post(post):
+    """
+    发帖后写入圈子成员的时间线 / Push a new post to members' timelines
+    Returns:
+        写入的条数，大圈子返回 0 / Entries written, 0 for large circles
+    """
+    if large_circle_ids([post.circle_id]):
+        return 0
+
+    member_ids = CircleMember.objects.filter(
+        circle_id=post.circle_id, status='approved'
+    ).values_list('user_id', flat=True).iterator(chunk_size=FANOUT_BATCH_SIZE)
+
+    written = 0
+    batch = []
+    for user_id in member_ids:
+        batch.append(TimelineEntry(
+            user_id=user_id, post_id=post.pk,
+            circle_id=post.circle_id, created_at=post.created_at
+        ))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            written += len(batch)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        written += len(batch)
+    return written
+
+
+def rebuild_timeline(user):
+    """
+    重建用户时间线（入圈、补数据时调用）/ Rebuild a user's timeline (join / backfill)
+    从已加入的普通圈子取最近 TIMELINE_MAX_ENTRIES 条帖子
+    Returns:
+        写入的条数 / Entries written
+    """
+    joined = get_memberships(user)
+    small = set(joined) - large_circle_ids(joined)
+
+    posts = Post.objects.filter(
+        circle_id__in=small, status='normal'
+    ).order_by('-created_at', '-id').values_list('id', 'circle_id', 'created_at')[:_max_entries()]
+
+    TimelineEntry.objects.filter(user=user).delete()
+    TimelineEntry.objects.bulk_create([
+        TimelineEntry(user=user, post_id=post_id, circle_id=circle_id, created_at=created_at)
+        for post_id, circle_id, created_at in posts
+    ], batch_size=FANOUT_BATCH_SIZE, ignore_conflicts=True)
+    return len(posts)
+
+
+def backfill_timelines(user_ids, circle_ids):
+    """
+    为一批刚加入相同圈子的用户补齐时间线（批量入圈用）
+    Backfill timelines of many users who just joined the same circles (bulk join)
+    帖子只查询一次；只追加不删除，超出上限的由 trim_timelines 裁剪
+    Posts are read once; entries are appended, trim_timelines cuts any overflow.
+    Returns:
+        写入的条数 / Entries written
+    """
+    small = set(circle_ids) - large_circle_ids(circle_ids)
+    if not small or not user_ids:
+        return 0
+    posts = list(Post.objects.filter(
+        circle_id__in=small, status='normal'
+    ).order_by('-created_at', '-id').values_list('id', 'circle_id', 'created_at')[:_max_entries()])
+
+    written = 0
+    batch = []
+    for user_id in user_ids:
+        for post_id, circle_id, created_at in posts:
+            batch.append(TimelineEntry(
+                user_id=user_id, post_id=post_id, circle_id=circle_id, created_at=created_at
+            ))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, batch_size=FANOUT_BATCH_SIZE, ignore_conflicts=True)
+            written += len(batch)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, batch_size=FANOUT_BATCH_SIZE, ignore_conflicts=True)
+        written += len(batch)
+    return written
+
+
+def remove_post_from_timelines(post_ids):
+    """帖子删除后从所有时间线移除 / Drop deleted posts from every timeline"""
+    TimelineEntry.objects.filter(post_id__in=post_ids).delete()
+
+
+def remove_circle_from_timeline(user, circle_id):
+    """退圈后移除该圈子的帖子 / Drop a circle's posts after leaving"""
+    TimelineEntry.objects.filter(user=user, circle_id=circle_id).delete()
+
+
+def trim_timelines():
+    """
+    裁剪超过上限的时间线 / Trim timelines to the most recent entries
+    Returns:
+        删除的条数 / Entries deleted
+    """
+    keep = _max_entries()
+    deleted = 0
+    oversized = TimelineEntry.objects.values('user_id').annotate(
+        total=Count('pk')
+    ).filter(total__gt=keep).values_list('user_id', flat=True)
+
+    for user_id in oversized:
+        entries = TimelineEntry.objects.filter(user_id=user_id)
+        cutoff = entries.order_by('-created_at', '-post_id').values_list(
+            'created_at', 'post_id'
+        )[keep - 1:keep].first()
+        if cutoff is None:
+            continue
+        created_at, post_id = cutoff
+        count, _ = entries.filter(created_at__lte=created_at).exclude(
+            created_at=created_at, post_id__gte=post_id
+        ).delete()
+        deleted += count
+    return deleted
+
+
+def read_timeline(user, paginator, cursor_values, page_size):
+    """
+    读取首页时间线一页 / Read one page of the home timeline
+    合并时间线表（写扩散）与大圈子帖子（读扩散），按 (created_at, id) 倒序
+    Merges pushed entries with posts pulled from large circles.
+    Args:
+        paginator: KeysetPagination(('-created_at', '-id'))
+        cursor_values: 解码后的游标，第一页为 None / Decoded cursor, None for first page
+        page_size: 每页条数 / Page size
+    Returns:
+        当前页帖子 / Posts of the current page
+    """
+    # 不在 SQL 中按帖子状态过滤，保证只走时间线索引；帖子删除时会同步清理条目
+    # No status filter in SQL so the timeline index drives the query;
+    # entries are removed when a post is deleted
+    entries = TimelineEntry.objects.filter(user=user).select_related(
+        'post', 'post__author', 'post__author__profile', 'post__circle'
+    ).order_by('-created_at', '-post_id')
+    if cursor_values is not None:
+        entries = paginator.seek(entries, cursor_values, fields=['created_at', 'post_id'])
+    posts = [entry.post for entry in entries[:page_size + 1]]
+
+    pulled_circle_ids = large_circle_ids(get_memberships(user))
+    if pulled_circle_ids:
+        pulled = Post.objects.filter(
+            circle_id__in=pulled_circle_ids, status='normal'
+        ).select_related(
+            'author', 'author__profile', 'circle'
+        ).order_by('-created_at', '-id')
+        if cursor_values is not None:
+            pulled = paginator.seek(pulled, cursor_values)
+        seen = {post.pk for post in posts}
+        posts += [post for post in pulled[:page_size + 1] if post.pk not in seen]
+        posts.sort(key=lambda post: (post.created_at, post.pk), reverse=True)
+
+    page = paginator.paginate_rows(
+        posts[:page_size + 1], page_size,
+        key=lambda post: [post.created_at, post.pk]
+    )
+    # 兜底过滤尚未清理的已删除帖子 / Skip deleted posts not yet cleaned up
+    return [post for post in page if post.status == 'normal']
@@ -10,6 +10,7 @@ from .views import (
     PostPinView,
     PostCommentListView,
     CommentDetailView,
+    CommentReplyListView,
     PostLikeView,
     CommentLikeView,
     PostFavoriteView,
@@ -32,6 +33,7 @@ urlpatterns = [
 # 评论相关路由（在主路由中配置）
 comment_urlpatterns = [
     path('comments/<int:pk>/', CommentDetailView.as_view(), name='comment-detail'),
+    path('comments/<int:pk>/replies/', CommentReplyListView.as_view(), name='comment-replies'),
     path('comments/<int:pk>/like/', CommentLikeView.as_view(), name='comment-like'),
 ]
 
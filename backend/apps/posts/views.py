@@ -8,20 +8,31 @@ from datetime import datetime
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import F
+from django.db import transaction
+from django.db.models import Case, F, When
 from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser
 
-from common.pagination import StandardPagination, paginated_response
+from common.pagination import (
+    StandardPagination, KeysetPagination, SegmentedKeysetPagination, paginated_response,
+    cursor_paginated_response, wants_page_number
+)
 from common.response import success_response, error_response
-from apps.circles.models import Circle, CircleMember
+from apps.circles.memberships import get_memberships, is_member
+from apps.circles.models import Circle
 from apps.circles.services import is_circle_admin
-from .models import Post, Comment, Like, Favorite
+from .models import Post, Comment, Like, Favorite, PostHotRank
+from .services import (
+    view_count_buffer, add_to_hot_rank, with_reply_preview, ViewerPostState
+)
+from .reactions import post_like, comment_like, post_favorite
+from .timeline import fan_out_post, read_timeline, remove_post_from_timelines
 from .serializers import (
     PostSerializer, PostCreateSerializer, PostUpdateSerializer,
-    CommentSerializer, CommentCreateSerializer, PostPinSerializer
+    CommentSerializer, ReplySerializer, CommentCreateSerializer, PostPinSerializer,
+    serialize_posts
 )
 
 
@@ -96,18 +107,63 @@ class CirclePostListView(APIView):
 
         # 排序 / Ordering
         if ordering == 'hot':
-            posts = posts.order_by('-is_pinned', '-hot_score', '-created_at')
-        elif ordering == 'reply_at':
+            return self._paginate_hot(request, circle, posts)
+        if ordering == 'reply_at':
+            # last_reply_at 可为空，仍使用页码分页 / Nullable key, stays on page numbers
             posts = posts.order_by('-is_pinned', '-last_reply_at', '-created_at')
-        else:
-            posts = posts.order_by('-is_pinned', '-created_at')
-
-        # 分页 / Pagination
+            return self._paginate_by_page(request, posts)
+        return self._paginate(request, posts, ('-is_pinned', '-created_at', '-id'))
+
+    def _paginate_hot(self, request, circle, posts):
+        """
+        热门列表 / Hot list
+        置顶帖在前，其次是物化排行中的帖子（时间衰减），最后是未进入排行的
+        其余帖子（按热度分数），排行只决定前段顺序，不截断列表；
+        尚无排行的圈子前两段之外全部落在最后一段
+        Pinned posts first, then posts in the materialized ranking by decayed
+        score, then every other post by hot_score. The ranking orders the head
+        of the list without cutting it off, and a circle without rank rows
+        simply lands in the last segment.
+        """
+        if wants_page_number(request):
+            # 同样的顺序写成一条排序 / The same order as a single ORDER BY
+            posts = posts.annotate(
+                rank_score=Case(When(is_pinned=False, then=F('hot_rank__score')))
+            ).order_by('-is_pinned', F('rank_score').desc(nulls_last=True), '-hot_score', '-id')
+            return self._paginate_by_page(request, posts)
+
+        ranks = PostHotRank.objects.filter(
+            circle=circle, is_pinned=False, post__status='normal'
+        ).select_related('post', 'post__author', 'post__author__profile', 'post__circle')
+        paginator = SegmentedKeysetPagination([
+            # 各段排序带上固定的 is_pinned，与索引列一致 / is_pinned is constant per segment but keeps the index order
+            (posts.filter(is_pinned=True), ('-is_pinned', '-hot_score', '-id')),
+            (ranks, ('-is_pinned', '-score', '-post_id')),
+            (posts.filter(is_pinned=False, hot_rank__isnull=True), ('-is_pinned', '-hot_score', '-id')),
+        ])
+        page = [
+            row.post if isinstance(row, PostHotRank) else row
+            for _, row in paginator.paginate_segments(request)
+        ]
+        return cursor_paginated_response(paginator, serialize_posts(page, request))
+
+    def _paginate(self, request, queryset, ordering):
+        """
+        默认游标分页，带 page 参数时使用页码分页
+        Cursor pagination by default, page numbers when `page` is given
+        """
+        if wants_page_number(request):
+            return self._paginate_by_page(request, queryset.order_by(*ordering))
+
+        paginator = KeysetPagination(ordering)
+        page = paginator.paginate_queryset(queryset, request)
+        return cursor_paginated_response(paginator, serialize_posts(page, request))
+
+    def _paginate_by_page(self, request, queryset):
+        """页码分页 / Page-number pagination"""
         paginator = StandardPagination()
-        page = paginator.paginate_queryset(posts, request)
-        serializer = PostSerializer(page, many=True, context={'request': request})
-
-        return paginated_response(paginator, serializer.data)
+        page = paginator.paginate_queryset(queryset, request)
+        return paginated_response(paginator, serialize_posts(page, request))
 
     def post(self, request, circle_id):
         """发布帖子 / Create post"""
@@ -117,10 +173,7 @@ class CirclePostListView(APIView):
             return error_response('圈子不存在', 404)
 
         # 检查是否是圈子成员 / Check membership
-        is_member = CircleMember.objects.filter(
-            circle=circle, user=request.user, status='approved'
-        ).exists()
-        if not is_member:
+        if not is_member(request.user, circle.id):
             return error_response('您不是该圈子成员', 403)
 
         # 验证数据 / Validate data
@@ -136,6 +189,8 @@ class CirclePostListView(APIView):
             images=serializer.validated_data.get('images', []),
             tags=serializer.validated_data.get('tags', [])
         )
+        add_to_hot_rank(post)
+        fan_out_post(post)
 
         return success_response(
             PostSerializer(post, context={'request': request}).data,
@@ -167,10 +222,8 @@ class PostDetailView(APIView):
         if post.status == 'violation':
             return error_response('该帖子因违规已被删除', 404)
 
-        # 增加浏览量（使用 F() 避免竞态条件）/ Increment view count (use F() to avoid race condition)
-        Post.objects.filter(pk=pk).update(view_count=F('view_count') + 1)
-        post.refresh_from_db(fields=['view_count'])
-        post.update_hot_score()
+        # 浏览量先进入缓冲区，定期批量写回 / Buffer the view, flushed in bulk periodically
+        post.view_count += view_count_buffer.add(post.pk)
 
         return success_response(
             PostSerializer(post, context={'request': request}).data,
@@ -192,14 +245,16 @@ class PostDetailView(APIView):
         if not serializer.is_valid():
             return error_response('参数错误', 400, serializer.errors)
 
-        # 更新字段 / Update fields
-        if 'content' in serializer.validated_data:
-            post.content = serializer.validated_data['content']
-        if 'images' in serializer.validated_data:
-            post.images = serializer.validated_data['images']
-        if 'tags' in serializer.validated_data:
-            post.tags = serializer.validated_data['tags']
-        post.save()
+        # 只写回编辑的字段，计数列由增量更新维护，不能用读到的旧值覆盖
+        # Save only the edited fields; the counters are maintained by deltas
+        # and must not be overwritten with the values read above
+        edited = [
+            field for field in ('content', 'images', 'tags')
+            if field in serializer.validated_data
+        ]
+        for field in edited:
+            setattr(post, field, serializer.validated_data[field])
+        post.save(update_fields=edited + ['updated_at'])
 
         return success_response(
             PostSerializer(post, context={'request': request}).data,
@@ -219,6 +274,7 @@ class PostDetailView(APIView):
 
         post.status = 'deleted'
         post.save(update_fields=['status'])
+        remove_post_from_timelines([post.pk])
 
         return success_response(None, '删除成功')
 
@@ -253,6 +309,7 @@ class PostPinView(APIView):
         if 'is_featured' in data:
             post.is_featured = data['is_featured']
         post.save(update_fields=['is_pinned', 'is_featured'])
+        PostHotRank.objects.filter(post=post).update(is_pinned=post.is_pinned)
 
         return success_response(
             PostSerializer(post, context={'request': request}).data,
@@ -275,12 +332,10 @@ class PostCommentListView(APIView):
         except Post.DoesNotExist:
             return error_response('帖子不存在', 404)
 
-        # 只获取一级评论 / Only get top-level comments
-        comments = Comment.objects.filter(
+        # 只获取一级评论，附带回复数和前几条回复 / Top-level comments with reply preview
+        comments = with_reply_preview(Comment.objects.filter(
             post=post, parent__isnull=True, status='normal'
-        ).select_related('author', 'author__profile').prefetch_related(
-            'replies', 'replies__author', 'replies__author__profile', 'replies__reply_to'
-        )
+        ).select_related('author', 'author__profile'))
 
         paginator = StandardPagination()
         page = paginator.paginate_queryset(comments, request)
@@ -328,9 +383,7 @@ class PostCommentListView(APIView):
         )
 
         # 更新帖子计数和最后回复时间 / Update post counts
-        post.last_reply_at = timezone.now()
-        post.save(update_fields=['last_reply_at'])
-        post.update_counts()
+        post.increment_counts(comment_delta=1, last_reply_at=timezone.now())
 
         return success_response(
             CommentSerializer(comment).data,
@@ -358,92 +411,153 @@ class CommentDetailView(APIView):
         if not is_author and not is_circle_admin(comment.post.circle, request.user):
             return error_response('无权限删除', 403)
 
-        comment.status = 'deleted'
-        comment.save(update_fields=['status'])
-
-        # 更新帖子评论数 / Update post comment count
-        comment.post.update_counts()
+        # 条件更新，只有确实由本次请求删除时才减评论数，并发删除不会重复计数
+        # Conditional update; the comment count drops only when this request
+        # deleted the row, so concurrent deletes cannot double count
+        with transaction.atomic():
+            deleted = Comment.objects.filter(pk=comment.pk, status='normal').update(status='deleted')
+            if deleted:
+                comment.post.increment_counts(comment_delta=-1)
+        if not deleted:
+            return error_response('评论不存在', 404)
 
         return success_response(None, '删除成功')
 
 
+class CommentReplyListView(APIView):
+    """
+    评论回复列表（楼中楼加载更多）/ Comment Reply List (load more replies)
+    GET /api/v1/comments/{id}/replies/?cursor=
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        """获取一级评论的回复 / Get replies to a top-level comment"""
+        try:
+            comment = Comment.objects.get(
+                pk=pk, parent__isnull=True, status='normal', post__status='normal'
+            )
+        except Comment.DoesNotExist:
+            return error_response('评论不存在', 404)
+
+        replies = Comment.objects.filter(
+            parent=comment, status='normal'
+        ).select_related('author', 'author__profile', 'reply_to')
+
+        paginator = KeysetPagination(('created_at', 'id'))
+        page = paginator.paginate_queryset(replies, request)
+        serializer = ReplySerializer(page, many=True)
+
+        return cursor_paginated_response(paginator, serializer.data)
+
+
 class PostLikeView(APIView):
     """
     帖子点赞 / Post Like
-    POST /api/v1/posts/{id}/like/
+    POST /api/v1/posts/{id}/like/    切换 / Toggle
+    PUT /api/v1/posts/{id}/like/     点赞（幂等）/ Like (idempotent)
+    DELETE /api/v1/posts/{id}/like/  取消点赞（幂等）/ Unlike (idempotent)
     """
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
         """点赞/取消点赞 / Toggle like"""
         try:
-            post = Post.objects.get(pk=pk, status='normal')
+            liked, changed = post_like.toggle(request.user, pk)
         except Post.DoesNotExist:
             return error_response('帖子不存在', 404)
-
-        like, created = Like.objects.get_or_create(
-            user=request.user, post=post, comment=None
+        return success_response(
+            {'liked': liked, 'changed': changed}, '点赞成功' if liked else '取消点赞'
         )
 
-        if not created:
-            like.delete()
-            post.update_counts()
-            return success_response({'liked': False}, '取消点赞')
+    def put(self, request, pk):
+        """点赞 / Like"""
+        try:
+            changed = post_like.set(request.user, pk)
+        except Post.DoesNotExist:
+            return error_response('帖子不存在', 404)
+        return success_response({'liked': True, 'changed': changed}, '点赞成功')
 
-        post.update_counts()
-        return success_response({'liked': True}, '点赞成功')
+    def delete(self, request, pk):
+        """取消点赞 / Unlike"""
+        try:
+            changed = post_like.unset(request.user, pk)
+        except Post.DoesNotExist:
+            return error_response('帖子不存在', 404)
+        return success_response({'liked': False, 'changed': changed}, '取消点赞')
 
 
 class CommentLikeView(APIView):
     """
     评论点赞 / Comment Like
-    POST /api/v1/comments/{id}/like/
+    POST /api/v1/comments/{id}/like/    切换 / Toggle
+    PUT /api/v1/comments/{id}/like/     点赞（幂等）/ Like (idempotent)
+    DELETE /api/v1/comments/{id}/like/  取消点赞（幂等）/ Unlike (idempotent)
     """
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
         """点赞/取消点赞 / Toggle like"""
         try:
-            comment = Comment.objects.get(pk=pk, status='normal')
+            liked, changed = comment_like.toggle(request.user, pk)
         except Comment.DoesNotExist:
             return error_response('评论不存在', 404)
-
-        like, created = Like.objects.get_or_create(
-            user=request.user, post=None, comment=comment
+        return success_response(
+            {'liked': liked, 'changed': changed}, '点赞成功' if liked else '取消点赞'
         )
 
-        if not created:
-            like.delete()
-            comment.update_like_count()
-            return success_response({'liked': False}, '取消点赞')
+    def put(self, request, pk):
+        """点赞 / Like"""
+        try:
+            changed = comment_like.set(request.user, pk)
+        except Comment.DoesNotExist:
+            return error_response('评论不存在', 404)
+        return success_response({'liked': True, 'changed': changed}, '点赞成功')
 
-        comment.update_like_count()
-        return success_response({'liked': True}, '点赞成功')
+    def delete(self, request, pk):
+        """取消点赞 / Unlike"""
+        try:
+            changed = comment_like.unset(request.user, pk)
+        except Comment.DoesNotExist:
+            return error_response('评论不存在', 404)
+        return success_response({'liked': False, 'changed': changed}, '取消点赞')
 
 
 class PostFavoriteView(APIView):
     """
     帖子收藏 / Post Favorite
-    POST /api/v1/posts/{id}/favorite/
+    POST /api/v1/posts/{id}/favorite/    切换 / Toggle
+    PUT /api/v1/posts/{id}/favorite/     收藏（幂等）/ Favorite (idempotent)
+    DELETE /api/v1/posts/{id}/favorite/  取消收藏（幂等）/ Unfavorite (idempotent)
     """
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
         """收藏/取消收藏 / Toggle favorite"""
         try:
-            post = Post.objects.get(pk=pk, status='normal')
+            favorited, changed = post_favorite.toggle(request.user, pk)
         except Post.DoesNotExist:
             return error_response('帖子不存在', 404)
-
-        favorite, created = Favorite.objects.get_or_create(
-            user=request.user, post=post
+        return success_response(
+            {'favorited': favorited, 'changed': changed},
+            '收藏成功' if favorited else '取消收藏'
         )
 
-        if not created:
-            favorite.delete()
-            return success_response({'favorited': False}, '取消收藏')
+    def put(self, request, pk):
+        """收藏 / Favorite"""
+        try:
+            changed = post_favorite.set(request.user, pk)
+        except Post.DoesNotExist:
+            return error_response('帖子不存在', 404)
+        return success_response({'favorited': True, 'changed': changed}, '收藏成功')
 
-        return success_response({'favorited': True}, '收藏成功')
+    def delete(self, request, pk):
+        """取消收藏 / Unfavorite"""
+        try:
+            changed = post_favorite.unset(request.user, pk)
+        except Post.DoesNotExist:
+            return error_response('帖子不存在', 404)
+        return success_response({'favorited': False, 'changed': changed}, '取消收藏')
 
 
 class MyFavoriteListView(APIView):
@@ -464,11 +578,10 @@ class MyFavoriteListView(APIView):
         paginator = StandardPagination()
         page = paginator.paginate_queryset(favorites, request)
 
-        # 返回帖子列表 / Return post list
+        # 返回帖子列表，收藏状态已知 / Return post list, all favorited by definition
         posts = [f.post for f in page]
-        serializer = PostSerializer(posts, many=True, context={'request': request})
-
-        return paginated_response(paginator, serializer.data)
+        ViewerPostState.for_request(request).mark_favorited(post.id for post in posts)
+        return paginated_response(paginator, serialize_posts(posts, request))
 
 
 class FeedView(APIView):
@@ -480,20 +593,24 @@ class FeedView(APIView):
 
     def get(self, request):
         """获取用户已加入圈子的最新帖子 / Get posts from joined circles"""
-        # 获取用户加入的圈子 ID / Get user's joined circle IDs
-        joined_circle_ids = CircleMember.objects.filter(
-            user=request.user, status='approved'
-        ).values_list('circle_id', flat=True)
-
-        # 查询这些圈子的帖子 / Query posts from these circles
-        posts = Post.objects.filter(
-            circle_id__in=joined_circle_ids, status='normal'
-        ).select_related(
-            'author', 'author__profile', 'circle'
-        ).order_by('-created_at')
-
-        paginator = StandardPagination()
-        page = paginator.paginate_queryset(posts, request)
-        serializer = PostSerializer(page, many=True, context={'request': request})
-
-        return paginated_response(paginator, serializer.data)
+        if wants_page_number(request):
+            # 页码模式：直接查询已加入圈子的帖子 / Page-number mode queries circles directly
+            joined_circle_ids = list(get_memberships(request.user))
+            posts = Post.objects.filter(
+                circle_id__in=joined_circle_ids, status='normal'
+            ).select_related(
+                'author', 'author__profile', 'circle'
+            ).order_by('-created_at', '-id')
+
+            paginator = StandardPagination()
+            page = paginator.paginate_queryset(posts, request)
+            return paginated_response(paginator, serialize_posts(page, request))
+
+        # 无限滚动：读取用户时间线 / Infinite scroll reads the user's timeline
+        paginator = KeysetPagination(('-created_at', '-id'))
+        page = read_timeline(
+            request.user, paginator,
+            paginator.get_cursor_values(request, Post),
+            paginator.get_page_size(request)
+        )
+        return cursor_paginated_response(paginator, serialize_posts(page, request))
@@ -4,7 +4,7 @@
 
 from rest_framework import serializers
 from .models import Report
-from common.serializers import UserBriefSerializer
+from common.serializers import TimedSerializerMixin, UserBriefSerializer
 
 
 class ReportCreateSerializer(serializers.Serializer):
@@ -18,7 +18,7 @@ class ReportCreateSerializer(serializers.Serializer):
     reason = serializers.CharField(max_length=500)
 
 
-class ReportSerializer(serializers.ModelSerializer):
+class ReportSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     举报序列化器 / Report Serializer
     """
@@ -1,3 +1,45 @@
-from django.test import TestCase
+"""
+举报模块测试 / Report Tests
+"""
 
-# Create your tests here.
+from apps.users.models import User
+from common.testing import QueryBudgetTestCase
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    """举报接口的查询预算 / Query budgets of report endpoints"""
+    view_modules = ('apps.reports',)
+    budgets = {
+        ('report-list', 'GET'): (2, 5_500),
+        ('report-list', 'POST'): (3, 400),
+        ('report-process', 'POST'): (2, 400),
+    }
+
+    def setUp(self):
+        super().setUp()
+        # 视图按 profile.role 判断平台管理员，UserProfile 目前没有这个字段；
+        # 在请求用户的实例上设置，只为测量管理员路径的预算
+        # The views check profile.role, which UserProfile does not have yet;
+        # it is set on the requesting instance only to budget the admin path
+        self.data.viewer.profile.role = 'platform_admin'
+
+    def test_reports(self):
+        self.assertWithinBudget('report-list', 'POST', data={
+            'target_type': 'post', 'target_id': self.data.post.pk, 'reason': '广告',
+        })
+        response = self.assertWithinBudget('report-list', 'GET')
+        self.assertEqual(response.data['data']['total'], 21)
+        response = self.assertWithinBudget(
+            'report-process', 'POST', kwargs={'pk': self.data.reports[0].pk},
+            data={'action': 'process', 'note': '已删除'},
+        )
+        self.assertEqual(response.data['data']['status'], 'processed')
+        self.assertEqual(response.data['data']['handler']['id'], self.data.viewer.pk)
+
+    def test_requires_admin(self):
+        outsider = self.client_for(User.objects.create_user(username='outsider', password='password'))
+        self.assertWithinBudget('report-list', 'GET', client=outsider, status=403)
+        self.assertWithinBudget(
+            'report-process', 'POST', kwargs={'pk': self.data.reports[0].pk},
+            data={'action': 'process'}, client=outsider, status=403,
+        )
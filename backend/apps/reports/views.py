@@ -113,7 +113,7 @@ class ReportProcessView(APIView):
 
         # 获取举报 / Get report
         try:
-            report = Report.objects.get(pk=pk)
+            report = Report.objects.select_related('reporter__profile').get(pk=pk)
         except Report.DoesNotExist:
             return error_response('举报不存在', 404)
 
@@ -4,9 +4,10 @@
 
 from rest_framework import serializers
 from .models import School
+from common.serializers import TimedSerializerMixin
 
 
-class SchoolSerializer(serializers.ModelSerializer):
+class SchoolSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     学校序列化器 / School Serializer
     用于列表和详情展示
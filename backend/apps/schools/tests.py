@@ -1,3 +1,29 @@
-from django.test import TestCase
+"""
+学校模块测试 / School Tests
+"""
 
-# Create your tests here.
+from common.testing import QueryBudgetTestCase
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    """学校接口的查询预算 / Query budgets of school endpoints"""
+    view_modules = ('apps.schools',)
+    budgets = {
+        ('school-list-create', 'GET'): (2, 5_000),
+        ('school-list-create', 'POST'): (3, 400),
+        ('school-detail', 'GET'): (1, 300),
+        ('province-list', 'GET'): (0, 700),
+        ('city-list', 'GET'): (0, 100),
+    }
+
+    def test_schools(self):
+        self.assertWithinBudget('school-list-create', 'GET')
+        self.assertWithinBudget('school-list-create', 'GET', query={'province': '省份1'})
+        self.assertWithinBudget('school-list-create', 'POST', data={
+            'name': '新建中学', 'province': '省份1', 'city': '城市1',
+        })
+        self.assertWithinBudget('school-detail', 'GET', kwargs={'pk': self.data.school.pk})
+
+    def test_regions(self):
+        self.assertWithinBudget('province-list', 'GET')
+        self.assertWithinBudget('city-list', 'GET', query={'province': '北京市'})
@@ -7,6 +7,8 @@ from django.contrib.auth import get_user_model
 from .models import UserProfile
 from apps.schools.serializers import SchoolSerializer
 from apps.circles.services import auto_join_circles
+from common.sensitive import validate_sensitive_fields
+from common.serializers import TimedSerializerMixin
 
 User = get_user_model()
 
@@ -66,7 +68,7 @@ class LoginSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
 
 
-class UserInfoSerializer(serializers.ModelSerializer):
+class UserInfoSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     用户信息序列化器 / User Info Serializer
     """
@@ -76,7 +78,7 @@ class UserInfoSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'date_joined', 'last_login']
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     用户资料序列化器 / User Profile Serializer
     用于获取和展示用户资料
@@ -108,8 +110,10 @@ class UserProfileUpdateSerializer(serializers.ModelSerializer):
         ]
 
     def validate(self, attrs):
-        """验证必填字段，判断是否完善资料 / Validate required fields"""
-        return attrs
+        """验证必填字段，检查敏感词 / Validate required fields and sensitive words"""
+        return validate_sensitive_fields(attrs, {
+            'real_name': '真实姓名', 'bio': '个人简介', 'class_name': '班级'
+        })
 
     def update(self, instance, validated_data):
         """更新资料，检查是否完善 / Update profile and check completion"""
@@ -144,7 +148,7 @@ class UserSearchSerializer(serializers.Serializer):
     name = serializers.CharField(required=False, max_length=50)
 
 
-class UserSearchResultSerializer(serializers.ModelSerializer):
+class UserSearchResultSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     校友搜索结果序列化器 / User Search Result Serializer
     """
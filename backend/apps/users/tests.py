@@ -1,3 +1,80 @@
-from django.test import TestCase
+"""
+用户模块测试 / User Tests
+"""
 
-# Create your tests here.
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from common.sensitive import get_filter_version
+from common.testing import PASSWORD, QueryBudgetTestCase, test_image
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    """
+    用户、认证、好友与指标接口的查询预算 / Query budgets of user, auth, friend and metrics endpoints
+    好友模块没有自己的测试文件，在这里一并覆盖
+    The friends app has no test module of its own and is covered here.
+    """
+    view_modules = ('apps.users', 'apps.friends', 'common')
+    budgets = {
+        ('register', 'POST'): (2, 200),
+        ('login', 'POST'): (2, 900),
+        ('token_refresh', 'POST'): (1, 300),
+        ('user-profile', 'GET'): (3, 700),
+        ('user-profile', 'PUT'): (5, 700),
+        ('avatar-upload', 'POST'): (2, 200),
+        ('user-deactivate', 'POST'): (2, 100),
+        ('user-search', 'POST'): (2, 4_000),
+        ('user-detail', 'GET'): (4, 700),
+        ('friend-list', 'GET'): (1, 14_000),
+        ('friend-delete', 'DELETE'): (2, 100),
+        ('friend-request', 'POST'): (9, 400),
+        ('friend-requests', 'GET'): (1, 8_000),
+        ('friend-accept', 'POST'): (5, 100),
+        ('friend-reject', 'POST'): (2, 100),
+        ('blacklist-list', 'GET'): (1, 1_500),
+        ('blacklist-add', 'POST'): (7, 100),
+        ('blacklist-remove', 'DELETE'): (1, 100),
+        ('metrics', 'GET'): (0, 150),
+        ('metrics', 'DELETE'): (0, 100),
+    }
+
+    def test_auth(self):
+        self.client.force_authenticate(None)
+        self.assertWithinBudget('register', 'POST', data={
+            'username': 'newcomer', 'password': 'Passw0rd!', 'confirm_password': 'Passw0rd!',
+        })
+        self.assertWithinBudget('login', 'POST', data={'username': 'viewer', 'password': PASSWORD})
+        refresh = RefreshToken.for_user(self.data.viewer)
+        self.assertWithinBudget('token_refresh', 'POST', data={'refresh': str(refresh)})
+
+    def test_profile(self):
+        self.assertWithinBudget('user-profile', 'GET')
+        self.assertWithinBudget('user-profile', 'PUT', data={'bio': '你好'})
+        self.assertWithinBudget('avatar-upload', 'POST', data={'avatar': test_image()}, format='multipart')
+        self.assertWithinBudget('user-detail', 'GET', kwargs={'pk': self.data.users[0].pk})
+        self.assertWithinBudget('user-search', 'POST', data={
+            'school_id': self.data.school.pk, 'graduation_year': 2013,
+        })
+
+    def test_deactivate(self):
+        self.assertWithinBudget('user-deactivate', 'POST', client=self.client_for(self.data.users[-1]))
+
+    def test_friends(self):
+        self.assertWithinBudget('friend-list', 'GET')
+        self.assertWithinBudget('friend-requests', 'GET')
+        self.assertWithinBudget('blacklist-list', 'GET')
+        self.assertWithinBudget('friend-request', 'POST', data={
+            'receiver_id': self.data.users[500].pk, 'message': '你好',
+        })
+        self.assertWithinBudget('friend-accept', 'POST', kwargs={'request_id': self.data.friend_requests[0].pk})
+        self.assertWithinBudget('friend-reject', 'POST', kwargs={'request_id': self.data.friend_requests[1].pk})
+        self.assertWithinBudget('friend-delete', 'DELETE', kwargs={'friend_id': self.data.friends[-1].pk})
+        self.assertWithinBudget('blacklist-add', 'POST', data={'user_id': self.data.users[600].pk})
+        self.assertWithinBudget('blacklist-remove', 'DELETE', kwargs={'user_id': self.data.users[130].pk})
+
+    def test_metrics(self):
+        self.data.viewer.is_staff = True
+        self.data.viewer.save(update_fields=['is_staff'])
+        response = self.assertWithinBudget('metrics', 'GET')
+        self.assertEqual(response.data['data']['sensitive_words_version'], get_filter_version())
+        self.assertWithinBudget('metrics', 'DELETE')
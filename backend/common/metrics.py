@@ -0,0 +1,200 @@
+"""
+请求性能指标 / Request Metrics
+
+按请求统计 SQL 查询数、数据库耗时、序列化耗时和视图耗时（由 RequestMetricsMiddleware 采集），
+并在进程内按路由保留最近的样本，供 /api/v1/metrics/ 输出分位数
+Per-request SQL query count, DB time, serializer time and view time, collected
+by RequestMetricsMiddleware. Recent samples are kept per route in process and
+summarised as percentiles by /api/v1/metrics/.
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from common.response import success_response
+from common.sensitive import get_filter_version
+
+# 当前请求的指标，未启用或不在请求中时为 None / Metrics of the current request
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """单个请求的指标 / Metrics of one request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.timings = defaultdict(float)  # 秒 / seconds
+        self._depth = defaultdict(int)
+        self._started = {}
+
+    def record_query(self, elapsed):
+        self.queries += 1
+        self.timings['db'] += elapsed
+
+
+def current_metrics():
+    """当前请求的指标 / Metrics of the current request, or None"""
+    return _current.get()
+
+
+def activate(metrics):
+    """开始采集，返回用于 deactivate 的令牌 / Start collecting, returns a reset token"""
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+class section:
+    """
+    统计代码段耗时，可作上下文管理器或装饰器 / Time a code section (context manager or decorator)
+    同名段嵌套时只统计最外层，未采集时几乎无开销
+    Nested sections of the same name are only counted once; a no-op when
+    metrics are not being collected.
+
+    用法 / Usage:
+        with section('serializer'):
+            ...
+
+        @section('serializer')
+        def serialize_posts(posts): ...
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics._depth[self.name] += 1
+            if metrics._depth[self.name] == 1:
+                metrics._started[self.name] = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics._depth[self.name] -= 1
+            if metrics._depth[self.name] == 0:
+                metrics.timings[self.name] += time.perf_counter() - metrics._started[self.name]
+        return False
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self:
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def percentile(sorted_values, pct):
+    """最近秩法分位数 / Nearest-rank percentile of pre-sorted values"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class MetricsRegistry:
+    """
+    按路由保留最近的请求样本 / Recent request samples per route
+    每个路由最多保留 sample_size 条，超出后丢弃最旧的
+    Keeps at most sample_size samples per route, dropping the oldest.
+    """
+
+    FIELDS = ('total', 'view', 'db', 'serializer')
+
+    def __init__(self, sample_size=None):
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._counts = defaultdict(int)
+
+    def _size(self):
+        return self.sample_size or getattr(settings, 'REQUEST_METRICS_SAMPLE_SIZE', 1000)
+
+    def record(self, route, status, queries, timings):
+        """
+        记录一次请求 / Record one request
+        Args:
+            route: 路由标识，如 'GET api/v1/posts/<int:pk>/'
+            timings: {名称: 毫秒} / {name: milliseconds}
+        """
+        sample = (queries, status, tuple(timings.get(field, 0.0) for field in self.FIELDS))
+        with self._lock:
+            samples = self._routes.get(route)
+            if samples is None:
+                samples = self._routes[route] = deque(maxlen=self._size())
+            samples.append(sample)
+            self._counts[route] += 1
+
+    def snapshot(self):
+        """各路由的分位数汇总 / Per-route percentile summary"""
+        with self._lock:
+            routes = {route: list(samples) for route, samples in self._routes.items()}
+            counts = dict(self._counts)
+
+        summary = []
+        for route, samples in sorted(routes.items()):
+            queries = sorted(sample[0] for sample in samples)
+            entry = {
+                'route': route,
+                'count': counts[route],
+                'sampled': len(samples),
+                'errors': sum(1 for sample in samples if sample[1] >= 500),
+                'queries': {
+                    'p50': percentile(queries, 50),
+                    'p95': percentile(queries, 95),
+                    'max': queries[-1],
+                },
+            }
+            for i, field in enumerate(self.FIELDS):
+                values = sorted(sample[2][i] for sample in samples)
+                entry[f'{field}_ms'] = {
+                    'p50': round(percentile(values, 50), 2),
+                    'p95': round(percentile(values, 95), 2),
+                    'p99': round(percentile(values, 99), 2),
+                    'max': round(values[-1], 2),
+                }
+            summary.append(entry)
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._counts.clear()
+
+
+registry = MetricsRegistry()
+
+
+class MetricsView(APIView):
+    """
+    请求指标汇总 / Request Metrics Summary
+    GET /api/v1/metrics/    各路由分位数与生效的敏感词库版本（当前进程）
+                            Per-route percentiles and the active sensitive word version (this process)
+    DELETE /api/v1/metrics/ 清空样本 / Reset samples
+    仅限后台管理员（is_staff）/ Staff only
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return success_response({
+            'enabled': getattr(settings, 'REQUEST_METRICS_ENABLED', False),
+            'routes': registry.snapshot(),
+            # 各 worker 独立热加载词库，据此确认是否都已更新
+            # Workers reload the dictionary independently; this shows whether one has caught up
+            'sensitive_words_version': get_filter_version(),
+        })
+
+    def delete(self, request):
+        registry.reset()
+        return success_response(None, '已清空')
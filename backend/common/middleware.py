@@ -0,0 +1,115 @@
+"""
+公共中间件 / Common Middleware
+"""
+
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from common import metrics
+
+logger = logging.getLogger('common.metrics')
+
+
+class QueryCounter:
+    """
+    在所有数据库连接上统计查询数与耗时 / Count queries and DB time on every connection
+    """
+
+    def __init__(self, request_metrics):
+        self.request_metrics = request_metrics
+        self.connections = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.request_metrics.record_query(time.perf_counter() - start)
+
+    def __enter__(self):
+        for connection in connections.all():
+            connection.execute_wrappers.append(self)
+            self.connections.append(connection)
+        return self
+
+    def __exit__(self, *exc):
+        for connection in self.connections:
+            connection.execute_wrappers.remove(self)
+        return False
+
+
+class RequestMetricsMiddleware:
+    """
+    请求指标中间件 / Request metrics middleware
+    记录每个请求的 SQL 查询数、数据库耗时、序列化耗时、视图耗时，
+    写入 Server-Timing 响应头和一行 JSON 日志，并汇总到 metrics.registry
+    Records query count, DB time, serializer time and view time per request,
+    emits them as a Server-Timing header and a JSON log line, and feeds
+    metrics.registry for the /api/v1/metrics/ endpoint.
+
+    通过 REQUEST_METRICS_ENABLED 开启，应放在 MIDDLEWARE 的最前面
+    Enabled by REQUEST_METRICS_ENABLED; place it first in MIDDLEWARE.
+
+    序列化耗时来自 TimedSerializerMixin 与 metrics.section('serializer')
+    Serializer time comes from TimedSerializerMixin and metrics.section('serializer').
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.activate(request_metrics)
+        start = time.perf_counter()
+        try:
+            with QueryCounter(request_metrics):
+                response = self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        end = time.perf_counter()
+
+        request_metrics.timings['total'] = end - start
+        view_start = getattr(request, '_metrics_view_start', None)
+        if view_start is not None:
+            # 视图耗时包含序列化与渲染 / View time includes serialization and rendering
+            request_metrics.timings['view'] = end - view_start
+
+        self._report(request, response, request_metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view_start = time.perf_counter()
+
+    def _report(self, request, response, request_metrics):
+        match = getattr(request, 'resolver_match', None)
+        route = f"{request.method} {match.route if match else '<unmatched>'}"
+        timings_ms = {
+            name: round(seconds * 1000, 2)
+            for name, seconds in request_metrics.timings.items()
+        }
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timings_ms.get("db", 0)};desc="{request_metrics.queries} queries"',
+            f'serializer;dur={timings_ms.get("serializer", 0)}',
+            f'view;dur={timings_ms.get("view", 0)}',
+            f'total;dur={timings_ms["total"]}',
+        ])
+        metrics.registry.record(route, response.status_code, request_metrics.queries, timings_ms)
+        logger.info(json.dumps({
+            'event': 'request',
+            'route': route,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': request_metrics.queries,
+            'db_ms': timings_ms.get('db', 0),
+            'serializer_ms': timings_ms.get('serializer', 0),
+            'view_ms': timings_ms.get('view', 0),
+            'total_ms': timings_ms['total'],
+        }, ensure_ascii=False))
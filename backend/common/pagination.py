@@ -1,3 +1,10 @@
+import base64
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 
 from common.response import success_response
@@ -9,6 +16,196 @@ class StandardPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    游标编码器，保留完整微秒精度 / Cursor encoder keeping full microsecond precision
+    DjangoJSONEncoder 会把时间截断到毫秒，导致翻页边界重复返回同一行
+    DjangoJSONEncoder truncates datetimes to milliseconds, which repeats the
+    boundary row on the next page.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _load_cursor(token):
+    """游标字符串还原为 JSON 值 / Cursor token back to its JSON value"""
+    padded = token + '=' * (-len(token) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+class KeysetPagination:
+    """
+    游标分页（键集分页）/ Keyset (cursor) pagination
+    按排序键定位下一页，不做 COUNT、不用 OFFSET，翻页过程中插入新数据也不会错位
+    Seeks past the last row's sort key instead of COUNT + OFFSET, so deep pages
+    stay cheap and new rows do not shift pages while scrolling.
+
+    ordering 必须以唯一字段结尾（如 id）/ ordering must end with a unique field (e.g. id)
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+
+    def __init__(self, ordering):
+        self.ordering = tuple(ordering)
+        self.next_cursor = None
+        self.has_more = False
+        self.page_size_used = self.page_size
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, values):
+        """编码游标（不透明字符串）/ Encode opaque cursor token"""
+        raw = json.dumps(values, cls=CursorJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token, model):
+        """解码游标并还原字段类型 / Decode cursor token into typed values"""
+        try:
+            return self.to_python(_load_cursor(token), model)
+        except Exception:
+            raise NotFound('无效的游标')
+
+    def to_python(self, values, model):
+        """按排序字段还原游标值类型 / Convert raw cursor values to field types"""
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValueError
+        return [
+            model._meta.get_field(field.lstrip('-')).to_python(value)
+            for field, value in zip(self.ordering, values)
+        ]
+
+    def row_key(self, row):
+        """行的排序键，用于生成游标 / A row's sort key, used for the next cursor"""
+        return [
+            getattr(row, row._meta.get_field(field.lstrip('-')).attname)
+            for field in self.ordering
+        ]
+
+    def get_cursor_values(self, request, model):
+        """读取并解码请求中的游标，没有则返回 None / Decoded cursor or None"""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        return self.decode_cursor(token, model)
+
+    def seek(self, queryset, values, fields=None):
+        """
+        过滤出位于游标之后的行 / Keep only rows after the cursor
+        (a, b, c) 之后 = a 越过 | (a 相等 & b 越过) | (a、b 相等 & c 越过)
+        Args:
+            fields: 其他表上对应的字段名，默认与 ordering 相同
+                    Field names on another model, defaults to ordering's
+        """
+        fields = fields or [field.lstrip('-') for field in self.ordering]
+        condition = Q()
+        equal = Q()
+        for field, name, value in zip(self.ordering, fields, values):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return queryset.filter(condition)
+
+    def paginate_queryset(self, queryset, request):
+        """
+        返回当前页数据 / Return the current page
+        多取一条用于判断是否还有下一页 / Fetch one extra row to detect next page
+        """
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        values = self.get_cursor_values(request, queryset.model)
+        if values is not None:
+            queryset = self.seek(queryset, values)
+
+        return self.paginate_rows(list(queryset[:page_size + 1]), page_size, key=self.row_key)
+
+    def paginate_rows(self, rows, page_size, key):
+        """
+        对已排序、多取一条的结果分页 / Paginate pre-sorted rows fetched with one extra
+        Args:
+            key: 返回行排序键的函数，用于生成下一页游标 / Returns a row's sort key
+        """
+        self.has_more = len(rows) > page_size
+        self.page_size_used = page_size
+        page = rows[:page_size]
+        if self.has_more:
+            self.next_cursor = self.encode_cursor(key(page[-1]))
+        return page
+
+
+class SegmentedKeysetPagination(KeysetPagination):
+    """
+    多段键集分页 / Keyset pagination over consecutive segments
+    按顺序读完一段再读下一段，每段有自己的查询和排序；游标记录段号和段内排序键
+    Reads each segment to its end before moving on. Every segment has its own
+    queryset and ordering, and the cursor holds the segment index followed by
+    the sort key within that segment.
+    Args:
+        segments: [(queryset, ordering)]，ordering 须以唯一字段结尾
+                  ordering must end with a unique field
+    """
+
+    def __init__(self, segments):
+        super().__init__(())
+        self.segments = [(queryset, KeysetPagination(ordering)) for queryset, ordering in segments]
+
+    def decode_cursor(self, token, model=None):
+        """解码为 [段号, 段内排序键...] / Decode into [segment index, sort key...]"""
+        try:
+            index, *values = _load_cursor(token)
+            if type(index) is not int or not 0 <= index < len(self.segments):
+                raise ValueError
+            queryset, keyset = self.segments[index]
+            return [index, *keyset.to_python(values, queryset.model)]
+        except Exception:
+            raise NotFound('无效的游标')
+
+    def paginate_segments(self, request):
+        """
+        返回当前页 / Return the current page
+        Returns:
+            list: [(段号, 行)] / [(segment index, row)]
+        """
+        page_size = self.get_page_size(request)
+        start, values = 0, None
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            start, *values = self.decode_cursor(token)
+
+        rows = []
+        for index in range(start, len(self.segments)):
+            queryset, keyset = self.segments[index]
+            queryset = queryset.order_by(*keyset.ordering)
+            if index == start and values is not None:
+                queryset = keyset.seek(queryset, values)
+            rows += [(index, row) for row in queryset[:page_size + 1 - len(rows)]]
+            if len(rows) > page_size:
+                break
+
+        return self.paginate_rows(
+            rows, page_size,
+            key=lambda item: [item[0], *self.segments[item[0]][1].row_key(item[1])]
+        )
+
+
+def wants_page_number(request):
+    """
+    请求是否显式使用页码分页（管理后台等需要总数的场景）
+    Whether the client explicitly asked for page-number mode (e.g. admin screens)
+    """
+    return StandardPagination.page_query_param in request.query_params
+
+
 def paginated_response(paginator, data, message='获取成功'):
     """
     分页响应 / Paginated response
@@ -19,3 +216,15 @@ def paginated_response(paginator, data, message='获取成功'):
         'page_size': paginator.page_size,
         'results': data
     }, message)
+
+
+def cursor_paginated_response(paginator, data, message='获取成功'):
+    """
+    游标分页响应（不返回总数）/ Cursor paginated response (no total count)
+    """
+    return success_response({
+        'next_cursor': paginator.next_cursor,
+        'has_more': paginator.has_more,
+        'page_size': paginator.page_size_used,
+        'results': data
+    }, message)
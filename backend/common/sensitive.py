@@ -2,31 +2,212 @@
 敏感词过滤模块 / Sensitive Word Filter
 """
 
-import os
+import logging
+import threading
+import time
+import unicodedata
+from bisect import bisect_right
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
+# 默认词库文件 / Default dictionary file
+DEFAULT_WORDS_FILE = Path(__file__).parent / 'sensitive_words.txt'
+# 繁简异体字对照表 / Traditional-to-simplified variant table
+VARIANTS_FILE = Path(__file__).parent / 'sensitive_variants.txt'
+# 批量扫描时的文本分隔符，词库中不会出现 / Separator for batch scans, never in dictionary
+BATCH_SEPARATOR = '\x00'
+# 默认词库变更检查间隔（秒）/ Default reload check interval (seconds)
+DEFAULT_RELOAD_INTERVAL = 30
+# 归一化后的占位符：标点、空白、符号等干扰字符，匹配时跳过
+# Placeholder for separator characters (punctuation, spaces, symbols), skipped while matching
+SKIP_CHAR = '\x01'
+# 视为干扰字符的 Unicode 类别 / Unicode categories treated as separators
+SKIP_CATEGORIES = ('P', 'Z', 'S', 'Cc', 'Cf')
+
+
+class AhoCorasickAutomaton:
+    """
+    AC 自动机 / Aho-Corasick Automaton
+    多模式串匹配，一次扫描文本即可找出所有敏感词，复杂度与词库大小无关
+    """
+
+    def __init__(self, patterns):
+        # goto 表：每个状态一个 {字符: 下一状态} 字典 / Goto table
+        self._goto = [{}]
+        # 失配指针 / Failure links
+        self._fail = [0]
+        # 输出表：在该状态结束的模式串下标 / Output (pattern indexes)
+        self._output = [()]
+        self.patterns = []
+
+        for pattern in patterns:
+            if pattern:
+                self._insert(pattern)
+        self._build_failure_links()
+
+    def _insert(self, pattern):
+        """插入模式串 / Insert pattern into trie"""
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] += (len(self.patterns),)
+        self.patterns.append(pattern)
+
+    def _build_failure_links(self):
+        """BFS 构建失配指针并合并输出 / Build failure links (BFS)"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def iter_matches(self, text, skip=None):
+        """
+        扫描文本，逐个产出匹配 / Scan text and yield matches
+        Args:
+            text: 待扫描文本 / Text to scan
+            skip: 跳过的占位字符，匹配可以跨越它 / Character ignored by matching
+        产出: (起始下标, 结束下标(不含), 模式串下标)，下标均相对 text
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        patterns = self.patterns
+        # 未跳过字符在 text 中的下标，用于还原起始位置 / Offsets of kept chars
+        positions = []
+        state = 0
+        for index, char in enumerate(text):
+            if char == skip:
+                continue
+            positions.append(index)
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_index in output[state]:
+                yield positions[-len(patterns[pattern_index])], index + 1, pattern_index
+
+    def __len__(self):
+        return len(self.patterns)
+
+
+def _read_variants(file_path):
+    """读取异体字对照表 / Read variant table"""
+    variants = {}
+    if file_path.exists():
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and not line.startswith('#'):
+                    variants[parts[0]] = parts[1]
+    return variants
+
+
+@lru_cache(maxsize=1)
+def normalization_table():
+    """
+    构建字符归一化表（进程内只构建一次）/ Build the char normalization table once
+    - 全角/兼容字符 -> 半角（NFKC）/ Full-width and compatibility forms -> NFKC
+    - 大写 -> 小写 / Uppercase -> lowercase
+    - 繁体/异体 -> 简体 / Traditional variants -> simplified
+    - 标点、空白、符号 -> SKIP_CHAR / Separators -> SKIP_CHAR
+    每个字符只映射为单个字符，归一化后文本长度不变，下标可直接对应原文
+    Every char maps to exactly one char, so offsets stay aligned with the original
+    """
+    variants = _read_variants(VARIANTS_FILE)
+    table = {}
+    # 仅覆盖基本多文种平面 / Basic Multilingual Plane only
+    for code in range(0x10000):
+        char = chr(code)
+        if char == BATCH_SEPARATOR:
+            continue
+        if unicodedata.category(char).startswith(SKIP_CATEGORIES):
+            table[code] = SKIP_CHAR
+            continue
+        folded = unicodedata.normalize('NFKC', char)
+        if len(folded) != 1:
+            folded = char
+        lowered = folded.lower()
+        if len(lowered) == 1:
+            folded = lowered
+        folded = variants.get(folded, folded)
+        if unicodedata.category(folded).startswith(SKIP_CATEGORIES):
+            folded = SKIP_CHAR
+        if folded != char:
+            table[code] = folded
+    return table
+
+
+def normalize_text(text):
+    """
+    归一化文本（长度不变，干扰字符替换为 SKIP_CHAR）/ Normalize text, keeping its length
+    """
+    return text.translate(normalization_table())
+
+
+def normalize_word(word):
+    """归一化敏感词并去掉干扰字符 / Normalize a dictionary word, dropping separators"""
+    return normalize_text(word).replace(SKIP_CHAR, '')
+
 
 class SensitiveWordFilter:
     """
     敏感词过滤器 / Sensitive Word Filter
-    使用简单的关键词匹配实现
+    词库在加载时编译为 AC 自动机，匹配时只需扫描一遍文本
+    构建完成后不再修改，热更新时整体替换 / Immutable once built, swapped as a whole on reload
     """
 
-    def __init__(self):
+    def __init__(self, words=None, version=0):
         self.words = set()
-        self._load_words()
+        if words is None:
+            version = _source_version(DEFAULT_WORDS_FILE)
+            words = _read_words(DEFAULT_WORDS_FILE)
+        self.words.update(
+            word.strip().replace(BATCH_SEPARATOR, '')
+            for word in words if word and word.strip()
+        )
+        self.words.discard('')
+        # 词库版本（词库文件 mtime_ns）/ Dictionary version (source mtime_ns)
+        self.version = version
+        self._compile()
 
-    def _load_words(self):
-        """加载敏感词库 / Load sensitive words"""
-        # 敏感词文件路径 / Sensitive words file path
-        file_path = Path(__file__).parent / 'sensitive_words.txt'
+    def _compile(self):
+        """
+        编译自动机 / Compile automaton
+        词库按归一化规则预处理，匹配时文本只需一次归一化和一次扫描
+        """
+        # 归一化后相同的词只保留一个原词用于提示 / One display word per normalized key
+        display = {}
+        for word in sorted(self.words):
+            key = normalize_word(word)
+            if key:
+                display.setdefault(key, word)
+        self._display_words = list(display.values())
+        self._automaton = AhoCorasickAutomaton(display.keys())
 
-        if file_path.exists():
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    word = line.strip()
-                    if word:
-                        self.words.add(word)
+    def _iter_matches(self, text):
+        """
+        产出 (起始, 结束, 原词)，下标对应原文 / Yield (start, end, word) in original offsets
+        匹配可跨越标点、空白等干扰字符 / Matches may span separator characters
+        """
+        display_words = self._display_words
+        matches = self._automaton.iter_matches(normalize_text(text), skip=SKIP_CHAR)
+        for start, end, index in matches:
+            yield start, end, display_words[index]
 
     def contains_sensitive_word(self, text):
         """
@@ -37,13 +218,42 @@ class SensitiveWordFilter:
             return False, []
 
         found = []
-        text_lower = text.lower()
-        for word in self.words:
-            if word.lower() in text_lower:
+        seen = set()
+        for _, _, word in self._iter_matches(text):
+            if word not in seen:
+                seen.add(word)
                 found.append(word)
 
         return len(found) > 0, found
 
+    def find_sensitive_words_batch(self, texts):
+        """
+        批量检查多段文本，只扫描一遍 / Check many texts in a single scan
+        各段文本用分隔符拼接后交给自动机，再按偏移归属到各段
+        Args:
+            texts: 文本列表 / List of texts
+        Returns:
+            与 texts 一一对应的敏感词列表 / Found words per text, aligned with texts
+        """
+        results = [[] for _ in texts]
+        starts = []
+        parts = []
+        offset = 0
+        for text in texts:
+            text = text or ''
+            starts.append(offset)
+            parts.append(text)
+            offset += len(text) + len(BATCH_SEPARATOR)
+
+        seen = set()
+        for start, _, word in self._iter_matches(BATCH_SEPARATOR.join(parts)):
+            index = bisect_right(starts, start) - 1
+            if (index, word) not in seen:
+                seen.add((index, word))
+                results[index].append(word)
+
+        return results
+
     def filter_text(self, text, replacement='*'):
         """
         过滤敏感词（替换为*）/ Filter sensitive words
@@ -51,24 +261,111 @@ class SensitiveWordFilter:
         if not text:
             return text
 
-        result = text
-        for word in self.words:
-            if word.lower() in result.lower():
-                result = result.replace(word, replacement * len(word))
+        masked = None
+        for start, end, _ in self._iter_matches(text):
+            if masked is None:
+                masked = list(text)
+            masked[start:end] = replacement * (end - start)
+
+        return text if masked is None else ''.join(masked)
+
 
-        return result
+def _get_setting(name, default):
+    """读取 Django 配置，未配置时使用默认值 / Read Django setting with fallback"""
+    from django.conf import settings
+    from django.core.exceptions import ImproperlyConfigured
+    try:
+        return getattr(settings, name, default)
+    except ImproperlyConfigured:
+        return default
+
+
+def _words_file():
+    """词库文件路径 / Dictionary file path"""
+    return Path(_get_setting('SENSITIVE_WORDS_FILE', DEFAULT_WORDS_FILE))
+
+
+def _source_version(file_path):
+    """以文件 mtime 作为词库版本 / Use file mtime as dictionary version"""
+    try:
+        return file_path.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _read_words(file_path):
+    """读取词库文件 / Read dictionary file"""
+    if not file_path.exists():
+        return []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
 
 
 # 全局单例 / Global singleton
 _filter_instance = None
+# 上次检查词库变更的时间 / Last time the source was checked
+_last_checked = 0.0
+# 重建锁，保证同一时间只有一个线程在构建 / Only one rebuild at a time
+_reload_lock = threading.Lock()
 
 
-def get_filter():
-    """获取过滤器实例 / Get filter instance"""
+def reload_filter(force=False):
+    """
+    重新加载词库并原子替换过滤器 / Rebuild the filter and swap it in atomically
+    新自动机完全构建好后才替换全局引用，进行中的请求继续使用旧实例
+    Args:
+        force: 词库未变化时也强制重建 / Rebuild even if the source is unchanged
+    Returns:
+        当前生效的过滤器 / The active filter
+    """
     global _filter_instance
-    if _filter_instance is None:
-        _filter_instance = SensitiveWordFilter()
-    return _filter_instance
+    with _reload_lock:
+        file_path = _words_file()
+        version = _source_version(file_path)
+        current = _filter_instance
+        if not force and current is not None and current.version == version:
+            return current
+
+        new_filter = SensitiveWordFilter(_read_words(file_path), version=version)
+        _filter_instance = new_filter
+        logger.info(
+            'sensitive words reloaded: version=%s words=%d',
+            new_filter.version, len(new_filter.words)
+        )
+        return new_filter
+
+
+def _reload_in_background():
+    """在后台线程重建，不阻塞请求 / Rebuild off the request path"""
+    if _reload_lock.locked():
+        return
+    threading.Thread(
+        target=reload_filter, name='sensitive-words-reload', daemon=True
+    ).start()
+
+
+def get_filter():
+    """
+    获取过滤器实例 / Get filter instance
+    每隔 SENSITIVE_WORDS_RELOAD_INTERVAL 秒检查一次词库文件，变化后在后台重建
+    """
+    global _last_checked
+    instance = _filter_instance
+    if instance is None:
+        return reload_filter()
+
+    interval = _get_setting('SENSITIVE_WORDS_RELOAD_INTERVAL', DEFAULT_RELOAD_INTERVAL)
+    now = time.monotonic()
+    if interval and now - _last_checked >= interval:
+        _last_checked = now
+        if _source_version(_words_file()) != instance.version:
+            _reload_in_background()
+    return instance
+
+
+def get_filter_version():
+    """当前进程生效的词库版本 / Dictionary version active in this worker"""
+    return get_filter().version
 
 
 def check_sensitive(text):
@@ -79,6 +376,53 @@ def check_sensitive(text):
     return get_filter().contains_sensitive_word(text)
 
 
+def check_sensitive_batch(texts):
+    """
+    批量检查敏感词（快捷方法）/ Batch check sensitive words (shortcut)
+    返回: 与 texts 一一对应的敏感词列表
+    """
+    return get_filter().find_sensitive_words_batch(texts)
+
+
+def validate_sensitive_fields(attrs, field_names):
+    """
+    多字段敏感词校验，整个请求只扫描一遍 / Multi-field validation in one scan
+    供序列化器 validate() 调用
+    Args:
+        attrs: 已校验的数据 / Validated data
+        field_names: {字段: 提示名称}，字段值可以是字符串或字符串列表
+    Returns:
+        attrs（校验通过）/ attrs if passed
+    Raises:
+        serializers.ValidationError: 按字段返回错误 / Errors keyed by field
+    """
+    from rest_framework import serializers
+
+    fields = []
+    texts = []
+    for field in field_names:
+        value = attrs.get(field)
+        if not value:
+            continue
+        for text in (value if isinstance(value, (list, tuple)) else [value]):
+            fields.append(field)
+            texts.append(text)
+
+    found = {}
+    for field, words in zip(fields, check_sensitive_batch(texts)):
+        for word in words:
+            found.setdefault(field, [])
+            if word not in found[field]:
+                found[field].append(word)
+
+    if found:
+        raise serializers.ValidationError({
+            field: f'{field_names[field]}包含敏感词: {", ".join(words)}'
+            for field, words in found.items()
+        })
+    return attrs
+
+
 def validate_sensitive_field(value, field_name='内容'):
     """
     通用敏感词校验，供序列化器调用 / Generic sensitive word validation for serializers
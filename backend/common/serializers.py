@@ -2,8 +2,15 @@
 公共序列化器 / Common Serializers
 """
 
-from rest_framework import serializers
+import datetime
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
+from rest_framework import serializers
+
+from common.metrics import section
 
 
 def validate_user_exists(user_id):
@@ -37,6 +44,19 @@ def get_user_avatar(user):
     return None
 
 
+class TimedSerializerMixin:
+    """
+    序列化计入请求指标的 serializer 耗时 / Count serialization under the request's 'serializer' timing
+    按 to_representation 计时，many=True 时逐行计入，嵌套序列化器只算最外层
+    Times to_representation, so many=True counts every row and nested
+    serializers are counted once by the outermost one.
+    """
+
+    @section('serializer')
+    def to_representation(self, instance):
+        return super().to_representation(instance)
+
+
 class UserBriefSerializer(serializers.Serializer):
     """
     用户简要信息序列化器 / User Brief Serializer
@@ -48,3 +68,45 @@ class UserBriefSerializer(serializers.Serializer):
 
     def get_avatar(self, obj):
         return get_user_avatar(obj)
+
+
+def format_datetime(value, current=None):
+    """
+    按 DRF DateTimeField 的规则输出 ISO 8601 字符串 / ISO 8601 exactly as DRF renders it
+    转换到当前时区，UTC 偏移写作 Z / Converted to the current timezone, UTC as 'Z'
+    Args:
+        current: 目标时区，批量调用时由调用方解析一次 / Target timezone, resolved once by batch callers
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        return value
+    if settings.USE_TZ:
+        current = current or timezone.get_current_timezone()
+        if timezone.is_aware(value):
+            value = value.astimezone(current)
+        else:
+            value = timezone.make_aware(value, current)
+    elif timezone.is_aware(value):
+        value = timezone.make_naive(value, datetime.timezone.utc)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def user_brief(user):
+    """
+    用户简要信息字典，与 UserBriefSerializer 输出一致 / Same output as UserBriefSerializer
+    列表快速路径使用，调用方需预先 select_related('profile')
+    Used by list fast paths; callers should select_related('profile').
+    """
+    try:
+        profile = user.profile
+    except ObjectDoesNotExist:
+        profile = None
+    return {
+        'id': int(user.id),
+        'username': str(user.username),
+        'avatar': profile.avatar.url if profile and profile.avatar else None,
+    }
@@ -0,0 +1,365 @@
+"""
+查询预算测试工具 / Query-Budget Test Utilities
+
+seed_dataset() 预置一份接近真实规模的数据（数千成员的圈子、帖子、评论、点赞、好友、私信），
+QueryBudgetTestCase 对每个接口断言 SQL 查询数与响应大小的上限，超出即失败，
+在上线前发现 N+1 等回归
+seed_dataset() builds a realistically shaped dataset (a circle with
+thousands of members, posts, comments, likes, friends, conversations).
+QueryBudgetTestCase asserts an upper bound on SQL queries and response size
+for every endpoint, so N+1 regressions fail before deploy.
+"""
+
+import io
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.albums.models import AlbumPhoto
+from apps.circles.memberships import get_memberships
+from apps.circles.models import Circle, CircleMember
+from apps.circles.services import reconcile_member_counts
+from apps.friends.models import Blacklist, FriendRequest, Friendship
+from apps.messages.models import Conversation, PrivateMessage
+from apps.posts.models import Comment, Favorite, Like, Post
+from apps.posts.services import refresh_hot_ranks
+from apps.posts.timeline import rebuild_timeline
+from apps.reports.models import Report
+from apps.schools.models import School
+from apps.users.models import User, UserProfile
+
+PASSWORD = 'password'
+HTTP_METHODS = ('get', 'post', 'put', 'patch', 'delete')
+SAVEPOINT_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+# 测试只有一个进程，可以用进程内缓存；查询数因此不含数据库缓存表的读写
+# Tests run in one process, so a local cache is safe and query counts
+# exclude reads and writes of the database cache table
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def seed_dataset(members=2000, posts=200, conversations=30, messages_per_conversation=20):
+    """
+    预置数据集 / Seed the dataset
+    viewer 是主要的请求用户：加入多个圈子、有好友、收藏、私信和待处理请求
+    viewer is the main requesting user: member of several circles, with
+    friends, favorites, conversations and pending requests.
+    Returns:
+        SimpleNamespace: 各测试需要引用的对象 / Objects the tests refer to
+    """
+    schools = School.objects.bulk_create([
+        School(name=f'第{i}中学', province=f'省份{i % 5}', city=f'城市{i % 10}')
+        for i in range(20)
+    ])
+    school = schools[0]
+
+    viewer = User.objects.create_user(username='viewer', password=PASSWORD)
+    UserProfile.objects.create(
+        user=viewer, real_name='张三', school=school,
+        enrollment_year=2010, graduation_year=2013, class_name='1班',
+        is_profile_complete=True,
+    )
+
+    # 普通用户不设密码，避免逐个哈希 / Unusable passwords skip per-user hashing
+    users = User.objects.bulk_create([
+        User(username=f'user{i:05d}', password='!') for i in range(members)
+    ])
+    UserProfile.objects.bulk_create([
+        UserProfile(
+            user=user, real_name=f'同学{i}', school=school,
+            enrollment_year=2010, graduation_year=2013, class_name=f'{i % 12 + 1}班',
+            is_profile_complete=True,
+        )
+        for i, user in enumerate(users)
+    ])
+
+    school_circle = Circle.objects.create(
+        circle_type='school', school=school, name=school.name,
+        owner=viewer, created_by=viewer,
+    )
+    grade_circles = [
+        Circle.objects.create(
+            circle_type='grade', school=school, grade_year=2000 + i,
+            name=f'{school.name} {2000 + i}级', owner=users[i], created_by=users[i],
+        )
+        for i in range(10)
+    ]
+    class_circle = Circle.objects.create(
+        circle_type='class', school=school, grade_year=2010, class_name='1班',
+        name=f'{school.name} 2010级 1班', owner=viewer, created_by=viewer,
+    )
+
+    memberships = [CircleMember(circle=school_circle, user=viewer, role='admin', status='approved')]
+    memberships += [CircleMember(circle=school_circle, user=user, status='approved') for user in users]
+    memberships += [CircleMember(circle=circle, user=viewer, status='approved') for circle in grade_circles]
+    memberships += [
+        CircleMember(circle=circle, user=user, status='approved')
+        for circle in grade_circles for user in users[:50]
+    ]
+    memberships.append(CircleMember(circle=class_circle, user=viewer, role='admin', status='approved'))
+    memberships += [CircleMember(circle=class_circle, user=user, status='approved') for user in users[:40]]
+    memberships += [CircleMember(circle=class_circle, user=user, status='pending') for user in users[40:60]]
+    CircleMember.objects.bulk_create(memberships, batch_size=1000)
+    reconcile_member_counts()
+
+    post_list = Post.objects.bulk_create([
+        Post(
+            circle=school_circle if i % 4 else grade_circles[i % 10],
+            author=viewer if i % 10 == 0 else users[i % members],
+            content=f'帖子内容 {i} ' * 5,
+            images=[f'https://example.com/{i}.jpg'] if i % 3 == 0 else [],
+            tags=['回忆'] if i % 2 else [],
+            like_count=i % 50, comment_count=0, hot_score=i % 97,
+        )
+        for i in range(posts)
+    ])
+    post = post_list[4]
+
+    comments = Comment.objects.bulk_create([
+        Comment(post=post, author=users[i], content=f'评论 {i}') for i in range(100)
+    ])
+    Comment.objects.bulk_create([
+        Comment(
+            post=post, author=users[i % members], parent=comments[i % 10],
+            reply_to=users[(i + 1) % members], content=f'回复 {i}',
+        )
+        for i in range(300)
+    ])
+    Post.objects.filter(pk=post.pk).update(comment_count=400)
+
+    Like.objects.bulk_create([
+        Like(user=users[i], post=post_list[j])
+        for i in range(100) for j in range(0, posts, 10)
+    ], batch_size=1000)
+    Like.objects.bulk_create([Like(user=viewer, post=p) for p in post_list[::3]])
+    Favorite.objects.bulk_create([Favorite(user=viewer, post=p) for p in post_list[:60]])
+
+    friends = users[:100]
+    Friendship.objects.bulk_create(
+        [Friendship(user=viewer, friend=friend) for friend in friends]
+        + [Friendship(user=friend, friend=viewer) for friend in friends]
+    )
+    friend_requests = FriendRequest.objects.bulk_create([
+        FriendRequest(sender=user, receiver=viewer, message='你好') for user in users[100:130]
+    ])
+    Blacklist.objects.bulk_create([Blacklist(user=viewer, blocked_user=user) for user in users[130:140]])
+
+    conversation_list = []
+    for other in friends[:conversations]:
+        conversation = Conversation.objects.create(user1=viewer, user2=other)
+        message_list = PrivateMessage.objects.bulk_create([
+            PrivateMessage(
+                conversation=conversation,
+                sender=viewer if i % 2 else other,
+                receiver=other if i % 2 else viewer,
+                content=f'消息 {i}', is_read=i < messages_per_conversation - 3,
+            )
+            for i in range(messages_per_conversation)
+        ])
+        conversation.last_message = message_list[-1]
+        conversation.last_message_time = timezone.now()
+        conversation.user1_unread_count = 3
+        conversation.save()
+        conversation_list.append(conversation)
+
+    photos = AlbumPhoto.objects.bulk_create([
+        AlbumPhoto(
+            circle=class_circle, uploader=viewer if i % 2 else users[i],
+            image=f'albums/2026/01/{i}.jpg', description=f'照片 {i}',
+        )
+        for i in range(30)
+    ])
+    reports = Report.objects.bulk_create([
+        Report(reporter=users[i], target_type='post', target_id=post_list[i].id, reason='广告')
+        for i in range(20)
+    ])
+
+    refresh_hot_ranks()
+    rebuild_timeline(viewer)
+
+    return SimpleNamespace(
+        viewer=viewer, users=users, school=school, schools=schools,
+        school_circle=school_circle, grade_circles=grade_circles, class_circle=class_circle,
+        posts=post_list, post=post, comment=comments[0],
+        friends=friends, friend_requests=friend_requests,
+        conversations=conversation_list, photos=photos, reports=reports,
+        pending_member=CircleMember.objects.filter(circle=class_circle, status='pending').first(),
+    )
+
+
+def iter_api_urls(patterns=None, prefix=''):
+    """
+    遍历所有接口路由 / Iterate over every API route
+    Yields:
+        (url 名称, 方法, 视图所在模块) / (url name, HTTP method, view module)
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_api_urls(pattern.url_patterns, prefix + str(pattern.pattern))
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if view_class is None or not (prefix + str(pattern.pattern)).startswith('api/'):
+                continue
+            for method in HTTP_METHODS:
+                if hasattr(view_class, method):
+                    yield pattern.name, method.upper(), view_class.__module__
+
+
+def test_image(name='photo.png'):
+    """1x1 PNG 上传文件 / A 1x1 PNG upload"""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (1, 1)).save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], CACHES=LOCAL_CACHES
+)
+class QueryBudgetTestCase(TestCase):
+    """
+    查询预算测试基类 / Base class for query-budget tests
+    子类声明 budgets = {('url 名称', '方法'): (最大查询数, 最大响应字节数)}，
+    并在 view_modules 中列出负责的视图模块；test_every_url_has_budget 会检查
+    这些模块下的每个路由和方法都有预算
+    Subclasses declare budgets = {(url name, METHOD): (max queries, max bytes)}
+    and list the view modules they own in view_modules;
+    test_every_url_has_budget checks that every route and method in those
+    modules has a budget.
+    类中所有测试跑完后，tearDownClass 再检查每个声明的预算都实际请求过
+    After every test of the class has run, tearDownClass also checks that
+    each declared budget was actually exercised.
+    """
+    budgets = {}
+    view_modules = ()
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._media_root = tempfile.mkdtemp()
+        cls._media_override = override_settings(MEDIA_ROOT=cls._media_root)
+        cls._media_override.enable()
+        cls._exercised = set()
+        cls._tests_run = set()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._media_override.disable()
+        shutil.rmtree(cls._media_root, ignore_errors=True)
+        super().tearDownClass()
+        cls._check_budgets_exercised()
+
+    @classmethod
+    def _check_budgets_exercised(cls):
+        """
+        声明了预算却没有请求过的接口视为失败 / Fail on budgets that no test exercised
+        只运行了部分测试时跳过 / Skipped when only some tests of the class ran
+        """
+        if cls._tests_run != set(unittest.TestLoader().getTestCaseNames(cls)):
+            return
+        unused = sorted(set(cls.budgets) - cls._exercised)
+        if unused:
+            raise AssertionError(
+                f'{cls.__qualname__} 声明了预算但没有测试请求这些接口 / '
+                f'budgets declared but never exercised: {unused}'
+            )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_dataset()
+
+    def setUp(self):
+        # 缓存不随事务回滚，先清空；再预热浏览者的成员身份，预算按活跃用户的常态计
+        # The cache outlives rollbacks, so clear it, then warm the viewer's
+        # memberships so budgets reflect an active user's steady state
+        self._tests_run.add(self._testMethodName)
+        cache.clear()
+        get_memberships(self.data.viewer)
+        self.client = APIClient()
+        self.client.force_authenticate(self.data.viewer)
+
+    def client_for(self, user):
+        """以其他用户身份请求 / Client authenticated as another user"""
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def budget_for(self, name, method):
+        """读取预算并记为已请求 / Look up a budget and mark it exercised"""
+        self._exercised.add((name, method))
+        return self.budgets[(name, method)]
+
+    def assertWithinBudget(self, name, method, kwargs=None, data=None, query=None,
+                           client=None, format='json', status=None):
+        """
+        请求接口并断言查询数和响应大小不超过预算 / Request and assert the budget
+        Args:
+            name: url 名称 / URL name
+            method: HTTP 方法 / HTTP method
+            query: 查询字符串参数 / Query string parameters
+            status: 期望的状态码，默认要求 2xx / Expected status, 2xx by default
+        Returns:
+            Response
+        """
+        max_queries, max_bytes = self.budget_for(name, method)
+        client = client or self.client
+        url = reverse(name, kwargs=kwargs)
+        if query:
+            url = f'{url}?{urlencode(query)}'
+
+        call = getattr(client, method.lower())
+        with CaptureQueriesContext(connection) as ctx:
+            if format == 'multipart':
+                response = call(url, data, format='multipart')
+            else:
+                response = call(url, data, format=format)
+            # 流式响应边迭代边查询，需在统计范围内读完 / Streaming bodies query while iterating
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+
+        if status is None:
+            self.assertLess(response.status_code, 300, f'{method} {url}: {body[:500]!r}')
+        else:
+            self.assertEqual(response.status_code, status, f'{method} {url}: {body[:500]!r}')
+
+        # TestCase 中 atomic() 变成保存点，线上是事务的开始与提交，不计为查询
+        # Under TestCase atomic() issues savepoints; in production it begins and
+        # commits a transaction, which is not counted as a query
+        captured = [
+            query for query in ctx.captured_queries
+            if not query['sql'].startswith(SAVEPOINT_STATEMENTS)
+        ]
+        queries = len(captured)
+        self.assertLessEqual(
+            queries, max_queries,
+            f'{method} {url} 执行了 {queries} 条查询，预算 {max_queries} / '
+            f'ran {queries} queries over a budget of {max_queries}:\n'
+            + '\n'.join(query['sql'] for query in captured)
+        )
+        self.assertLessEqual(
+            len(body), max_bytes,
+            f'{method} {url} 响应 {len(body)} 字节，预算 {max_bytes} / '
+            f'response of {len(body)} bytes over a budget of {max_bytes}'
+        )
+        return response
+
+    def test_every_url_has_budget(self):
+        if not self.view_modules:
+            return
+        missing = sorted(
+            (name, method) for name, method, module in iter_api_urls()
+            if module.startswith(self.view_modules) and (name, method) not in self.budgets
+        )
+        self.assertEqual(missing, [], '这些接口没有查询预算 / Endpoints without a query budget')
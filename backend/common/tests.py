@@ -0,0 +1,392 @@
+"""
+通用模块测试 / Common Tests
+"""
+
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from apps.schools.models import School
+
+from . import metrics, sensitive
+from .middleware import RequestMetricsMiddleware
+from .serializers import TimedSerializerMixin
+from .sensitive import (
+    SKIP_CHAR, AhoCorasickAutomaton, SensitiveWordFilter, normalize_text, normalize_word,
+    validate_sensitive_fields,
+)
+
+
+def brute_force_matches(patterns, text):
+    """逐个模式串逐个位置比较，作为对照 / Reference: compare every pattern at every offset"""
+    return {
+        (start, start + len(pattern), index)
+        for index, pattern in enumerate(patterns)
+        for start in range(len(text) - len(pattern) + 1)
+        if text.startswith(pattern, start)
+    }
+
+
+def legacy_filter_text(words, text, replacement='*'):
+    """原实现：按词依次 str.replace / The previous implementation, one str.replace per word"""
+    result = text
+    for word in words:
+        if word.lower() in result.lower():
+            result = result.replace(word, replacement * len(word))
+    return result
+
+
+class AhoCorasickAutomatonTests(SimpleTestCase):
+    """AC 自动机与逐词查找结果一致 / The automaton finds what per-word search finds"""
+
+    def assertMatches(self, patterns, text):
+        automaton = AhoCorasickAutomaton(patterns)
+        self.assertEqual(set(automaton.iter_matches(text)), brute_force_matches(patterns, text))
+
+    def test_overlapping_matches(self):
+        patterns = ['he', 'she', 'his', 'hers']
+        automaton = AhoCorasickAutomaton(patterns)
+        self.assertEqual(
+            {(start, end, patterns[index]) for start, end, index in automaton.iter_matches('ushers')},
+            {(1, 4, 'she'), (2, 4, 'he'), (2, 6, 'hers')},
+        )
+        self.assertMatches(['赌博', '博彩', '彩票'], '网上赌博彩票')
+
+    def test_shared_prefix(self):
+        patterns = ['赌', '赌博', '赌博机']
+        automaton = AhoCorasickAutomaton(patterns)
+        self.assertEqual(
+            sorted(automaton.iter_matches('卖赌博机')),
+            [(1, 2, 0), (1, 3, 1), (1, 4, 2)],
+        )
+        # 前缀匹配后失配，需回退到失配指针继续 / Falls back through failure links after a partial match
+        self.assertMatches(['abcd', 'bcf', 'c'], 'abcf')
+
+    def test_random_texts(self):
+        rng = random.Random(0)
+        patterns = sorted({''.join(rng.choices('abc', k=rng.randint(1, 4))) for _ in range(12)})
+        for _ in range(200):
+            self.assertMatches(patterns, ''.join(rng.choices('abcd', k=rng.randint(0, 30))))
+
+    def test_skip_character(self):
+        automaton = AhoCorasickAutomaton(['赌博'])
+        # 跨越占位字符时起点仍是原文下标 / Spans over skipped chars keep original offsets
+        self.assertEqual(list(automaton.iter_matches('来赌--博', skip='-')), [(1, 5, 0)])
+        self.assertEqual(list(automaton.iter_matches('来赌--博')), [])
+
+
+class SensitiveWordFilterTests(SimpleTestCase):
+    """匹配与替换 / Matching and masking"""
+
+    def test_same_words_as_legacy(self):
+        words = ['赌博', '赌博机', '博彩', 'spam']
+        word_filter = SensitiveWordFilter(words)
+        for text in ['网上赌博机博彩', '正常内容', 'SPAM 邮件', '赌博赌博']:
+            legacy = {word for word in words if word.lower() in text.lower()}
+            self.assertEqual(set(word_filter.contains_sensitive_word(text)[1]), legacy, text)
+
+    def test_longest_match_masked(self):
+        words = ['赌博', '赌博机']
+        word_filter = SensitiveWordFilter(words)
+        self.assertEqual(word_filter.filter_text('卖赌博机的'), '卖***的')
+        # 原实现先替换短词后长词就找不到了，结果取决于集合顺序
+        # The old replace loop missed the longer word once the shorter one was
+        # masked, so its output depended on set order
+        self.assertEqual(legacy_filter_text(words, '卖赌博机的'), '卖**机的')
+        self.assertEqual(legacy_filter_text(words[::-1], '卖赌博机的'), '卖***的')
+
+    def test_overlapping_matches_masked(self):
+        word_filter = SensitiveWordFilter(['赌博', '博彩'])
+        self.assertEqual(word_filter.filter_text('网上赌博彩票'), '网上***票')
+        self.assertEqual(legacy_filter_text(['赌博', '博彩'], '网上赌博彩票'), '网上**彩票')
+        self.assertEqual(word_filter.contains_sensitive_word('网上赌博彩票'), (True, ['赌博', '博彩']))
+
+
+class BatchScanTests(SimpleTestCase):
+    """多段文本拼接扫描后按段归属 / Batch matches map back to their own text"""
+
+    def setUp(self):
+        self.word_filter = SensitiveWordFilter(['赌博', '博彩', 'spam'])
+
+    def assertSameAsSingle(self, texts):
+        self.assertEqual(
+            self.word_filter.find_sensitive_words_batch(texts),
+            [self.word_filter.contains_sensitive_word(text)[1] for text in texts],
+        )
+
+    def test_several_fields(self):
+        texts = ['标题没问题', '正文里有赌博和 SPAM', '标签：博彩']
+        self.assertEqual(
+            self.word_filter.find_sensitive_words_batch(texts),
+            [[], ['赌博', 'spam'], ['博彩']],
+        )
+        self.assertSameAsSingle(texts)
+
+    def test_match_next_to_separator(self):
+        # 词首尾紧贴分隔符仍归属本段 / Words touching the separator stay in their own text
+        self.assertEqual(
+            self.word_filter.find_sensitive_words_batch(['赌博', '赌博', '说赌博', '赌博说']),
+            [['赌博'], ['赌博'], ['赌博'], ['赌博']],
+        )
+        # 不能跨段拼出敏感词，分隔符也不会被当作干扰字符跳过
+        # Words never span two texts, and the separator is not skipped like punctuation
+        self.assertEqual(self.word_filter.find_sensitive_words_batch(['我赌', '博彩']), [[], ['博彩']])
+        self.assertEqual(self.word_filter.find_sensitive_words_batch(['赌-', '-博']), [[], []])
+        self.assertSameAsSingle(['spa', 'm', '赌博彩'])
+
+    def test_empty_fields(self):
+        self.assertEqual(
+            self.word_filter.find_sensitive_words_batch(['', None, '赌博', '', 'spam']),
+            [[], [], ['赌博'], [], ['spam']],
+        )
+        self.assertEqual(self.word_filter.find_sensitive_words_batch([]), [])
+        self.assertEqual(self.word_filter.find_sensitive_words_batch(['', '']), [[], []])
+
+    def test_errors_keyed_by_field(self):
+        attrs = {'title': '周末聚会', 'content': '', 'tags': ['回忆', '博彩'], 'note': 'spam'}
+        with mock.patch('common.sensitive.get_filter', return_value=self.word_filter):
+            with self.assertRaises(ValidationError) as raised:
+                validate_sensitive_fields(attrs, {'title': '标题', 'content': '内容', 'tags': '标签', 'note': '备注'})
+        self.assertEqual(
+            {field: str(error) for field, error in raised.exception.detail.items()},
+            {'tags': '标签包含敏感词: 博彩', 'note': '备注包含敏感词: spam'},
+        )
+
+
+class NormalizationTests(SimpleTestCase):
+    """归一化后匹配，替换覆盖原文区间 / Matching after normalization, masking the original span"""
+
+    def setUp(self):
+        self.word_filter = SensitiveWordFilter(['赌博', 'spam', 'QQ群'])
+
+    def assertFound(self, text, words):
+        self.assertEqual(self.word_filter.contains_sensitive_word(text), (bool(words), words), text)
+
+    def test_keeps_length(self):
+        for text in ['ＳＰＡＭ！', '賭\u3000博', 'a\u200bb', '😀赌博']:
+            self.assertEqual(len(normalize_text(text)), len(text))
+        self.assertEqual(normalize_text('ＡＢｃ１'), 'abc1')
+        self.assertEqual(normalize_text('賭,博'), '赌' + SKIP_CHAR + '博')
+        self.assertEqual(normalize_word('Q Q群'), 'qq群')
+
+    def test_full_width(self):
+        self.assertFound('ｓｐａｍ', ['spam'])
+        self.assertFound('ＱＱ群', ['QQ群'])
+
+    def test_case(self):
+        self.assertFound('SPAM', ['spam'])
+        self.assertFound('Spam 和 qq群', ['spam', 'QQ群'])
+
+    def test_traditional_variants(self):
+        self.assertFound('網上賭博', ['赌博'])
+        self.assertFound('賭博', ['赌博'])
+
+    def test_separator_evasion(self):
+        for text in ['赌 博', '赌*博', '赌.博', '赌\u3000博', '赌\u200b博', '赌，，博']:
+            self.assertFound(text, ['赌博'])
+        for text in ['s-p-a-m', 'S P A M', 's_p_a_m']:
+            self.assertFound(text, ['spam'])
+        # 中间夹着文字或数字不算 / Letters or digits in between break the word
+        for text in ['赌一博', 'sp4m', '赌😀博']:
+            self.assertFound(text, [])
+
+    def test_mask_original_span(self):
+        self.assertEqual(self.word_filter.filter_text('来賭-博吧'), '来***吧')
+        self.assertEqual(self.word_filter.filter_text('ＳＰＡＭ！'), '****！')
+        self.assertEqual(self.word_filter.filter_text('加 Q\u3000Q 群'), '加 *****')
+        # 词前后的干扰字符不替换 / Separators around the word are kept
+        self.assertEqual(self.word_filter.filter_text('「赌 博」'), '「***」')
+        self.assertEqual(self.word_filter.filter_text('没有问题'), '没有问题')
+
+
+class ReloadTests(SimpleTestCase):
+    """词库热加载 / Dictionary hot reload"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.words_file = Path(directory.name) / 'words.txt'
+        self.write_words(['赌博'], mtime_ns=1_000_000_000)
+
+        settings_override = override_settings(
+            SENSITIVE_WORDS_FILE=self.words_file, SENSITIVE_WORDS_RELOAD_INTERVAL=30
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # 还原全局单例 / Restore the global singleton
+        saved = sensitive._filter_instance, sensitive._last_checked
+        self.addCleanup(setattr, sensitive, '_last_checked', saved[1])
+        self.addCleanup(setattr, sensitive, '_filter_instance', saved[0])
+        sensitive._filter_instance = None
+
+    def write_words(self, words, mtime_ns):
+        self.words_file.write_text('\n'.join(words), encoding='utf-8')
+        os.utime(self.words_file, ns=(mtime_ns, mtime_ns))
+
+    def test_swaps_in_new_automaton_on_mtime_change(self):
+        old = sensitive.reload_filter()
+        self.assertEqual(sensitive.get_filter_version(), 1_000_000_000)
+        self.assertIs(sensitive.reload_filter(), old)
+
+        self.write_words(['赌博', '博彩'], mtime_ns=2_000_000_000)
+        new = sensitive.reload_filter()
+        self.assertIsNot(new, old)
+        self.assertIs(sensitive.get_filter(), new)
+        self.assertEqual(sensitive.get_filter_version(), 2_000_000_000)
+        self.assertEqual(sensitive.check_sensitive('博彩'), (True, ['博彩']))
+        # 旧实例不被修改，仍在使用它的请求结果不变 / The old instance is untouched for requests still using it
+        self.assertEqual(old.contains_sensitive_word('博彩'), (False, []))
+        self.assertEqual(old.version, 1_000_000_000)
+
+    def test_get_filter_reloads_in_background(self):
+        old = sensitive.get_filter()
+        self.write_words(['博彩'], mtime_ns=2_000_000_000)
+        sensitive._last_checked = time.monotonic()
+        # 检查间隔内不看文件 / The file is not checked within the interval
+        self.assertIs(sensitive.get_filter(), old)
+
+        sensitive._last_checked -= 30
+        with mock.patch.object(sensitive.threading, 'Thread') as thread:
+            # 请求线程立即拿到旧实例，重建在后台进行 / The request keeps the old instance while rebuilding off-thread
+            self.assertIs(sensitive.get_filter(), old)
+        thread.assert_called_once()
+        thread.call_args.kwargs['target']()
+        self.assertEqual(sensitive.get_filter_version(), 2_000_000_000)
+        self.assertEqual(sensitive.check_sensitive('赌博'), (False, []))
+
+
+class PercentileTests(SimpleTestCase):
+    """最近秩法分位数 / Nearest-rank percentile"""
+
+    def test_nearest_rank(self):
+        values = list(range(1, 11))
+        self.assertEqual(
+            [metrics.percentile(values, pct) for pct in (1, 50, 90, 95, 99, 100)],
+            [1, 5, 9, 10, 10, 10],
+        )
+        self.assertEqual(metrics.percentile([7], 50), 7)
+        self.assertEqual(metrics.percentile([1, 2, 3], 50), 2)
+        self.assertIsNone(metrics.percentile([], 95))
+
+
+class Item(TimedSerializerMixin, serializers.Serializer):
+    name = serializers.CharField()
+
+
+class Group(TimedSerializerMixin, serializers.Serializer):
+    name = serializers.CharField()
+    items = Item(many=True)
+
+
+class TimedSerializerTests(SimpleTestCase):
+    """序列化计入 serializer 耗时 / Serialization is counted as serializer time"""
+
+    def serialize(self, serializer, clock):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.activate(request_metrics)
+        try:
+            with mock.patch.object(metrics.time, 'perf_counter', side_effect=clock):
+                data = serializer.data
+        finally:
+            metrics.deactivate(token)
+        return data, request_metrics.timings
+
+    def test_nested_serializers_counted_once(self):
+        group = {'name': '一班', 'items': [{'name': '甲'}, {'name': '乙'}]}
+        # 只有最外层读取时钟，多读一次会耗尽 side_effect
+        # Only the outermost serializer reads the clock; one more call would exhaust side_effect
+        data, timings = self.serialize(Group(group), [1.0, 3.5])
+        self.assertEqual(data['items'], [{'name': '甲'}, {'name': '乙'}])
+        self.assertEqual(timings['serializer'], 2.5)
+
+    def test_many_counts_every_row(self):
+        _, timings = self.serialize(Item([{'name': '甲'}, {'name': '乙'}], many=True), [1.0, 2.0, 5.0, 5.5])
+        self.assertEqual(timings['serializer'], 1.5)
+
+    def test_no_clock_outside_requests(self):
+        with mock.patch.object(metrics.time, 'perf_counter') as perf_counter:
+            self.assertEqual(Item({'name': '甲'}).data, {'name': '甲'})
+        perf_counter.assert_not_called()
+
+
+@override_settings(REQUEST_METRICS_ENABLED=True)
+class RequestMetricsMiddlewareTests(TestCase):
+    """请求指标中间件 / Request metrics middleware"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='viewer', password='password')
+        cls.school = School.objects.create(name='第一中学', province='北京', city='北京', created_by=cls.user)
+
+    def setUp(self):
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+        # 客户端在首个请求时按当前设置加载中间件 / The client loads middleware under the current settings
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/v1/schools/{self.school.id}/'
+
+    def test_server_timing_and_log(self):
+        with self.assertLogs('common.metrics', 'INFO') as logs, CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        queries = len(captured)
+        self.assertGreaterEqual(queries, 1)
+
+        header = response['Server-Timing']
+        self.assertRegex(
+            header,
+            rf'^db;dur=[\d.]+;desc="{queries} queries", serializer;dur=[\d.]+, '
+            r'view;dur=[\d.]+, total;dur=[\d.]+$'
+        )
+        durations = dict(re.findall(r'(\w+);dur=([\d.]+)', header))
+
+        self.assertEqual(len(logs.records), 1)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['event'], 'request')
+        self.assertEqual(line['route'], 'GET api/v1/schools/<int:pk>/')
+        self.assertEqual(line['path'], self.url)
+        self.assertEqual(line['status'], 200)
+        self.assertEqual(line['queries'], queries)
+        for name in ('db', 'serializer', 'view', 'total'):
+            self.assertEqual(line[f'{name}_ms'], float(durations[name]))
+        self.assertLessEqual(line['view_ms'], line['total_ms'])
+
+        [route] = metrics.registry.snapshot()
+        self.assertEqual(route['route'], line['route'])
+        self.assertEqual(route['count'], 1)
+        self.assertEqual(route['queries']['max'], queries)
+
+    def test_counts_queries_and_db_time(self):
+        clock = iter(range(100))
+        # 每次读取时钟前进 1 秒，每条查询计 1 秒数据库耗时
+        # Every clock read advances one second, so each query adds one second of DB time
+        with mock.patch('common.middleware.time.perf_counter', side_effect=lambda: next(clock)), \
+                self.assertLogs('common.metrics', 'INFO') as logs, \
+                CaptureQueriesContext(connection) as captured:
+            self.client.get(self.url)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['queries'], len(captured))
+        self.assertEqual(line['db_ms'], len(captured) * 1000)
+
+    @override_settings(REQUEST_METRICS_ENABLED=False)
+    def test_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            RequestMetricsMiddleware(lambda request: None)
+        response = APIClient().get(self.url)
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(metrics.registry.snapshot(), [])
@@ -58,6 +58,8 @@ INSTALLED_APPS = [
 
 #中间件
 MIDDLEWARE = [
+    # 请求指标（REQUEST_METRICS_ENABLED 为 False 时不加载）/ Request metrics, off by default
+    "common.middleware.RequestMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -176,3 +178,70 @@ CORS_ALLOW_ALL_ORIGINS = True  # 开发环境允许所有，生产环境需要
 
 # Custom User Model / 自定义用户模型
 AUTH_USER_MODEL = 'users.User'
+
+# 敏感词库 / Sensitive words
+# 词库文件修改后各 worker 会在检查间隔内后台重建，无需重启
+SENSITIVE_WORDS_FILE = BASE_DIR / "common" / "sensitive_words.txt"
+SENSITIVE_WORDS_RELOAD_INTERVAL = 30  # 检查间隔（秒），0 表示不自动检查
+
+# 帖子浏览量缓冲 / Post view count buffer
+# 浏览量在进程内累积，满足任一条件时批量写回数据库
+VIEW_COUNT_FLUSH_INTERVAL = 10  # 写回间隔（秒）
+VIEW_COUNT_FLUSH_THRESHOLD = 100  # 累计浏览次数
+VIEW_COUNT_FLUSH_BACKGROUND = True  # 后台线程按间隔写回，空闲 worker 也不积压
+
+# 热帖排行 / Hot post ranking
+# 由 refresh_hot_ranks 命令定期物化到 post_hot_ranks 表
+HOT_RANK_GRAVITY = 1.8  # 时间衰减指数
+HOT_RANK_WINDOW_DAYS = 30  # 参与排行的帖子时间窗口（天）
+HOT_RANK_SIZE = 1000  # 每个圈子保留的排行条数
+
+# 首页时间线 / Home timeline
+TIMELINE_MAX_ENTRIES = 800  # 每个用户保留的条数
+TIMELINE_FANOUT_LIMIT = 5000  # 成员数超过此值的圈子改为读取时拉取
+
+# 缓存 / Cache
+# 成员身份（用于权限判断）等数据放在缓存中，必须是所有 worker 共享的缓存：
+# 设置 REDIS_URL 时使用 Redis，否则使用数据库缓存（部署时先执行 createcachetable）。
+# 进程内的 LocMemCache 会导致其他 worker 读到过期权限，启动时拒绝（见 apps.circles.apps）
+# Memberships used by permission checks live in the cache, so it must be
+# shared by every worker: Redis when REDIS_URL is set, otherwise the
+# database cache (run createcachetable on deploy). A per-process
+# LocMemCache is refused at startup (see apps.circles.apps).
+REDIS_URL = os.environ.get("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "django_cache",
+        }
+    }
+
+# 圈子成员身份缓存 / Circle membership cache
+# 成员变更时主动失效，TTL 只是兜底 / Invalidated on change, the TTL is only a backstop
+CIRCLE_MEMBERSHIP_CACHE_TTL = 300  # 秒
+
+# 点赞/收藏写后合并 / Write-behind likes and favorites
+# 开启后点赞、收藏只追加到 reaction_events 队列，由 apply_reaction_events 命令合并批量写入
+REACTION_WRITE_BEHIND = False
+REACTION_EVENT_BATCH_SIZE = 5000  # 每批处理的事件数
+
+# 私信推送 / Message push
+# /api/v1/messages/stream/ 需以 ASGI 部署（uvicorn config.asgi:application）
+# The stream endpoint requires an ASGI server
+# postgres：LISTEN/NOTIFY 跨进程唤醒；local：只唤醒本进程（单进程部署）
+MESSAGE_EVENTS_BACKEND = os.environ.get("MESSAGE_EVENTS_BACKEND", "postgres")
+MESSAGE_STREAM_HEARTBEAT = 15  # 心跳间隔（秒）
+MESSAGE_STREAM_MAX_SECONDS = 300  # 单个连接的最长时间（秒），之后客户端重连
+
+# 请求指标 / Request metrics
+# 开启后每个请求输出 Server-Timing 头和 common.metrics 日志，汇总见 /api/v1/metrics/
+REQUEST_METRICS_ENABLED = os.environ.get("REQUEST_METRICS_ENABLED", "") == "1"
+REQUEST_METRICS_SAMPLE_SIZE = 1000  # 每个路由保留的最近样本数
@@ -6,6 +6,7 @@ from django.conf.urls.static import static
 from apps.users.urls import profile_urlpatterns
 from apps.posts.views import ImageUploadView, CirclePostListView, MyFavoriteListView, FeedView
 from apps.posts.urls import comment_urlpatterns
+from common.metrics import MetricsView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -31,6 +32,8 @@ urlpatterns = [
     path("api/v1/", include("apps.albums.urls")),
     # 举报系统 / Report system
     path("api/v1/reports/", include("apps.reports.urls")),
+    # 请求指标 / Request metrics
+    path("api/v1/metrics/", MetricsView.as_view(), name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -1,13 +1,49 @@
 /**
- * 消息轮询 Hook / Message Polling Hook
+ * 消息推送 Hook / Message Push Hook
+ * 优先使用 SSE 推送；服务端未以 ASGI 部署（501）时回退到定时轮询
+ * Prefers the SSE push stream and falls back to interval polling when the
+ * server is not running under ASGI (501).
  */
 
 import { useState, useEffect, useRef, useCallback } from 'react';
-import { getMessageUpdates } from '../services/message';
+import { getMessageUpdates, openMessageStream } from '../services/message';
+
+// 推送正常结束后的重连间隔 / Reconnect delay after the stream ends normally
+const RECONNECT_DELAY = 1000;
+
+const sleep = (ms, signal) => new Promise((resolve) => {
+  const timer = setTimeout(resolve, ms);
+  signal.addEventListener('abort', () => {
+    clearTimeout(timer);
+    resolve();
+  }, { once: true });
+});
+
+// 逐个解析 SSE 事件的 data / Parse the data of each SSE event
+const readEvents = async (body, onData) => {
+  const reader = body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return;
+    buffer += value;
+    let end;
+    while ((end = buffer.indexOf('\n\n')) >= 0) {
+      const block = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      const data = block
+        .split('\n')
+        .filter((line) => line.startsWith('data:'))
+        .map((line) => line.slice(5).trimStart())
+        .join('\n');
+      if (data) onData(JSON.parse(data));
+    }
+  }
+};
 
 const useMessagePolling = (options = {}) => {
   const {
-    interval = 5000,  // 轮询间隔，默认5秒 / Polling interval, default 5s
+    interval = 5000,  // 轮询间隔（回退时），默认5秒 / Polling interval when falling back, default 5s
     enabled = true,   // 是否启用 / Whether enabled
     onNewMessage,     // 新消息回调 / New message callback
   } = options;
@@ -17,42 +53,77 @@ const useMessagePolling = (options = {}) => {
   const lastMessageIdRef = useRef(0);
   const timerRef = useRef(null);
 
+  const applyUpdates = useCallback((data) => {
+    setUnreadCount(data?.unread_count || 0);
+
+    const messages = data?.new_messages || [];
+    if (messages.length > 0) {
+      // 更新最后消息ID / Update last message ID
+      const maxId = Math.max(...messages.map(m => m.id));
+      lastMessageIdRef.current = maxId;
+
+      setNewMessages(messages);
+      onNewMessage?.(messages);
+    }
+  }, [onNewMessage]);
+
   const poll = useCallback(async () => {
     try {
       const res = await getMessageUpdates(lastMessageIdRef.current);
       if (res?.code === 200) {
-        setUnreadCount(res.data?.unread_count || 0);
-
-        const messages = res.data?.new_messages || [];
-        if (messages.length > 0) {
-          // 更新最后消息ID / Update last message ID
-          const maxId = Math.max(...messages.map(m => m.id));
-          lastMessageIdRef.current = maxId;
-
-          setNewMessages(messages);
-          onNewMessage?.(messages);
-        }
+        applyUpdates(res.data);
       }
     } catch (error) {
       console.error('Message polling error:', error);
     }
-  }, [onNewMessage]);
+  }, [applyUpdates]);
 
   useEffect(() => {
     if (!enabled) return;
 
-    // 立即执行一次 / Execute immediately
-    poll();
+    const controller = new AbortController();
+
+    const startPolling = () => {
+      // 立即执行一次 / Execute immediately
+      poll();
+      timerRef.current = setInterval(poll, interval);
+    };
+
+    const listen = async () => {
+      while (!controller.signal.aborted) {
+        let delay = interval;
+        try {
+          const res = await openMessageStream(lastMessageIdRef.current, controller.signal);
+          if (res.status === 501 || res.status === 404) {
+            // 服务端不支持推送 / Push is not available on this server
+            startPolling();
+            return;
+          }
+          if (res.ok) {
+            await readEvents(res.body, applyUpdates);
+            delay = RECONNECT_DELAY;
+          } else {
+            // 401 等错误走一次轮询，由 axios 拦截器刷新令牌
+            // On 401 and other errors, poll once so the axios interceptor refreshes the token
+            await poll();
+          }
+        } catch (error) {
+          if (controller.signal.aborted) return;
+          console.error('Message stream error:', error);
+        }
+        await sleep(delay, controller.signal);
+      }
+    };
 
-    // 设置定时器 / Set timer
-    timerRef.current = setInterval(poll, interval);
+    listen();
 
     return () => {
+      controller.abort();
       if (timerRef.current) {
         clearInterval(timerRef.current);
       }
     };
-  }, [enabled, interval, poll]);
+  }, [enabled, interval, poll, applyUpdates]);
 
   // 手动刷新 / Manual refresh
   const refresh = useCallback(() => {
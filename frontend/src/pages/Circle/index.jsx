@@ -13,8 +13,8 @@ import {
   joinCircle,
   leaveCircle,
   getCirclePosts,
-  togglePostLike,
-  togglePostFavorite,
+  setPostLike,
+  setPostFavorite,
 } from '../../services';
 
 const Circle = () => {
@@ -46,10 +46,12 @@ const Circle = () => {
     setLoading(false);
   };
 
-  const loadPosts = async (page = 1) => {
+  const loadPosts = async (cursor = null) => {
     setPostsLoading(true);
     const ordering = activeTab === 'hot' ? 'hot' : activeTab === 'reply' ? 'reply_at' : 'created_at';
-    const res = await getCirclePosts(id, { page, ordering });
+    const params = { ordering };
+    if (cursor) params.cursor = cursor;
+    const res = await getCirclePosts(id, params);
     if (res?.code === 200) setPosts(res.data.results);
     setPostsLoading(false);
   };
@@ -66,11 +68,14 @@ const Circle = () => {
 
   // 点赞 / Like
   const handleLike = async (postId) => {
-    const res = await togglePostLike(postId);
+    const post = posts.find(p => p.id === postId);
+    const res = await setPostLike(postId, !post?.is_liked);
     if (res?.code === 200) {
+      // 仅在状态确实变化时调整计数 / Only adjust the count when the state changed
+      const delta = res.data.changed ? (res.data.liked ? 1 : -1) : 0;
       setPosts(posts.map(p =>
         p.id === postId
-          ? { ...p, is_liked: res.data.liked, like_count: p.like_count + (res.data.liked ? 1 : -1) }
+          ? { ...p, is_liked: res.data.liked, like_count: p.like_count + delta }
           : p
       ));
     }
@@ -78,7 +83,8 @@ const Circle = () => {
 
   // 收藏 / Favorite
   const handleFavorite = async (postId) => {
-    const res = await togglePostFavorite(postId);
+    const post = posts.find(p => p.id === postId);
+    const res = await setPostFavorite(postId, !post?.is_favorited);
     if (res?.code === 200) {
       setPosts(posts.map(p =>
         p.id === postId ? { ...p, is_favorited: res.data.favorited } : p
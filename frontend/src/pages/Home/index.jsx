@@ -6,39 +6,45 @@ import { useState, useEffect } from 'react';
 import { Tabs, Spin, Empty, theme } from 'antd';
 import PostCard from '../../components/PostCard';
 import { getFeed } from '../../services/post';
-import { togglePostLike, togglePostFavorite } from '../../services/interaction';
+import { setPostLike, setPostFavorite } from '../../services/interaction';
 
 const Home = () => {
   const { token } = theme.useToken();
   const [activeTab, setActiveTab] = useState('all');
   const [loading, setLoading] = useState(true);
   const [posts, setPosts] = useState([]);
-  const [page, setPage] = useState(1);
+  const [nextCursor, setNextCursor] = useState(null);
   const [hasMore, setHasMore] = useState(true);
 
   useEffect(() => {
     loadFeed();
   }, []);
 
-  const loadFeed = async (pageNum = 1) => {
+  // 游标分页：cursor 为空时加载第一页 / Cursor pagination: no cursor loads the first page
+  const loadFeed = async (cursor = null) => {
     setLoading(true);
-    const res = await getFeed({ page: pageNum, page_size: 20 });
+    const params = { page_size: 20 };
+    if (cursor) params.cursor = cursor;
+    const res = await getFeed(params);
     if (res?.code === 200) {
       const newPosts = res.data?.results || [];
-      setPosts(pageNum === 1 ? newPosts : [...posts, ...newPosts]);
-      setHasMore(newPosts.length === 20);
-      setPage(pageNum);
+      setPosts(cursor ? [...posts, ...newPosts] : newPosts);
+      setHasMore(Boolean(res.data?.has_more));
+      setNextCursor(res.data?.next_cursor || null);
     }
     setLoading(false);
   };
 
   // 点赞 / Like
   const handleLike = async (postId) => {
-    const res = await togglePostLike(postId);
+    const post = posts.find(p => p.id === postId);
+    const res = await setPostLike(postId, !post?.is_liked);
     if (res?.code === 200) {
+      // 仅在状态确实变化时调整计数 / Only adjust the count when the state changed
+      const delta = res.data.changed ? (res.data.liked ? 1 : -1) : 0;
       setPosts(posts.map(p =>
         p.id === postId
-          ? { ...p, is_liked: res.data.liked, like_count: p.like_count + (res.data.liked ? 1 : -1) }
+          ? { ...p, is_liked: res.data.liked, like_count: p.like_count + delta }
           : p
       ));
     }
@@ -46,7 +52,8 @@ const Home = () => {
 
   // 收藏 / Favorite
   const handleFavorite = async (postId) => {
-    const res = await togglePostFavorite(postId);
+    const post = posts.find(p => p.id === postId);
+    const res = await setPostFavorite(postId, !post?.is_favorited);
     if (res?.code === 200) {
       setPosts(posts.map(p =>
         p.id === postId ? { ...p, is_favorited: res.data.favorited } : p
@@ -2,13 +2,43 @@
  * 评论项组件 / Comment Item Component
  */
 
+import { useState, useEffect } from 'react';
 import { theme } from 'antd';
 import { HeartOutlined, HeartFilled, DeleteOutlined } from '@ant-design/icons';
 import UserAvatar from '../../components/UserAvatar';
 import { formatRelativeTime } from '../../utils/format';
+import { getCommentReplies } from '../../services/interaction';
 
 const CommentItem = ({ comment, onReply, onDelete, onLike }) => {
   const { token } = theme.useToken();
+  // 列表只带前几条回复，其余按游标分页加载 / The list only previews replies; load the rest by cursor
+  const [replies, setReplies] = useState(comment.replies || []);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [expanded, setExpanded] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  useEffect(() => {
+    setReplies(comment.replies || []);
+    setNextCursor(null);
+    setExpanded(false);
+  }, [comment]);
+
+  const hasMoreReplies = expanded ? !!nextCursor : replies.length < (comment.reply_count || 0);
+
+  // 加载更多回复 / Load more replies
+  const loadMoreReplies = async () => {
+    if (loadingMore) return;
+    setLoadingMore(true);
+    const res = await getCommentReplies(comment.id, expanded ? { cursor: nextCursor } : {});
+    if (res?.code === 200) {
+      const results = res.data?.results || [];
+      // 第一页包含预览中的回复，直接替换 / The first page includes the preview, so replace it
+      setReplies(prev => (expanded ? [...prev, ...results] : results));
+      setNextCursor(res.data?.has_more ? res.data.next_cursor : null);
+      setExpanded(true);
+    }
+    setLoadingMore(false);
+  };
 
   const styles = {
     container: {
@@ -43,6 +73,11 @@ const CommentItem = ({ comment, onReply, onDelete, onLike }) => {
       paddingLeft: token.paddingSM,
     },
     reply: { marginBottom: token.paddingSM },
+    more: {
+      color: token.colorPrimary,
+      fontSize: token.fontSizeSM,
+      cursor: 'pointer',
+    },
     replyHeader: {
       display: 'flex',
       alignItems: 'center',
@@ -80,9 +115,9 @@ const CommentItem = ({ comment, onReply, onDelete, onLike }) => {
       </div>
 
       {/* 楼中楼回复 */}
-      {comment.replies?.length > 0 && (
+      {replies.length > 0 && (
         <div style={styles.replies}>
-          {comment.replies.map(reply => (
+          {replies.map(reply => (
             <div key={reply.id} style={styles.reply}>
               <div style={styles.replyHeader}>
                 <UserAvatar src={reply.author?.avatar} size={24} />
@@ -109,6 +144,15 @@ const CommentItem = ({ comment, onReply, onDelete, onLike }) => {
               </div>
             </div>
           ))}
+          {hasMoreReplies && (
+            <span style={styles.more} onClick={loadMoreReplies}>
+              {loadingMore
+                ? '加载中...'
+                : expanded
+                  ? '加载更多回复'
+                  : `查看全部 ${comment.reply_count} 条回复`}
+            </span>
+          )}
         </div>
       )}
     </div>
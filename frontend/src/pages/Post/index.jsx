@@ -13,8 +13,8 @@ import CommentSection from './CommentSection';
 import { formatFullTime } from '../../utils/format';
 import {
   getPostDetail,
-  togglePostLike,
-  togglePostFavorite,
+  setPostLike,
+  setPostFavorite,
 } from '../../services';
 
 const Post = () => {
@@ -39,19 +39,21 @@ const Post = () => {
 
   // 点赞 / Like
   const handleLike = async () => {
-    const res = await togglePostLike(id);
+    const res = await setPostLike(id, !post.is_liked);
     if (res?.code === 200) {
+      // 仅在状态确实变化时调整计数 / Only adjust the count when the state changed
+      const delta = res.data.changed ? (res.data.liked ? 1 : -1) : 0;
       setPost({
         ...post,
         is_liked: res.data.liked,
-        like_count: post.like_count + (res.data.liked ? 1 : -1),
+        like_count: post.like_count + delta,
       });
     }
   };
 
   // 收藏 / Favorite
   const handleFavorite = async () => {
-    const res = await togglePostFavorite(id);
+    const res = await setPostFavorite(id, !post.is_favorited);
     if (res?.code === 200) {
       setPost({ ...post, is_favorited: res.data.favorited });
     }
@@ -11,6 +11,15 @@ export const togglePostLike = (postId) => {
   return request.post(`/posts/${postId}/like/`);
 };
 
+/**
+ * 设置帖子点赞状态（幂等，重复点击不会重复计数）/ Set post like state (idempotent)
+ */
+export const setPostLike = (postId, liked) => {
+  return liked
+    ? request.put(`/posts/${postId}/like/`)
+    : request.delete(`/posts/${postId}/like/`);
+};
+
 /**
  * 帖子收藏/取消 / Toggle post favorite
  */
@@ -18,6 +27,15 @@ export const togglePostFavorite = (postId) => {
   return request.post(`/posts/${postId}/favorite/`);
 };
 
+/**
+ * 设置帖子收藏状态（幂等）/ Set post favorite state (idempotent)
+ */
+export const setPostFavorite = (postId, favorited) => {
+  return favorited
+    ? request.put(`/posts/${postId}/favorite/`)
+    : request.delete(`/posts/${postId}/favorite/`);
+};
+
 /**
  * 获取我的收藏列表 / Get my favorites
  */
@@ -32,6 +50,13 @@ export const getPostComments = (postId, params) => {
   return request.get(`/posts/${postId}/comments/`, { params });
 };
 
+/**
+ * 获取评论回复（游标分页）/ Get comment replies (cursor paginated)
+ */
+export const getCommentReplies = (commentId, params) => {
+  return request.get(`/comments/${commentId}/replies/`, { params });
+};
+
 /**
  * 发表评论 / Create comment
  */
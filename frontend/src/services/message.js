@@ -33,3 +33,17 @@ export const getUnreadCount = () => {
 export const getMessageUpdates = (sinceId = 0) => {
   return request.get('/messages/updates/', { params: { since: sinceId } });
 };
+
+// 打开私信推送连接（SSE）/ Open the message push stream (SSE)
+// EventSource 无法携带 Authorization 头，这里用 fetch 读取事件流
+// EventSource cannot send the Authorization header, so the stream is read with fetch
+export const openMessageStream = (sinceId = 0, signal) => {
+  const token = localStorage.getItem('access_token');
+  return fetch(`/api/v1/messages/stream/?since=${sinceId}`, {
+    headers: {
+      Accept: 'text/event-stream',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    signal,
+  });
+};